@@ -0,0 +1,48 @@
+"""
+ローカルのスタブレポーターに対して、逐次スクレイピングと並列スクレイピングの所要時間を比較する。
+
+    python -m benchmarks.bench_parallel_scrape --delay 1.0 --parallelism 1 3 5
+
+Chrome（webdriver）が必要。
+"""
+import argparse
+import logging
+import threading
+import time
+
+import settings
+from src.scraper import Scraper
+from src.stub_reporter import StubReporterServer
+
+logger = logging.getLogger(__name__)
+
+
+def run(parallelism: int, url: str) -> tuple:
+    scraper = Scraper(url=url, id='bench', parallelism=parallelism)
+    start = time.perf_counter()
+    results = scraper.scrape_ctstage_report(settings.TEMPLATES, threading.Event())
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='並列スクレイピングのベンチマーク')
+    parser.add_argument('--delay', type=float, default=1.0, help='スタブのレポート作成遅延（秒）')
+    parser.add_argument('--parallelism', type=int, nargs='+', default=[1, 3, 5])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = StubReporterServer(delay=args.delay).start()
+    try:
+        baseline = None
+        for parallelism in args.parallelism:
+            elapsed, results = run(parallelism, server.url)
+            if baseline is None:
+                baseline = results
+            status = 'OK' if results.keys() == baseline.keys() else 'MISMATCH'
+            print(f"parallelism={parallelism}: {elapsed:.2f} 秒 ({len(results)} テンプレート, {status})")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
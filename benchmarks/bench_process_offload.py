@@ -0,0 +1,73 @@
+"""
+ワークブックの読込・処理（pd.read_excel + Processor.process）を、スレッドプールとプロセスプールで
+同時に実行した場合の処理時間を比較する（settings.CYCLE_EXECUTION_MODE の 'thread' / 'process'）。
+結果はプロセス間でsrc.processors.offloadのpayloadとして受け渡す。
+結果の一致は、現在時刻で変わるお待たせ件数（wfc_*）を除いて確認する。
+
+    python -m benchmarks.bench_process_offload --rows 20000 --files 2 --workers 8
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import os
+import tempfile
+import time
+
+import settings
+from benchmarks.synthetic import activity_frame, support_frame
+from src.processors.offload import decode_payload, encode_payload
+
+
+def parse_file(kind: str, file_path: str) -> bytes:
+    """ワーカーで実行する: キャッシュを使わずに読み込んで処理し、payloadを返す"""
+    from src.processors.activity_processor import ActivityProcessor
+    from src.processors.support_processor import SupportProcessor
+
+    settings.WORKBOOK_CACHE_ENABLED = False
+    processor = (ActivityProcessor if kind == 'activity' else SupportProcessor)(file_path)
+    processor.load_data()
+    return encode_payload(processor.process())
+
+
+def stable_items(results: list) -> list:
+    """お待たせ件数（wfc_*）は現在時刻で変わるため、比較から除く"""
+    return [{k: v for k, v in result.items() if not k.startswith('wfc_')} for result in results]
+
+
+def run(executor, jobs: list) -> tuple:
+    start = time.perf_counter()
+    futures = [executor.submit(parse_file, kind, path) for kind, path in jobs]
+    results = [decode_payload(f.result())[0] for f in futures]
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='読込・処理のスレッドプールとプロセスプールの比較')
+    parser.add_argument('--rows', type=int, default=20000, help='1ファイルあたりの行数')
+    parser.add_argument('--files', type=int, default=2, help='種類（活動・サポート）ごとのファイル数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        jobs = []
+        for i in range(args.files):
+            for kind, frame in (('activity', activity_frame), ('support', support_frame)):
+                path = os.path.join(directory, f"{kind}_{i}.xlsx")
+                frame(args.rows, seed=i).to_excel(path, index=False)
+                jobs.append((kind, path))
+        print(f"{len(jobs)}ファイル（{args.rows}行/ファイル）, {args.workers}ワーカー")
+
+        with ThreadPoolExecutor(max_workers=args.workers) as threads, \
+                ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as processes:
+            run(processes, jobs[:1])  # 子プロセスの起動とimportを計測から除く
+            for repeat in range(args.repeat):
+                thread_time, thread_results = run(threads, jobs)
+                process_time, process_results = run(processes, jobs)
+                same = stable_items(thread_results) == stable_items(process_results)
+                print(f"{repeat + 1}回目: thread {thread_time:.2f} 秒, process {process_time:.2f} 秒, "
+                      f"{thread_time / process_time:.2f}倍, 結果の一致 {'OK' if same else 'NG'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+ワークブックの同期について、従来の固定待ち（RefreshAll後にREFRESH_INTERVAL秒sleepして保存）と
+RefreshEngineの完了確認（ポーリング）を、ファイルだけで動作する代替バックエンド（FileRefreshBackend）で比較する。
+Excelがない環境（Linux）でも実行できる。
+
+    python -m benchmarks.bench_refresh_engine --durations 0.2 0.5 1 2 --fixed 5 --scale 0.2
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from src.processors.refresh_backend import AdaptiveTimeout, FileRefreshBackend, RefreshEngine
+
+
+def fixed_sleep_sync(backend: FileRefreshBackend, file_path: str, fixed: float) -> tuple:
+    """従来の実装と同じ手順。保存時点で更新が終わっていたかも返す"""
+    backend.start()
+    try:
+        start = time.perf_counter()
+        workbook = backend.open(file_path)
+        backend.refresh(workbook)
+        time.sleep(fixed)
+        completed = not backend.is_refreshing(workbook)
+        backend.save(workbook)
+        backend.close(workbook)
+        return time.perf_counter() - start, completed
+    finally:
+        backend.stop()
+
+
+def engine_sync(backend: FileRefreshBackend, file_path: str, poll_interval: float, timeouts: AdaptiveTimeout) -> float:
+    engine = RefreshEngine(backend, poll_interval=poll_interval, max_retries=5, retry_delay=0, timeouts=timeouts)
+    start = time.perf_counter()
+    if not engine.sync(file_path, threading.Event()):
+        raise RuntimeError(f"同期に失敗しました。: {file_path}")
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='固定待ちとRefreshEngineの同期時間の比較')
+    parser.add_argument('--durations', type=float, nargs='+', default=[0.2, 0.5, 1, 2],
+                        help='更新にかかる時間（秒、scale倍する前）')
+    parser.add_argument('--fixed', type=float, default=5, help='従来のREFRESH_INTERVAL（秒、scale倍する前）')
+    parser.add_argument('--poll', type=float, default=0.2, help='完了を確認する間隔（秒、scale倍する前）')
+    parser.add_argument('--failures', type=int, default=1, help='再試行の確認に使う、失敗させる回数')
+    parser.add_argument('--scale', type=float, default=0.2, help='全ての時間に掛ける倍率（実行時間の短縮用）')
+    args = parser.parse_args()
+
+    scale = args.scale
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'book.xlsx')
+        open(file_path, 'wb').close()
+
+        print(f"{'更新時間':>8} {'固定待ち':>8} {'保存時に完了':>12} {'ポーリング':>10} {'短縮':>6}")
+        for duration in args.durations:
+            fixed_time, completed = fixed_sleep_sync(FileRefreshBackend(duration * scale), file_path, args.fixed * scale)
+            timeouts = AdaptiveTimeout(minimum=5 * scale, maximum=120 * scale, factor=3)
+            polled_time = engine_sync(FileRefreshBackend(duration * scale), file_path, args.poll * scale, timeouts)
+            print(f"{duration:>8.2f} {fixed_time / scale:>8.2f} {'OK' if completed else 'NG':>12} "
+                  f"{polled_time / scale:>10.2f} {fixed_time / polled_time:>5.1f}倍")
+
+        # 失敗した試行は同じアプリケーションで再試行する（起動は1回）
+        backend = FileRefreshBackend(0.5 * scale, failures=args.failures)
+        timeouts = AdaptiveTimeout(minimum=5 * scale, maximum=120 * scale, factor=3)
+        elapsed = engine_sync(backend, file_path, args.poll * scale, timeouts)
+        print(f"再試行: {args.failures}回失敗後に成功 {elapsed / scale:.2f} 秒, "
+              f"試行 {backend.attempts[file_path]}回, アプリケーションの起動 {backend.starts}回")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+各プロセッサ・計算クラスの処理時間を合成データ（benchmarks.synthetic）で個別に計測し、
+結果をJSONファイルに保存する。--baselineに前回の結果を指定すると、ベンチマークごとの比率を表示する。
+
+計測対象（ファイルの読込は含まない）:
+    ActivityProcessor.process, SupportProcessor.process, CloseProcessor.process,
+    ShiftProcessor（シフト表の変換あり/変換済み）, KpiCalculator.get_all_metrics, OperatorCalculator.calculate
+
+    python -m benchmarks.bench_suite --rows 10000 100000 1000000 --operators 300 --repeat 5
+    python -m benchmarks.bench_suite --rows 10000 --baseline benchmarks/results/bench_suite_20260101_000000.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import settings
+from benchmarks import synthetic
+from src.calculator.kpi_calculator import KpiCalculator
+from src.calculator.operator_calculator import OperatorCalculator
+from src.processors.activity_processor import ActivityProcessor
+from src.processors.close_processor import CloseProcessor
+from src.processors.operator_index import OperatorIdentityIndex
+from src.processors.shift_processor import ShiftProcessor
+from src.processors.support_processor import SupportProcessor
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def with_frame(processor_class, df: pd.DataFrame):
+    """読込済みの状態のProcessorを作成する"""
+    processor = processor_class('')
+    processor.df = df
+    return processor
+
+
+def measure(func, repeat: int) -> dict:
+    """funcをrepeat回実行した処理時間（秒）の統計"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'max': max(times), 'repeat': repeat}
+
+
+def run_scale(rows: int, operators: int, repeat: int, directory: str, seed: int = 0) -> list:
+    """1つの規模（行数）で全てのベンチマークを実行する"""
+    df_activity = synthetic.activity_frame(rows, seed)
+    df_support = synthetic.support_frame(rows, seed)
+    df_operators = synthetic.operators_frame(operators, seed)
+    df_close = synthetic.close_frame(rows, df_operators, seed)
+    df_ctstage = synthetic.ctstage_frame(df_operators, seed)
+    shift_path = os.path.join(directory, f"shift_{rows}.csv")
+    synthetic.write_shift_schedule(shift_path, df_operators, seed)
+    operator_index = OperatorIdentityIndex(df_operators)
+
+    activity_result = with_frame(ActivityProcessor, df_activity).process()
+    support_result = with_frame(SupportProcessor, df_support).process()
+    close_result = with_frame(CloseProcessor, df_close).process()
+    shift_result = ShiftProcessor(shift_path).process()
+    kpi_data = {**synthetic.group_analysis_results(rows // 10, seed), **activity_result, **support_result}
+
+    def shift_cold():
+        # 更新日時を変えてシフト表の変換（CSVの読込を含む）からやり直す
+        os.utime(shift_path, ns=(time.time_ns(), time.time_ns()))
+        ShiftProcessor(shift_path).process()
+
+    def kpi_all_metrics():
+        calculator = KpiCalculator(kpi_data)
+        for group in KpiCalculator.TEMPLATE_MAP:
+            calculator.get_all_metrics(group)
+
+    benchmarks = [
+        ('ActivityProcessor.process', rows, lambda: with_frame(ActivityProcessor, df_activity).process()),
+        ('SupportProcessor.process', rows, lambda: with_frame(SupportProcessor, df_support).process()),
+        ('CloseProcessor.process', rows, lambda: with_frame(CloseProcessor, df_close).process()),
+        ('ShiftProcessor（変換あり）', operators, shift_cold),
+        ('ShiftProcessor（変換済み）', operators,
+         lambda: ShiftProcessor(shift_path).process()),
+        ('KpiCalculator.get_all_metrics', rows, kpi_all_metrics),
+        ('OperatorCalculator.calculate', operators,
+         lambda: OperatorCalculator(df_operators, df_ctstage, close_result, shift_result,
+                                    operator_index=operator_index).calculate()),
+    ]
+    results = []
+    for name, size, func in benchmarks:
+        stats = measure(func, repeat)
+        results.append({'benchmark': name, 'rows': rows, 'size': size, **stats})
+        print(f"{name:<32} {rows:>9} {size:>9} {stats['min'] * 1000:>10.2f} {stats['median'] * 1000:>10.2f}")
+    return results
+
+
+def compare(results: list, baseline_path: str) -> None:
+    """前回の結果と中央値を比較する"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['benchmark'], r['rows']): r for r in json.load(f)['results']}
+    print(f"\n{baseline_path} との比較（中央値、今回/前回）")
+    for r in results:
+        previous = baseline.get((r['benchmark'], r['rows']))
+        if previous is None:
+            continue
+        ratio = r['median'] / previous['median'] if previous['median'] else float('nan')
+        mark = '  遅くなりました' if ratio > 1.2 else ''
+        print(f"{r['benchmark']:<32} {r['rows']:>9} {ratio:>6.2f}{mark}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='プロセッサ・計算クラスのベンチマーク')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                        help='活動・サポート・クローズの行数（1万〜500万行）')
+    parser.add_argument('--operators', type=int, default=300, help='オペレーター数')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='結果のJSONファイル（省略時は benchmarks/results/bench_suite_<日時>.json）')
+    parser.add_argument('--baseline', help='比較する前回の結果のJSONファイル')
+    args = parser.parse_args()
+
+    # 計測にワークブックのディスクキャッシュ（シフト表の変換結果など）を含めない
+    settings.WORKBOOK_CACHE_ENABLED = False
+
+    started = datetime.datetime.now()
+    print(f"{'ベンチマーク':<32} {'行数':>9} {'件数':>9} {'最小(ms)':>10} {'中央値(ms)':>10}")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            results.extend(run_scale(rows, args.operators, args.repeat, directory, args.seed))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_suite_{started.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'started': started.isoformat(timespec='seconds'),
+            'environment': {
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+            },
+            'parameters': {'operators': args.operators, 'repeat': args.repeat, 'seed': args.seed},
+            'results': results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n結果を保存しました。: {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+レポートのテーブル抽出を、各バックエンドが実際に使う経路で比較する。
+
+Seleniumバックエンド（既定）: スタブレポーターでオペレーター分析のレポートを作成し、
+Scraper.create_dateframeの高速抽出（settings.FAST_TABLE_EXTRACT: execute_scriptで対象テーブルの
+xmpテキストだけを取得）と、従来のcreate_dateframe_soup（page_sourceを取得してBeautifulSoupで全体をパース）を
+同じブラウザで計測する。Chrome（webdriver）が必要。
+
+    python -m benchmarks.bench_table_extract --operators 300 --filler 2000
+
+--offlineを指定した場合はブラウザを使わず、HTTPバックエンド（ReporterHttpClient）が使うlxmlでの抽出と
+BeautifulSoupによる全体パースを比較する。ページを指定しない場合は、スタブレポーターのページに指定数の
+オペレーター行とダミー要素を加えたページを生成する。キャプチャは driver.page_source をUTF-8で保存したものを使う。
+
+    python -m benchmarks.bench_table_extract --offline captured_op.html captured_ss.html
+"""
+import argparse
+import logging
+import time
+
+import settings
+from src.scraper import Scraper, build_report_dataframe, report_dataframe_lxml, report_dataframe_soup
+from src.stub_reporter import MAIN_PAGE, StubReporterServer, build_report_fragment
+
+LIST_NAMES = ['normal-list1-dummy-0', 'normal-list2-dummy-1']
+
+# 実際のレポーター画面と同程度のページソースにするため、レポートと無関係な要素を追加する
+_ADD_FILLER_SCRIPT = """
+var html = '';
+for (var i = 0; i < arguments[0]; i++) { html += '<div class="filler"><span>item ' + i + '</span><xmp>' + i + '</xmp></div>'; }
+document.body.insertAdjacentHTML('beforeend', html);
+"""
+
+
+def synthetic_page(operators: int, filler: int) -> str:
+    """オペレーター分析のテーブルと無関係な要素を含むページを作成する"""
+    noise = ''.join(f'<div class="filler"><span>item {i}</span><xmp>{i}</xmp></div>' for i in range(filler))
+    page = MAIN_PAGE.format(options='')
+    page = page.replace('<div id="normal-list1-container"></div>',
+                        f'<div id="normal-list1-container">{build_report_fragment("TEMPLATE_OP", 0, operators)}</div>')
+    page = page.replace('<div id="normal-list2-container"></div>',
+                        f'<div id="normal-list2-container">{build_report_fragment("TEMPLATE_SS", 1)}</div>')
+    return page.replace('</body>', f'{noise}</body>')
+
+
+def measure(func, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def same_frame(expected, actual) -> bool:
+    return expected.equals(actual) and expected.index.equals(actual.index)
+
+
+def run_browser(operators: int, filler: int, repeat: int) -> None:
+    """スタブレポーターに対して、Scraperの高速抽出とpage_source + BeautifulSoupを計測する"""
+    list_name = LIST_NAMES[0]
+    server = StubReporterServer(operators=operators).start()
+    scraper = Scraper(url=server.url, id='bench', parallelism=1)
+    try:
+        scraper.create_driver()
+        scraper.login()
+        scraper.call_template(settings.TEMPLATE_OP)
+        scraper.create_report_and_wait(settings.TEMPLATE_OP, element_id="0", list_name=list_name)
+        scraper.driver.execute_script(_ADD_FILLER_SCRIPT, filler)
+
+        # create_dateframeは高速抽出に失敗するとページソースから抽出するため、高速抽出だけを直接計測する
+        fast_time, actual = measure(lambda: build_report_dataframe(*scraper.extract_table(list_name)), repeat)
+        soup_time, expected = measure(lambda: scraper.create_dateframe_soup(list_name), repeat)
+        print(f"browser [{list_name}] rows={len(expected)} filler={filler} "
+              f"page_source+soup={soup_time * 1000:.2f}ms execute_script={fast_time * 1000:.2f}ms "
+              f"x{soup_time / fast_time:.1f} {'OK' if same_frame(expected, actual) else 'MISMATCH'}")
+    finally:
+        scraper.close_driver()
+        server.stop()
+
+
+def run_offline(pages: dict, repeat: int) -> None:
+    """ページソースから、lxml（HTTPバックエンド）とBeautifulSoupの抽出を計測する"""
+    for name, html in pages.items():
+        for list_name in LIST_NAMES:
+            try:
+                expected = report_dataframe_soup(html.encode('utf-8'), list_name)
+            except AttributeError:
+                continue  # このページには対象のテーブルがない
+            soup_time, _ = measure(lambda: report_dataframe_soup(html.encode('utf-8'), list_name), repeat)
+            lxml_time, actual = measure(lambda: report_dataframe_lxml(html, list_name), repeat)
+            print(f"{name} [{list_name}] rows={len(expected)} "
+                  f"soup={soup_time * 1000:.2f}ms lxml={lxml_time * 1000:.2f}ms "
+                  f"x{soup_time / lxml_time:.1f} {'OK' if same_frame(expected, actual) else 'MISMATCH'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='テーブル抽出のマイクロベンチマーク')
+    parser.add_argument('pages', nargs='*', help='キャプチャしたページソースのファイル（--offlineの場合）')
+    parser.add_argument('--offline', action='store_true', help='ブラウザを使わず、lxmlとBeautifulSoupを比較する')
+    parser.add_argument('--operators', type=int, default=200, help='オペレーター数')
+    parser.add_argument('--filler', type=int, default=2000, help='ページに加えるダミー要素数')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if not args.offline:
+        run_browser(args.operators, args.filler, args.repeat)
+        return
+    if args.pages:
+        pages = {path: open(path, encoding='utf-8').read() for path in args.pages}
+    else:
+        pages = {'synthetic': synthetic_page(args.operators, args.filler)}
+    run_offline(pages, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+waiting_for_callbackの「【受付】のみの案件」の抽出について、従来の外部結合（indicator付きmerge）と
+アンチジョイン（ActivityProcessor.reception_only_cases）を案件あたりの活動数を変えて比較する。
+
+    python -m benchmarks.bench_waiting_for_callback --cases 2000 --activities 1 5 20 50 100
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.processors.activity_processor import ActivityProcessor
+
+CASE = '案件番号 (関連) (サポート案件)'
+
+
+def merge_reception_only(df: pd.DataFrame) -> pd.DataFrame:
+    """従来の実装（案件ごとに【受付】×その他の活動の直積が作られる）"""
+    contains_df = df[df['件名'] == '【受付】']
+    uncontains_df = df[df['件名'] != '【受付】']
+    merged = pd.merge(contains_df, uncontains_df, on=CASE, how='outer', indicator=True)
+    s = merged.loc[merged['_merge'] == 'left_only', CASE].unique()
+    return df[df[CASE].isin(s)], len(merged)
+
+
+def activities(cases: int, per_case: int, seed: int = 0) -> pd.DataFrame:
+    """案件ごとに【受付】をper_case件、半数の案件にはその他の活動をper_case件持つデータを作成する"""
+    rng = np.random.default_rng(seed)
+    case_numbers = np.array([f"CAS-{i:07d}" for i in range(cases)])
+    reception = pd.DataFrame({CASE: np.repeat(case_numbers, per_case), '件名': '【受付】'})
+    answered = case_numbers[rng.random(cases) < 0.5]
+    others = pd.DataFrame({CASE: np.repeat(answered, per_case), '件名': '対応'})
+    df = pd.concat([reception, others], ignore_index=True)
+    df['登録日時'] = rng.random(len(df))
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def measure(func, df: pd.DataFrame, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(df)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='waiting_for_callbackのアンチジョインのベンチマーク')
+    parser.add_argument('--cases', type=int, default=2000)
+    parser.add_argument('--activities', type=int, nargs='+', default=[1, 5, 20, 50, 100],
+                        help='案件あたりの活動数')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'活動数/案件':>10} {'行数':>9} {'merge(ms)':>10} {'結合後の行数':>12} {'anti-join(ms)':>14} {'一致':>4}")
+    for per_case in args.activities:
+        df = activities(args.cases, per_case)
+        merge_time, (expected, merged_rows) = measure(merge_reception_only, df, args.repeat)
+        anti_time, actual = measure(ActivityProcessor.reception_only_cases, df, args.repeat)
+        same = expected.index.sort_values().equals(actual.index.sort_values())
+        print(f"{per_case:>10} {len(df):>9} {merge_time * 1000:>10.1f} {merged_rows:>12} "
+              f"{anti_time * 1000:>14.1f} {'OK' if same else 'NG':>4}")
+
+
+if __name__ == '__main__':
+    main()
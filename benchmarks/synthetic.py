@@ -0,0 +1,207 @@
+"""
+ベンチマーク・動作確認用の合成データを作成する。
+列名と値の種類は実際のファイル（活動・サポート・クローズ・operators・シフト表・TEMPLATE_OP）に合わせている。
+
+DataFrameはメモリ上で作成するため行数に上限はないが（1万〜500万行）、xlsxに書き出せるのは
+Excelの上限（1,048,576行）までになる。
+
+    python -m benchmarks.synthetic --rows 10000 --operators 300 --out data/synthetic
+"""
+import argparse
+import calendar
+import csv
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+import settings
+
+EXCEL_BASE_DATE = datetime.datetime(1899, 12, 30)
+EXCEL_MAX_ROWS = 1048575  # 見出し行を除いたxlsxの最大行数
+
+SUPPORT_GROUPS = ['SS', 'TVS', '顧問先', 'HHD']
+RECEPTION_TYPES = ['折返し', '留守電', 'HHD入電（折返し）', '直受け', 'HHD入電（直受け）']
+OUTCOMES = ['完了', '対応中', '対応待ち', '折返し不要・ｷｬﾝｾﾙ', 'ﾒｰﾙ・FAX回答（送信）']
+SHIFTS = ['9:00-18:00', '10:00-19:00', '13:00-22:00', '22:00-7:00', '休', '有休', '']
+
+
+def today_serial() -> float:
+    """今日0時のシリアル値"""
+    return float((datetime.datetime.combine(datetime.date.today(), datetime.time.min) - EXCEL_BASE_DATE).days)
+
+
+def case_numbers(values: np.ndarray) -> np.ndarray:
+    return np.char.add('CAS-', np.char.zfill(values.astype(str), 7))
+
+
+def activity_frame(rows: int, seed: int = 0, days: int = 2) -> pd.DataFrame:
+    """
+    活動データ（TS_todays_activity.xlsx）。案件あたり平均2件の活動を持ち、
+    案件の登録日時は直近days日（今日を含む）に分布する。
+    """
+    rng = np.random.default_rng(seed)
+    cases = max(rows // 2, 1)
+    case_of_row = rng.integers(0, cases, rows)
+    registered = today_serial() - rng.integers(0, days, cases) + rng.uniform(0, 0.99, cases)
+    return pd.DataFrame({
+        '件名': rng.choice(['【受付】', '対応', '折返し連絡'], rows, p=[0.5, 0.3, 0.2]),
+        '登録日時': registered[case_of_row] + rng.uniform(0, 0.05, rows),
+        '案件番号 (関連) (サポート案件)': case_numbers(case_of_row),
+        '登録日時 (関連) (サポート案件)': registered[case_of_row],
+        '受付タイプ (関連) (サポート案件)': rng.choice(RECEPTION_TYPES[:4], cases)[case_of_row],
+        'サポート区分 (関連) (サポート案件)': rng.choice(SUPPORT_GROUPS, cases)[case_of_row],
+        '指標に含めない (関連) (サポート案件)': rng.choice(['いいえ', 'はい'], cases, p=[0.9, 0.1])[case_of_row],
+        '顛末コード (関連) (サポート案件)': rng.choice(OUTCOMES[:3], cases)[case_of_row],
+    })
+
+
+def support_frame(rows: int, seed: int = 0, days: int = 2) -> pd.DataFrame:
+    """サポートデータ（TS_todays_support.xlsx）"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        '案件番号': case_numbers(np.arange(rows)),
+        '登録日時': today_serial() - rng.integers(0, days, rows) + rng.uniform(0, 0.99, rows),
+        '受付タイプ': rng.choice(RECEPTION_TYPES, rows),
+        '顛末コード': rng.choice(OUTCOMES, rows),
+        'かんたん！保守区分': rng.choice(['会員', '非会員'], rows),
+        '回答タイプ': rng.choice(['1次完了', '2次T転送', '2次転送'], rows),
+        'サポート区分': rng.choice(SUPPORT_GROUPS, rows),
+    })
+
+
+def operators_frame(operators: int, seed: int = 0) -> pd.DataFrame:
+    """operators.xlsx（氏名とSweet・CTStageの名前、稼働中フラグ）"""
+    rng = np.random.default_rng(seed)
+    numbers = np.char.zfill(np.arange(operators).astype(str), 4)
+    return pd.DataFrame({
+        '氏名': np.char.add('氏名', numbers),
+        'Sweet': np.char.add('sw', numbers),
+        'CTStage': np.char.add('op', numbers),
+        'active': rng.choice([1, 0], operators, p=[0.8, 0.2]),
+    })
+
+
+def close_frame(rows: int, df_operators: pd.DataFrame, seed: int = 0, days: int = 2) -> pd.DataFrame:
+    """クローズデータ（TS_todays_close.xlsx）。CloseProcessorは6列目の'所有者'と'完了日時'を使う"""
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(datetime.date.today())
+    completed = today - pd.to_timedelta(rng.integers(0, days, rows), unit='D') \
+        + pd.to_timedelta(rng.integers(0, 86400, rows), unit='s')
+    return pd.DataFrame({
+        '案件番号': case_numbers(np.arange(rows)),
+        '件名': 'お問い合わせ',
+        '状態': '完了',
+        '作成日時': completed - pd.to_timedelta(rng.integers(0, 7200, rows), unit='s'),
+        '完了日時': completed,
+        '所有者': rng.choice(df_operators['氏名'].to_numpy(), rows),
+        'サポート区分': rng.choice(SUPPORT_GROUPS, rows),
+    })
+
+
+def hms(seconds: np.ndarray) -> np.ndarray:
+    """秒をhh:mm:ss形式の文字列にする"""
+    seconds = seconds.astype(np.int64)
+    return np.array([f"{s // 3600:02}:{s % 3600 // 60:02}:{s % 60:02}" for s in seconds.tolist()], dtype=object)
+
+
+def ctstage_frame(df_operators: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    TEMPLATE_OPのレポート（インデックスがCTStageのオペレーター名、時間はhh:mm:ss形式）。
+    平均の列は合計時間 / 応答件数（応答件数が0の場合は0）。
+    """
+    rng = np.random.default_rng(seed)
+    n = len(df_operators)
+    calls = rng.integers(0, 60, n)
+    talk = calls * rng.integers(60, 900, n)
+    acw = calls * rng.integers(0, 600, n)
+    per_call = np.maximum(calls, 1)
+    return pd.DataFrame({
+        settings.OPERATOR_LOGIN_TIME_COLUMN: hms(rng.integers(0, 9 * 3600, n)),
+        settings.OPERATOR_CALLS_COLUMN: calls,
+        settings.OPERATOR_TALK_TOTAL_COLUMN: hms(talk),
+        settings.OPERATOR_ACW_TOTAL_COLUMN: hms(acw),
+        settings.OPERATOR_TALK_TIME_COLUMN: hms(talk // per_call),
+        settings.OPERATOR_ACW_COLUMN: hms(acw // per_call),
+    }, index=pd.Index(df_operators['CTStage'].to_numpy(), name='オペレーター'))
+
+
+def group_analysis_results(calls: int, seed: int = 0) -> dict:
+    """テンプレートごとのグループ分析の結果（Scraper.scrape_group_analysis_dataと同じ形式）"""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for template in (settings.TEMPLATE_SS, settings.TEMPLATE_TVS, settings.TEMPLATE_KMN, settings.TEMPLATE_HHD):
+        total = int(rng.integers(calls // 2, calls + 1))
+        results[template] = {
+            'total_calls': total,
+            'IVR_interruptions_before_response': int(rng.integers(0, total // 10 + 1)),
+            'ivr_interruptions': int(rng.integers(0, total // 10 + 1)),
+            'time_out': int(rng.integers(0, total // 20 + 1)),
+            'abandoned_during_operator': int(rng.integers(0, total // 10 + 1)),
+        }
+    return results
+
+
+def write_shift_schedule(path: str, df_operators: pd.DataFrame, seed: int = 0) -> None:
+    """月間シフト表（Shift-JISの *_Campaign_ScheduleList.csv、行がSweetの名前、列が今月の日付）"""
+    rng = np.random.default_rng(seed)
+    today = datetime.date.today()
+    days = [f"{d:02}" for d in range(1, calendar.monthrange(today.year, today.month)[1] + 1)]
+    cells = rng.choice(SHIFTS, (len(df_operators), len(days)))
+    with open(path, 'w', encoding='shift_jis', newline='') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(['スケジュール一覧'])
+        writer.writerow(['期間', today.strftime('%Y/%m')])
+        writer.writerow([''])
+        writer.writerow(['組織名', '氏名', '従業員ID', '種別'] + days + ['合計'])
+        for i, (sweet, row) in enumerate(zip(df_operators['Sweet'], cells)):
+            writer.writerow(['サポート', sweet, f"E{i:05}", '正社員'] + list(row) + [''])
+
+
+def write_excel(df: pd.DataFrame, path: str) -> None:
+    if len(df) > EXCEL_MAX_ROWS:
+        raise ValueError(f"xlsxに書き出せる行数を超えています。: {len(df)}行（上限 {EXCEL_MAX_ROWS}行）")
+    df.to_excel(path, index=False)
+
+
+def write_dataset(directory: str, rows: int, operators: int = 300, seed: int = 0) -> dict:
+    """
+    全てのファイルをdirectoryに書き出す。ファイル名はsettingsと同じ。
+
+    Returns
+    -------
+    dict
+        種類（'activity', 'support', 'close', 'operators', 'shift'）をキーとしたファイルのパス。
+    """
+    os.makedirs(directory, exist_ok=True)
+    df_operators = operators_frame(operators, seed)
+    paths = {
+        'activity': os.path.join(directory, settings.ACTIVITY_FILE_NAME),
+        'support': os.path.join(directory, settings.SUPPORT_FILE_NAME),
+        'close': os.path.join(directory, settings.CLOSE_FILE_NAME),
+        'operators': os.path.join(directory, settings.OPERATORS_FILE_NAME),
+        'shift': os.path.join(directory, datetime.date.today().strftime(settings.SHIFT_SCHEDULE_NAME_FORMAT)),
+    }
+    write_excel(activity_frame(rows, seed), paths['activity'])
+    write_excel(support_frame(rows, seed), paths['support'])
+    write_excel(close_frame(rows, df_operators, seed), paths['close'])
+    write_excel(df_operators, paths['operators'])
+    write_shift_schedule(paths['shift'], df_operators, seed)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='合成データの作成')
+    parser.add_argument('--rows', type=int, default=10000, help='活動・サポート・クローズの行数')
+    parser.add_argument('--operators', type=int, default=300, help='オペレーター数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=os.path.join('data', 'synthetic'), help='出力先のディレクトリ')
+    args = parser.parse_args()
+
+    for kind, path in write_dataset(args.out, args.rows, args.operators, args.seed).items():
+        print(f"{kind}: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
+import argparse
 import logging
-from src.controller import orchestrate_workflow
+from src.controller import orchestrate_workflow, run_daemon
 import time
 
 import settings
@@ -22,7 +23,15 @@ setup_logging(LOG_FILE, LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 if __name__ == '__main__':
-    
+    parser = argparse.ArgumentParser(description='KPI同期処理')
+    parser.add_argument('--daemon', action='store_true', help='常駐モードで一定間隔ごとに処理を実行する')
+    parser.add_argument('--interval', type=float, default=settings.DAEMON_INTERVAL, help='常駐モードのサイクル間隔（秒）')
+    args = parser.parse_args()
+
+    if args.daemon:
+        run_daemon(args.interval)
+        raise SystemExit(0)
+
     start = time.time()
     orchestrate_workflow()
     end = time.time()
@@ -1,4 +1,3 @@
-import datetime
 import os
 from dotenv import load_dotenv
 
@@ -17,20 +16,54 @@ ACTIVITY_FILE_NAME = 'TS_todays_activity.xlsx'
 CLOSE_FILE_NAME = 'TS_todays_close.xlsx'
 SUPPORT_FILE_NAME = 'TS_todays_support.xlsx'
 OPERATORS_FILE_NAME = 'operators.xlsx'
-SHIFT_SCHEDULE_NAME = f'{datetime.datetime.now().strftime('%Y%m')}_Campaign_ScheduleList.csv'
+SHIFT_SCHEDULE_NAME_FORMAT = '%Y%m_Campaign_ScheduleList.csv'  # 月間シフト表のファイル名（strftimeの書式）
 
 ACTIVITY_FILE = os.path.join(BASE_DIR, 'data', ACTIVITY_FILE_NAME)
 CLOSE_FILE = os.path.join(BASE_DIR, 'data', CLOSE_FILE_NAME)
 SUPPORT_FILE = os.path.join(BASE_DIR, 'data', SUPPORT_FILE_NAME)
 OPERATORS_FILE = os.path.join(BASE_DIR, 'data', OPERATORS_FILE_NAME)
-SHIFT_SCHEDULE = os.path.join(BASE_DIR, 'data', 'shift_schedule', SHIFT_SCHEDULE_NAME)
+SHIFT_SCHEDULE_DIR = os.path.join(BASE_DIR, 'data', 'shift_schedule')
 
 EXCEL_FILES = [ACTIVITY_FILE, CLOSE_FILE, SUPPORT_FILE]
 
+# 常駐モードの設定
+DAEMON_INTERVAL = 300  # 更新サイクルの間隔（秒）
+DAEMON_REFRESH_INTERVAL = 60  # 同期の合間にお待たせ件数とグループ別KPIを更新する間隔（秒、Noneの場合は更新しない）
+
+# パース済みワークブックのキャッシュ設定
+WORKBOOK_CACHE_ENABLED = True
+WORKBOOK_CACHE_DIR = os.path.join(BASE_DIR, 'data', '.cache')
+WORKBOOK_CACHE_MAX_BYTES = 512 * 1024 * 1024  # キャッシュの合計サイズの上限（バイト）
+
+# 読込時に各プロセッサが必要とする列と当日分の行だけを読み込むか
+EXCEL_PUSHDOWN = True
+
+# 活動データを前回処理時からの差分だけ取り込むか
+ACTIVITY_INCREMENTAL = True
+ACTIVITY_STATE_FILE = os.path.join(BASE_DIR, 'data', 'state', 'activity_state.pkl')  # キャッシュとは別のディレクトリに置く
+
+# グループ別KPIの時系列の保存設定
+KPI_STORE_ENABLED = True
+KPI_STORE_PATH = os.path.join(BASE_DIR, 'data', 'kpi_history.sqlite3')
+KPI_STORE_BATCH_SIZE = 500  # まとめて書き込む行数
+KPI_STORE_FLUSH_INTERVAL = 5  # 書き込み待ちの行を書き込むまでの最大待機時間（秒）
+
 # Excel同期処理の設定
 SYNC_MAX_RETRIES = 5  # 同期失敗時の最大リトライ回数
 SYNC_RETRY_DELAY = 2  # リトライ間の待機時間（秒）
-REFRESH_INTERVAL = 5  # 更新が完了するまで待機する時間（秒）
+REFRESH_INTERVAL = 0.2  # 更新の完了（CalculationState・クエリの更新状態）を確認する間隔（秒）
+REFRESH_BACKEND = 'com'  # 'com'（Excel） or 'file'（Excelを使わない代替。Linuxでの動作確認用）
+REFRESH_TIMEOUT_MIN = 5  # 更新待ちのタイムアウトの最小値（秒）
+REFRESH_TIMEOUT_MAX = 120  # 更新待ちのタイムアウトの最大値（秒、更新時間の履歴がない場合）
+REFRESH_TIMEOUT_FACTOR = 3  # 更新時間の平均の何倍まで待つか
+
+# 1サイクルの処理（同期・読込・処理・スクレイピング・計算のタスクグラフ）の設定
+CYCLE_MAX_WORKERS = 8  # 同時に実行するノードの最大数
+CYCLE_EXECUTION_MODE = 'thread'  # 'thread'（全てスレッド） or 'process'（読込・処理をプロセスプールで実行）
+# 'process'は試験的な実装で、threadより速くなることはまだ確認できていない（複数コアの環境での測定結果がない）。
+# Arrow IPCでの受け渡しの分だけ処理が増えるため、通常は'thread'を使い、'process'は実行環境で
+# benchmarks.bench_process_offloadの結果がthreadより速いことを確認した場合だけ使う
+CYCLE_PROCESS_WORKERS = None  # プロセスプールのプロセス数（Noneの場合はCPUのコア数）
 
 # シリアル値
 SERIAL_20_MINUTES = 0.0138888888888889
@@ -43,6 +76,16 @@ REPORTER_URL = os.getenv('REPORTER_URL')
 REPORTER_ID = os.getenv('REPORTER_ID')
 HEADLESS_MODE = True
 REPORTER_MAX_RETRIES = 5
+REPORTER_IMPLICIT_WAIT = 5  # 要素検索時の暗黙的な待機時間（秒）
+REPORTER_POOL_SIZE = 1  # 常駐モードで維持するログイン済みブラウザの数
+REPORTER_PARALLELISM = 1  # テンプレートを並列に取得するセッション数（1の場合は逐次取得）
+FAST_TABLE_EXTRACT = True  # Trueの場合はページソース全体をパースせず、対象テーブルだけを取得する
+REPORTER_BACKEND = 'selenium'  # 'selenium'（ブラウザ操作） or 'http'（ブラウザを使わずにリクエストを再現）
+REPORTER_HTTP_TIMEOUT = 30  # HTTPバックエンドの1リクエストあたりのタイムアウト（秒）
+REPORTER_HTTP_POOL_SIZE = 4  # HTTPバックエンドの接続プールの最大接続数
+REPORTER_HTTP_LOGIN_PATH = 'login'  # ログインのリクエスト先（REPORTER_URLからの相対パス）
+REPORTER_HTTP_TEMPLATE_PATH = 'api/template'  # テンプレート呼び出しのリクエスト先
+REPORTER_HTTP_REPORT_PATH = 'api/report'  # レポート作成のリクエスト先
 TEMPLATE_SS = 'TEMPLATE_SS'
 TEMPLATE_TVS = 'TEMPLATE_TVS'
 TEMPLATE_KMN = 'TEMPLATE_KMN'
@@ -50,4 +93,21 @@ TEMPLATE_HHD = 'TEMPLATE_HHD'
 TEMPLATE_OP = 'TEMPLATE_OP'
 TEMPLATES = [TEMPLATE_SS, TEMPLATE_TVS, TEMPLATE_KMN, TEMPLATE_HHD, TEMPLATE_OP]
 
+# オペレーター別KPIに使うTEMPLATE_OPの列名（時間はhh:mm:ss形式）
+# CTStageのエクスポートの見出しと一致させること（初期値はstub_reporterと合成データの見出し）。
+# レポートにない列を使う指標はNaNになり、エラーがログに出力される
+OPERATOR_LOGIN_TIME_COLUMN = 'ログイン時間'  # CPHの分母
+OPERATOR_CALLS_COLUMN = '応答件数'  # ATT・ACWを合計時間から計算する場合の分母
+OPERATOR_TALK_TOTAL_COLUMN = '通話時間'  # ATT = 通話時間 / 応答件数
+OPERATOR_ACW_TOTAL_COLUMN = '後処理時間'  # ACW = 後処理時間 / 応答件数
+OPERATOR_TALK_TIME_COLUMN = '平均通話時間'  # ATT（合計時間・応答件数の列がない場合に使う）
+OPERATOR_ACW_COLUMN = '平均後処理時間'  # ACW（合計時間・応答件数の列がない場合に使う）
+
+# レポート表示待ちの設定
+REPORT_READY_TIMEOUT = 30  # レポートが表示されるまで待機する最大時間（秒）
+REPORT_READY_TIMEOUTS = {TEMPLATE_OP: 60}  # テンプレート別の待機時間（秒）
+REPORT_READY_POLL_INTERVAL = 0.05  # レポートの表示を確認する間隔（秒）
+REPORT_READY_STABLE_POLLS = 2  # 内容が変化しないことを確認する連続回数
+REPORT_READY_RETRIES = 1  # レポートが表示されない場合に作成をやり直す回数
+
 USE_ADDITION = True
\ No newline at end of file
@@ -1,5 +1,10 @@
 import logging
 
+import numpy as np
+import pandas as pd
+
+from .metric_graph import MetricGraph
+
 logger = logging.getLogger(__name__)
 
 class KpiCalculator:
@@ -35,16 +40,84 @@ class KpiCalculator:
         '60over': {'SS': 'cb_60over_ss', 'TVS': 'cb_60over_tvs', 'KMN': 'cb_60over_kmn', 'HHD': 'cb_60over_hhd'}
     }
 
-    # お待たせ対応件数キー(待ち時間別)
+    # お待たせ案件キー(WaitingCases)
     WFC_MAP = {
-        '20over': {'SS': 'wfc_over20_ss', 'TVS': 'wfc_over20_tvs', 'KMN': 'wfc_over20_kmn', 'HHD': 'wfc_over20_hhd'},
-        '30over': {'SS': 'wfc_over30_ss', 'TVS': 'wfc_over30_tvs', 'KMN': 'wfc_over30_kmn', 'HHD': 'wfc_over30_hhd'},
-        '40over': {'SS': 'wfc_over40_ss', 'TVS': 'wfc_over40_tvs', 'KMN': 'wfc_over40_kmn', 'HHD': 'wfc_over40_hhd'},
-        '60over': {'SS': 'wfc_over60_ss', 'TVS': 'wfc_over60_tvs', 'KMN': 'wfc_over60_kmn', 'HHD': 'wfc_over60_hhd'}
+        'SS': 'wfc_ss',
+        'TVS': 'wfc_tvs',
+        'KMN': 'wfc_kmn',
+        'HHD': 'wfc_hhd'
+    }
+
+    # お待たせ時間のしきい値(分)
+    WFC_MINUTES = {
+        '20over': 20,
+        '30over': 30,
+        '40over': 40,
+        '60over': 60
     }
 
+    # 入力(葉)の指標の取得元: 指標名 -> (種類, キー)
+    INPUT_SOURCES = {
+        'reporter_total_calls': ('template', 'total_calls'),
+        'reporter_ivr_before_response': ('template', 'IVR_interruptions_before_response'),
+        'reporter_ivr_interruptions': ('template', 'ivr_interruptions'),
+        'reporter_abandoned_during_operator': ('template', 'abandoned_during_operator'),
+        'reporter_time_out': ('template', 'time_out'),
+        'support_voicemails': ('ivr', None),
+        'support_direct_handling': ('direct', None),
+        'activity_cb_0_20': ('cb', '0_20'),
+        'activity_cb_20_30': ('cb', '20_30'),
+        'activity_cb_30_40': ('cb', '30_40'),
+        'activity_cb_40_60': ('cb', '40_60'),
+        'activity_cb_60over': ('cb', '60over'),
+        'activity_wfc_over20': ('wfc', '20over'),
+        'activity_wfc_over30': ('wfc', '30over'),
+        'activity_wfc_over40': ('wfc', '40over'),
+        'activity_wfc_over60': ('wfc', '60over'),
+    }
+
+    # get_all_metricsの項目: (表示名, メソッド名)
+    ALL_METRICS = [
+        ("総着信数", 'total_calls'),
+        ("自動音声ガイダンス途中切断数", 'ivr_interruptions'),
+        ("放棄呼数", 'abandoned_calls'),
+        ("オペレーター呼出途中放棄数", 'abandoned_during_operator'),
+        ("留守電放棄件数", 'abandoned_in_ivr'),
+        ("留守電数", 'voicemails'),
+        ("応答件数", 'responses'),
+        ("応答率", 'response_rate'),
+        ("電話問い合わせ件数", 'phone_inquiries'),
+        ("直受け対応件数", 'direct_handling'),
+        ("直受け率", 'direct_handling_rate'),
+        ("お待たせ0分～20分対応件数", 'callback_count_0_to_20_min'),
+        ("お待たせ20分以内累計対応件数", 'cumulative_callback_under_20_min'),
+        ("お待たせ20分～30分対応件数", 'callback_count_20_to_30_min'),
+        ("お待たせ30分以内累計対応件数", 'cumulative_callback_under_30_min'),
+        ("お待たせ30分～40分対応件数", 'callback_count_30_to_40_min'),
+        ("お待たせ40分以内累計対応件数", 'cumulative_callback_under_40_min'),
+        ("お待たせ40分～60分対応件数", 'callback_count_40_to_60_min'),
+        ("お待たせ60分以内累計対応件数", 'cumulative_callback_under_60_min'),
+        ("お待たせ60分以上対応件数", 'callback_count_over_60_min'),
+        ("お待たせ20分以上対応件数", 'waiting_for_callback_count_over_20min'),
+        ("お待たせ30分以上対応件数", 'waiting_for_callback_count_over_30min'),
+        ("お待たせ40分以上対応件数", 'waiting_for_callback_count_over_40min'),
+        ("お待たせ60分以上対応件数", 'waiting_for_callback_count_over_60min'),
+        ("お待たせ20分以上対応リスト", 'waiting_for_callback_list_over_20min'),
+        ("お待たせ30分以上対応リスト", 'waiting_for_callback_list_over_30min'),
+        ("お待たせ40分以上対応リスト", 'waiting_for_callback_list_over_40min'),
+        ("お待たせ60分以上対応リスト", 'waiting_for_callback_list_over_60min'),
+        ("20分以内折返し率", 'cumulative_callback_rate_under_20_min'),
+        ("30分以内折返し率", 'cumulative_callback_rate_under_30_min'),
+        ("40分以内折返し率", 'cumulative_callback_rate_under_40_min'),
+        ("60分以内折返し率", 'cumulative_callback_rate_under_60_min'),
+    ]
+
+    # 指標の依存グラフ（build_kpi_graphで作成）
+    GRAPH = None
+
     def __init__(self, data: dict):
         self.data = data
+        self._memos = {}
 
     def _select_template(self, group: str) -> str:
         if group not in self.TEMPLATE_MAP:
@@ -70,191 +143,296 @@ class KpiCalculator:
             raise ValueError(f"グループが存在しません。: {group}")
         return self.CB_MAP[time_range][group]
     
-    def _get_wfc_key(self, group: str, time_range: str) -> str:
-        if group not in self.WFC_MAP[time_range]:
+    def _get_wfc_key(self, group: str) -> str:
+        if group not in self.WFC_MAP:
             logger.error(f"グループが存在しません。: {group}")
             raise ValueError(f"グループが存在しません。: {group}")
-        return self.WFC_MAP[time_range][group]
+        return self.WFC_MAP[group]
+
+    def _waiting_cases(self, group: str):
+        """ グループのWaitingCases """
+        return self.data[self._get_wfc_key(group)]
+
+    def _read_input(self, group: str, name: str):
+        """ 入力(葉)の指標の値をdataから取得する """
+        kind, key = self.INPUT_SOURCES[name]
+        if kind == 'template':
+            return self.data[self._select_template(group)][key]
+        if kind == 'ivr':
+            return self.data[self._get_ivr_key(group)]
+        if kind == 'direct':
+            return self.data[self._get_direct_key(group)]
+        if kind == 'cb':
+            return self.data[self._get_cb_key(group, key)]
+        return self._waiting_cases(group).count(self.WFC_MINUTES[key])
+
+    def evaluate(self, group: str, targets: list = None) -> dict:
+        """
+        指標の依存グラフ(GRAPH)からグループの指標を計算する。
+        計算結果はグループごとにメモされるため、各指標は1つのKpiCalculatorにつき1回だけ計算される。
+
+        Parameters
+        ----------
+        group : str
+            グループ。'SS', 'TVS', 'KMN', 'HHD'
+        targets : list, optional
+            計算する指標名。省略時は全ての指標。
+
+        Returns
+        -------
+        dict
+            指標名をキーとした値。
+        """
+        if targets is None:
+            targets = self.GRAPH.outputs()
+        memo = self._memos.setdefault(group, {})
+        return self.GRAPH.evaluate(targets, lambda name: self._read_input(group, name), memo)
+
+    def input_frame(self, groups: list = None) -> pd.DataFrame:
+        """
+        入力(葉)の指標を、行がグループ、列が入力の指標名のDataFrameにまとめる。
+
+        Parameters
+        ----------
+        groups : list, optional
+            グループのリスト。省略時はTEMPLATE_MAPの全てのグループ。
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        groups = list(self.TEMPLATE_MAP) if groups is None else list(groups)
+        names = self.GRAPH.inputs()
+        rows = [[self._read_input(group, name) for name in names] for group in groups]
+        return pd.DataFrame(rows, index=pd.Index(groups, name='グループ'), columns=names)
+
+    def metrics_frame(self, groups: list = None) -> pd.DataFrame:
+        """
+        全てのグループの指標を、依存グラフを列単位（グループ方向のNumPy配列）で評価して計算する。
+
+        Parameters
+        ----------
+        groups : list, optional
+            グループのリスト。省略時はTEMPLATE_MAPの全てのグループ。
+
+        Returns
+        -------
+        pd.DataFrame
+            行がグループ、列が指標名（メソッド名、get_all_metricsの順）のDataFrame。
+            お待たせ対応リストは含まない。
+        """
+        inputs = self.input_frame(groups)
+        names = [name for _, name in self.ALL_METRICS if name in self.GRAPH]
+        values = self.GRAPH.evaluate(names, lambda name: inputs[name].to_numpy())
+        return pd.DataFrame(values, index=inputs.index, columns=names)
+
+    def _metric(self, group: str, name: str):
+        return self.evaluate(group, [name])[name]
 
     @staticmethod
     def _calc_rate(a: int, b: int, wfc: int = 0) -> float:
-        denominator = b + wfc
-        return a / denominator if denominator != 0 else 0.0
+        return calc_rate(a, b + wfc)
     @staticmethod
     def _calc_count() -> int:
         pass
 
     def total_calls(self, group: str) -> int:
         """ 11_総着信数 (int): reporter_着信数 """
-        template = self._select_template(group)
-        return self.data[template]['total_calls']
+        return self._metric(group, 'total_calls')
 
     def ivr_interruptions(self, group: str) -> int:
         """ 12_自動音声ガイダンス途中切断数 (int): reporter_IVR応答前放棄呼数 + reporter_IVR切断数 """
-        template = self._select_template(group)
-        return (self.data[template]['IVR_interruptions_before_response']
-                + self.data[template]['ivr_interruptions'])
+        return self._metric(group, 'ivr_interruptions')
 
     def abandoned_during_operator(self, group: str) -> int:
         """ 14_オペレーター呼出途中放棄数 (int): reporter_ACD放棄呼数 """
-        template = self._select_template(group)
-        return self.data[template]['abandoned_during_operator']
+        return self._metric(group, 'abandoned_during_operator')
 
     def voicemails(self, group: str) -> int:
         """ 16_留守電数 (int): S_留守電 """
-        ivr_key = self._get_ivr_key(group)
-        return self.data[ivr_key]
+        return self._metric(group, 'voicemails')
 
     def abandoned_in_ivr(self, group: str) -> int:
         """ 15_留守電放棄件数 (int): reporter_タイムアウト数 - 16_留守電数 """
-        template = self._select_template(group)
-        return self.data[template]['time_out'] - self.voicemails(group)
+        return self._metric(group, 'abandoned_in_ivr')
 
     def abandoned_calls(self, group: str) -> int:
         """ 13_放棄呼数 (int): 14 + 15 """
-        return self.abandoned_during_operator(group) + self.abandoned_in_ivr(group)
+        return self._metric(group, 'abandoned_calls')
 
     def responses(self, group: str) -> int:
         """ 17_応答件数 (int): 11 - 12 - 13 """
-        return self.total_calls(group) - self.ivr_interruptions(group) - self.abandoned_calls(group)
+        return self._metric(group, 'responses')
 
     def response_rate(self, group: str) -> float:
         """ 応答率 """
-        return self._calc_rate(self.responses(group), self.total_calls(group))
+        return self._metric(group, 'response_rate')
 
     def phone_inquiries(self, group: str) -> int:
         """ 18_電話問い合わせ件数 (int): 16 + 17 """
-        return self.voicemails(group) + self.responses(group)
+        return self._metric(group, 'phone_inquiries')
 
     def direct_handling(self, group: str) -> int:
         """ 21_直受け対応件数 (int): support_case_直受け """
-        direct_key = self._get_direct_key(group)
-        return self.data[direct_key]
+        return self._metric(group, 'direct_handling')
 
     def direct_handling_rate(self, group: str) -> float:
         """ 直受率: 21 / 18 """
-        return self._calc_rate(self.direct_handling(group), self.phone_inquiries(group))
+        return self._metric(group, 'direct_handling_rate')
 
     def callback_count_0_to_20_min(self, group: str) -> int:
         """ 23_お待たせ0分～20分対応件数 (int) """
-        return self.data[self._get_cb_key(group, '0_20')]
+        return self._metric(group, 'callback_count_0_to_20_min')
 
     def cumulative_callback_under_20_min(self, group: str) -> int:
         """ 24_お待たせ20分以内累計対応件数 (int): 21 + 23 """
-        return self.direct_handling(group) + self.callback_count_0_to_20_min(group)
+        return self._metric(group, 'cumulative_callback_under_20_min')
 
     def callback_count_20_to_30_min(self, group: str) -> int:
         """ 25_お待たせ20分～30分対応件数 (int) """
-        return self.data[self._get_cb_key(group, '20_30')]
+        return self._metric(group, 'callback_count_20_to_30_min')
 
     def cumulative_callback_under_30_min(self, group: str) -> int:
         """ 26_お待たせ30分以内累計対応件数 (int): 24 + 25 """
-        return self.cumulative_callback_under_20_min(group) + self.callback_count_20_to_30_min(group)
+        return self._metric(group, 'cumulative_callback_under_30_min')
 
     def callback_count_30_to_40_min(self, group: str) -> int:
         """ 27_お待たせ30分～40分対応件数 (int) """
-        return self.data[self._get_cb_key(group, '30_40')]
+        return self._metric(group, 'callback_count_30_to_40_min')
 
     def cumulative_callback_under_40_min(self, group: str) -> int:
         """ 28_お待たせ40分以内累計対応件数 (int): 26 + 27 """
-        return self.cumulative_callback_under_30_min(group) + self.callback_count_30_to_40_min(group)
+        return self._metric(group, 'cumulative_callback_under_40_min')
 
     def callback_count_40_to_60_min(self, group: str) -> int:
         """ 29_お待たせ40分～60分対応件数 (int) """
-        return self.data[self._get_cb_key(group, '40_60')]
+        return self._metric(group, 'callback_count_40_to_60_min')
 
     def cumulative_callback_under_60_min(self, group: str) -> int:
         """ 30_お待たせ60分以内累計対応件数 (int): 28 + 29 """
-        return self.cumulative_callback_under_40_min(group) + self.callback_count_40_to_60_min(group)
+        return self._metric(group, 'cumulative_callback_under_60_min')
 
     def callback_count_over_60_min(self, group: str) -> int:
         """ 31_お待たせ60分以上対応件数 (int) """
-        return self.data[self._get_cb_key(group, '60over')]
+        return self._metric(group, 'callback_count_over_60_min')
 
     def waiting_for_callback_count_over_20min(self, group: str) -> int:
         """ お待たせ20分以上対応件数 (int) """
-        return len(self.data[self._get_wfc_key(group, '20over')])
+        return self._metric(group, 'waiting_for_callback_count_over_20min')
     
     def waiting_for_callback_count_over_30min(self, group: str) -> int:
         """ お待たせ30分以上対応件数 (int) """
-        return len(self.data[self._get_wfc_key(group, '30over')])
+        return self._metric(group, 'waiting_for_callback_count_over_30min')
     
     def waiting_for_callback_count_over_40min(self, group: str) -> int:
         """ お待たせ40分以上対応件数 (int) """
-        return len(self.data[self._get_wfc_key(group, '40over')])
+        return self._metric(group, 'waiting_for_callback_count_over_40min')
     
     def waiting_for_callback_count_over_60min(self, group: str) -> int:
         """ お待たせ60分以上対応件数 (int) """
-        return len(self.data[self._get_wfc_key(group, '60over')])
+        return self._metric(group, 'waiting_for_callback_count_over_60min')
     
-    def waiting_for_callback_list_over_20min(self, group: str) -> list:
-        """ お待たせ20分以上対応リスト (list) """
-        return self.data[self._get_wfc_key(group, '20over')]
+    def waiting_for_callback_list_over_20min(self, group: str) -> np.ndarray:
+        """ お待たせ20分以上対応リスト (np.ndarray): 案件番号配列のスライス """
+        return self._waiting_cases(group).over(self.WFC_MINUTES['20over'])
     
-    def waiting_for_callback_list_over_30min(self, group: str) -> list:
-        """ お待たせ30分以上対応リスト (list) """
-        return self.data[self._get_wfc_key(group, '30over')]
+    def waiting_for_callback_list_over_30min(self, group: str) -> np.ndarray:
+        """ お待たせ30分以上対応リスト (np.ndarray): 案件番号配列のスライス """
+        return self._waiting_cases(group).over(self.WFC_MINUTES['30over'])
     
-    def waiting_for_callback_list_over_40min(self, group: str) -> list:
-        """ お待たせ40分以上対応リスト (list) """
-        return self.data[self._get_wfc_key(group, '40over')]
+    def waiting_for_callback_list_over_40min(self, group: str) -> np.ndarray:
+        """ お待たせ40分以上対応リスト (np.ndarray): 案件番号配列のスライス """
+        return self._waiting_cases(group).over(self.WFC_MINUTES['40over'])
     
-    def waiting_for_callback_list_over_60min(self, group: str) -> list:
-        """ お待たせ60分以上対応リスト (list) """
-        return self.data[self._get_wfc_key(group, '60over')]
+    def waiting_for_callback_list_over_60min(self, group: str) -> np.ndarray:
+        """ お待たせ60分以上対応リスト (np.ndarray): 案件番号配列のスライス """
+        return self._waiting_cases(group).over(self.WFC_MINUTES['60over'])
     
     def cumulative_callback_rate_under_20_min(self, group: str) -> float:
         """ 20分以内折返し率 (float) """
-        den = self.cumulative_callback_under_60_min(group) + self.callback_count_over_60_min(group)
-        return self._calc_rate(self.cumulative_callback_under_20_min(group), den + self.waiting_for_callback_count_over_20min(group))
+        return self._metric(group, 'cumulative_callback_rate_under_20_min')
     
     def cumulative_callback_rate_under_30_min(self, group: str) -> float:
         """ 30分以内折返し率 (float) """
-        den = self.cumulative_callback_under_60_min(group) + self.callback_count_over_60_min(group)
-        return self._calc_rate(self.cumulative_callback_under_30_min(group), den + self.waiting_for_callback_count_over_30min(group))
+        return self._metric(group, 'cumulative_callback_rate_under_30_min')
     
     def cumulative_callback_rate_under_40_min(self, group: str) -> float:
         """ 40分以内折返し率 (float) """
-        den = self.cumulative_callback_under_60_min(group) + self.callback_count_over_60_min(group)
-        return self._calc_rate(self.cumulative_callback_under_40_min(group), den + self.waiting_for_callback_count_over_40min(group))
+        return self._metric(group, 'cumulative_callback_rate_under_40_min')
     
     def cumulative_callback_rate_under_60_min(self, group: str) -> float:
         """ 60分以内折返し率 (float) """
-        den = self.cumulative_callback_under_60_min(group) + self.callback_count_over_60_min(group)
-        return self._calc_rate(self.cumulative_callback_under_60_min(group), den + self.waiting_for_callback_count_over_60min(group))
+        return self._metric(group, 'cumulative_callback_rate_under_60_min')
     
     def get_all_metrics(self, group: str) -> dict:
-        return {
-            "総着信数": self.total_calls(group),
-            "自動音声ガイダンス途中切断数": self.ivr_interruptions(group),
-            "放棄呼数": self.abandoned_calls(group),
-            "オペレーター呼出途中放棄数": self.abandoned_during_operator(group),
-            "留守電放棄件数": self.abandoned_in_ivr(group),
-            "留守電数": self.voicemails(group),
-            "応答件数": self.responses(group),
-            "応答率": self.response_rate(group),
-            "電話問い合わせ件数": self.phone_inquiries(group),
-            "直受け対応件数": self.direct_handling(group),
-            "直受け率": self.direct_handling_rate(group),
-            "お待たせ0分～20分対応件数": self.callback_count_0_to_20_min(group),
-            "お待たせ20分以内累計対応件数": self.cumulative_callback_under_20_min(group),
-            "お待たせ20分～30分対応件数": self.callback_count_20_to_30_min(group),
-            "お待たせ30分以内累計対応件数": self.cumulative_callback_under_30_min(group),
-            "お待たせ30分～40分対応件数": self.callback_count_30_to_40_min(group),
-            "お待たせ40分以内累計対応件数": self.cumulative_callback_under_40_min(group),
-            "お待たせ40分～60分対応件数": self.callback_count_40_to_60_min(group),
-            "お待たせ60分以内累計対応件数": self.cumulative_callback_under_60_min(group),
-            "お待たせ60分以上対応件数": self.callback_count_over_60_min(group),
-            "お待たせ20分以上対応件数": self.waiting_for_callback_count_over_20min(group),
-            "お待たせ30分以上対応件数": self.waiting_for_callback_count_over_30min(group),
-            "お待たせ40分以上対応件数": self.waiting_for_callback_count_over_40min(group),
-            "お待たせ60分以上対応件数": self.waiting_for_callback_count_over_60min(group),
-            "お待たせ20分以上対応リスト": self.waiting_for_callback_list_over_20min(group),
-            "お待たせ30分以上対応リスト": self.waiting_for_callback_list_over_30min(group),
-            "お待たせ40分以上対応リスト": self.waiting_for_callback_list_over_40min(group),
-            "お待たせ60分以上対応リスト": self.waiting_for_callback_list_over_60min(group),
-            "20分以内折返し率": self.cumulative_callback_rate_under_20_min(group),
-            "30分以内折返し率": self.cumulative_callback_rate_under_30_min(group),
-            "40分以内折返し率": self.cumulative_callback_rate_under_40_min(group),
-            "60分以内折返し率": self.cumulative_callback_rate_under_60_min(group)
-        }
\ No newline at end of file
+        values = self.evaluate(group)
+        return {label: values[name] if name in values else getattr(self, name)(group)
+                for label, name in self.ALL_METRICS}
+
+
+def calc_rate(a, b):
+    """ a / b (bが0の場合は0.0)。スカラーとグループ方向の列（np.ndarray, pd.Series）のどちらにも使える """
+    if isinstance(b, pd.Series):
+        return (a / b).where(b != 0, 0.0)
+    if isinstance(b, np.ndarray):
+        return np.divide(a, b, out=np.zeros(b.shape, dtype=np.float64), where=b != 0)
+    return a / b if b != 0 else 0.0
+
+
+def _identity(value):
+    return value
+
+
+def _sum(*values):
+    return sum(values)
+
+
+def build_kpi_graph() -> MetricGraph:
+    """
+    グループ別KPIの依存グラフを作成する。
+    指標名はKpiCalculatorのメソッド名、入力(葉)はKpiCalculator.INPUT_SOURCESのキー。
+    """
+    graph = MetricGraph()
+    for name in KpiCalculator.INPUT_SOURCES:
+        graph.add_input(name)
+
+    graph.add('total_calls', ['reporter_total_calls'], _identity, '総着信数')
+    graph.add('ivr_interruptions', ['reporter_ivr_before_response', 'reporter_ivr_interruptions'], _sum,
+              '自動音声ガイダンス途中切断数')
+    graph.add('abandoned_during_operator', ['reporter_abandoned_during_operator'], _identity, 'オペレーター呼出途中放棄数')
+    graph.add('voicemails', ['support_voicemails'], _identity, '留守電数')
+    graph.add('abandoned_in_ivr', ['reporter_time_out', 'voicemails'], lambda t, v: t - v, '留守電放棄件数')
+    graph.add('abandoned_calls', ['abandoned_during_operator', 'abandoned_in_ivr'], _sum, '放棄呼数')
+    graph.add('responses', ['total_calls', 'ivr_interruptions', 'abandoned_calls'], lambda t, i, a: t - i - a, '応答件数')
+    graph.add('response_rate', ['responses', 'total_calls'], calc_rate, '応答率')
+    graph.add('phone_inquiries', ['voicemails', 'responses'], _sum, '電話問い合わせ件数')
+    graph.add('direct_handling', ['support_direct_handling'], _identity, '直受け対応件数')
+    graph.add('direct_handling_rate', ['direct_handling', 'phone_inquiries'], calc_rate, '直受け率')
+
+    # お待たせ時間別の対応件数と累計
+    cumulative = 'direct_handling'
+    for lower, upper in (('0', '20'), ('20', '30'), ('30', '40'), ('40', '60')):
+        count = f'callback_count_{lower}_to_{upper}_min'
+        graph.add(count, [f'activity_cb_{lower}_{upper}'], _identity, f'お待たせ{lower}分～{upper}分対応件数')
+        graph.add(f'cumulative_callback_under_{upper}_min', [cumulative, count], _sum, f'お待たせ{upper}分以内累計対応件数')
+        cumulative = f'cumulative_callback_under_{upper}_min'
+    graph.add('callback_count_over_60_min', ['activity_cb_60over'], _identity, 'お待たせ60分以上対応件数')
+    graph.add('callback_total', ['cumulative_callback_under_60_min', 'callback_count_over_60_min'], _sum, 'お待たせ対応件数合計')
+
+    # 折返し率の分母には、しきい値以上お待たせしている未対応の件数を含める
+    for minutes in ('20', '30', '40', '60'):
+        waiting = f'waiting_for_callback_count_over_{minutes}min'
+        graph.add(waiting, [f'activity_wfc_over{minutes}'], _identity, f'お待たせ{minutes}分以上対応待ち件数')
+        graph.add(f'cumulative_callback_rate_under_{minutes}_min',
+                  [f'cumulative_callback_under_{minutes}_min', 'callback_total', waiting],
+                  lambda a, total, wfc: calc_rate(a, total + wfc), f'{minutes}分以内折返し率')
+    return graph
+
+
+KpiCalculator.GRAPH = build_kpi_graph()
+# 現在時刻で変わる指標（お待たせ件数と、それを分母に含む折返し率）。同期の合間の更新ではこれだけが変わる
+KpiCalculator.WAITING_METRICS = [
+    name for name in KpiCalculator.GRAPH.outputs()
+    if any(KpiCalculator.INPUT_SOURCES.get(dep, ('',))[0] == 'wfc'
+           for dep in KpiCalculator.GRAPH.dependencies(name, recursive=True))
+]
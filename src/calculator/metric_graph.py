@@ -0,0 +1,182 @@
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MetricNode:
+    def __init__(self,
+                 name: str,
+                 deps: tuple = (),
+                 func: Optional[Callable] = None,
+                 label: Optional[str] = None) -> None:
+        """
+        指標の依存グラフの節点。
+
+        Parameters
+        ----------
+        name : str
+            指標名。
+        deps : tuple
+            計算に使う指標名。funcには同じ順序で値が渡される。
+        func : Callable, optional
+            依存する指標の値から値を計算する関数。Noneの場合は入力（葉）で、値は評価時に外部から取得する。
+        label : str, optional
+            表示名。
+        """
+        self.name = name
+        self.deps = tuple(deps)
+        self.func = func
+        self.label = label or name
+
+    @property
+    def is_input(self) -> bool:
+        return self.func is None
+
+    def __repr__(self) -> str:
+        if self.is_input:
+            return f"MetricNode({self.name!r}, input)"
+        return f"MetricNode({self.name!r}, deps={self.deps})"
+
+
+class MetricGraph:
+    def __init__(self) -> None:
+        """
+        指標の計算式を宣言的に登録する依存グラフ（DAG）。
+
+        入力（葉）と、他の指標から計算する指標を登録し、evaluateで必要な指標だけを
+        依存順に1回ずつ計算する。計算結果は評価ごとのメモに保存されるため、
+        共通する部分式が何度参照されても再計算されない。
+        """
+        self.nodes: Dict[str, MetricNode] = {}
+        self._orders = {}
+
+    def add_input(self, name: str, label: Optional[str] = None) -> MetricNode:
+        """入力（葉）を登録する"""
+        return self._add(MetricNode(name, label=label))
+
+    def add(self, name: str, deps: Iterable[str], func: Callable, label: Optional[str] = None) -> MetricNode:
+        """依存する指標から計算する指標を登録する。依存先は先に登録しておく必要がある"""
+        deps = tuple(deps)
+        missing = [d for d in deps if d not in self.nodes]
+        if missing:
+            raise ValueError(f"{name}の依存先が登録されていません。: {missing}")
+        return self._add(MetricNode(name, deps, func, label))
+
+    def _add(self, node: MetricNode) -> MetricNode:
+        if node.name in self.nodes:
+            raise ValueError(f"指標が既に登録されています。: {node.name}")
+        self.nodes[node.name] = node
+        self._orders.clear()
+        return node
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.nodes
+
+    def node(self, name: str) -> MetricNode:
+        if name not in self.nodes:
+            raise KeyError(f"指標が存在しません。: {name}")
+        return self.nodes[name]
+
+    def inputs(self) -> List[str]:
+        """入力（葉）の指標名を返す"""
+        return [name for name, node in self.nodes.items() if node.is_input]
+
+    def outputs(self) -> List[str]:
+        """入力（葉）以外の指標名を返す"""
+        return [name for name, node in self.nodes.items() if not node.is_input]
+
+    def dependencies(self, name: str, recursive: bool = False) -> List[str]:
+        """指標が依存する指標名を返す。recursive=Trueの場合は間接的な依存も含めて依存順に返す"""
+        if not recursive:
+            return list(self.node(name).deps)
+        return [n for n in self.order([name]) if n != name]
+
+    def dependents(self, name: str) -> List[str]:
+        """指標を直接参照している指標名を返す"""
+        self.node(name)
+        return [n for n, node in self.nodes.items() if name in node.deps]
+
+    def order(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        targets（省略時は全ての指標）の計算に必要な指標名を依存順（トポロジカル順）に返す。
+        依存が循環している場合はValueErrorを送出する（addでは依存先を先に登録するため、nodesを直接変更した場合のみ）
+        """
+        targets = tuple(self.nodes) if targets is None else tuple(targets)
+        if targets in self._orders:
+            return list(self._orders[targets])
+        ordered = []
+        visited = set()
+        visiting = []
+
+        def visit(name: str) -> None:
+            if name in visiting:
+                cycle = visiting[visiting.index(name):] + [name]
+                raise ValueError(f"指標の依存が循環しています。: {' -> '.join(cycle)}")
+            if name in visited:
+                return
+            visiting.append(name)
+            for dep in self.node(name).deps:
+                visit(dep)
+            visiting.pop()
+            visited.add(name)
+            ordered.append(name)
+
+        for target in targets:
+            visit(target)
+        self._orders[targets] = tuple(ordered)
+        return ordered
+
+    def evaluate(self,
+                 targets: Iterable[str],
+                 resolve_input: Callable[[str], object],
+                 memo: Optional[dict] = None) -> dict:
+        """
+        指標を計算する。
+
+        Parameters
+        ----------
+        targets : Iterable[str]
+            計算する指標名。
+        resolve_input : Callable[[str], object]
+            入力（葉）の指標名から値を取得する関数。
+        memo : dict, optional
+            計算済みの値。渡した辞書に計算結果が追加されるため、同じ辞書を使う間は各指標が1回だけ計算される。
+
+        Returns
+        -------
+        dict
+            targetsの指標名をキーとした値。
+        """
+        memo = {} if memo is None else memo
+        targets = tuple(targets)
+        order = self._orders.get(targets)
+        for name in order if order is not None else self.order(targets):
+            if name in memo:
+                continue
+            node = self.nodes[name]
+            if node.is_input:
+                memo[name] = resolve_input(name)
+            else:
+                memo[name] = node.func(*(memo[dep] for dep in node.deps))
+        return {name: memo[name] for name in targets}
+
+    def describe(self) -> str:
+        """グラフを「指標名 <- 依存する指標名」の形式で返す（デバッグ用）"""
+        lines = []
+        for name in self.order():
+            node = self.nodes[name]
+            source = '(入力)' if node.is_input else ', '.join(node.deps)
+            lines.append(f"{name} [{node.label}] <- {source}")
+        return '\n'.join(lines)
+
+    def to_dot(self) -> str:
+        """グラフをGraphvizのdot形式で返す（デバッグ用）"""
+        lines = ['digraph metrics {']
+        for name, node in self.nodes.items():
+            shape = 'box' if node.is_input else 'ellipse'
+            lines.append(f'    "{name}" [label="{node.label}", shape={shape}];')
+            for dep in node.deps:
+                lines.append(f'    "{dep}" -> "{name}";')
+        lines.append('}')
+        return '\n'.join(lines)
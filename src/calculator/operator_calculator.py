@@ -1,34 +1,108 @@
+import numpy as np
 import pandas as pd
 
 import logging
 
+import settings
+from src.processors.operator_index import OperatorIdentityIndex
+
 logger = logging.getLogger(__name__)
 
 
 class OperatorCalculator:
-    def __init__(self, df_operators, df_ctstage, df_close, df_shift) -> None:
+    def __init__(self, df_operators, df_ctstage, df_close, df_shift,
+                 operator_index: OperatorIdentityIndex = None) -> None:
         self.df_operators = df_operators
+        self.operator_index = operator_index or OperatorIdentityIndex(df_operators)
 
-        self.sweet_to_name = df_operators.dropna(subset=['Sweet']).set_index('Sweet')['氏名'].to_dict()
-        self.ctstage_to_name = df_operators.set_index('CTStage')['氏名'].to_dict()
-
-        df_ctstage.index = df_ctstage.index.map(self._replace_ctstage_to_name)
-        df_shift.index = df_shift.index.map(self._replace_sweetname_to_name)
-        self.df_ctstage = df_ctstage.map(self._time_to_days)
+        # 氏名に置き換えられなかった名前（種類ごと）
+        self.unmatched = {}
+        df_ctstage, self.unmatched['ctstage'] = self.operator_index.resolve_index(df_ctstage, 'ctstage')
+        df_shift, self.unmatched['sweet'] = self.operator_index.resolve_index(df_shift, 'sweet')
+        self.df_ctstage = self._times_to_days(df_ctstage)
         self.df_shift = df_shift
         self.df_close = df_close
 
     def calculate(self) -> pd.DataFrame:
         """
         オペレーター別のACW, ATT, CPHを計算する。
+
+        CTStage・クローズ・シフトのデータを稼働中のオペレーターの氏名のインデックスに揃え、列単位で計算する。
+
+        Returns
+        -------
+        pd.DataFrame
+            インデックスが氏名、列が'ログイン時間', 'ATT', 'ACW'（1日を1とした時間）、
+            'クローズ'（件数）、'CPH'（ログイン1時間あたりのクローズ数）、'シフト'のDataFrame。
+            ログイン時間が0または不明な場合のCPHはNaN。
+            TEMPLATE_OPのレポートに必要な列がない指標はNaN（エラーをログに出力する）。
         """
         active_operators = self.df_operators[self.df_operators['active'] == 1]['氏名']
-        self.df_ctstage = self.df_ctstage[self.df_ctstage.index.isin(active_operators)]
-        self.df_close = self.df_close[self.df_close.index.isin(active_operators)]
-        self.df_shift = self.df_shift[self.df_shift.index.isin(active_operators)]
-       
-        print(self.sweet_to_name)
-    
+        names = pd.Index(active_operators.drop_duplicates(), name='氏名')
+
+        df_ctstage = self._align(self.df_ctstage, names, 'CTStage')
+        df_close = self._align(self.df_close, names, 'クローズ')
+        df_shift = self._align(self.df_shift, names, 'シフト')
+
+        login_time = self._column(df_ctstage, settings.OPERATOR_LOGIN_TIME_COLUMN, 'ログイン時間')
+        close = df_close['クローズ'].fillna(0).astype(np.int64)
+        login_hours = (login_time * 24).where(login_time > 0)
+
+        df = pd.DataFrame({
+            'ログイン時間': login_time,
+            'ATT': self._per_call(df_ctstage, settings.OPERATOR_TALK_TOTAL_COLUMN, settings.OPERATOR_TALK_TIME_COLUMN, 'ATT'),
+            'ACW': self._per_call(df_ctstage, settings.OPERATOR_ACW_TOTAL_COLUMN, settings.OPERATOR_ACW_COLUMN, 'ACW'),
+            'クローズ': close,
+            'CPH': close / login_hours,
+            'シフト': df_shift['シフト'],
+        }, index=names)
+        logger.debug(f"オペレーター別KPI: {df.shape[0]}人")
+        return df
+
+    @staticmethod
+    def _column(df: pd.DataFrame, column: str, metric: str) -> pd.Series:
+        """レポートの列を返す。列がない場合はエラーをログに出力し、全てNaNの列を返す"""
+        if column in df.columns:
+            return df[column]
+        logger.error(f"TEMPLATE_OPのレポートに'{column}'列がないため、{metric}を計算できません。"
+                     f"settingsの列名を確認してください。: {list(df.columns)}")
+        return pd.Series(np.nan, index=df.index, dtype='float64')
+
+    def _per_call(self, df: pd.DataFrame, total_column: str, average_column: str, metric: str) -> pd.Series:
+        """
+        1件あたりの時間（ATT・ACW）。合計時間の列と応答件数の列があれば 合計 / 応答件数 で計算し、
+        なければレポートの平均の列を使う。応答件数が0の場合はNaN。
+        """
+        if total_column in df.columns and settings.OPERATOR_CALLS_COLUMN in df.columns:
+            calls = df[settings.OPERATOR_CALLS_COLUMN]
+            return df[total_column] / calls.where(calls > 0)
+        return self._column(df, average_column, metric)
+
+    @staticmethod
+    def _align(df: pd.DataFrame, names: pd.Index, label: str) -> pd.DataFrame:
+        """氏名のインデックスに揃える。氏名が重複している行は最初の行だけを使う"""
+        duplicated = df.index.duplicated(keep='first')
+        if duplicated.any():
+            logger.warning(f"{label}のデータに氏名が重複している行があります。最初の行を使用します。: {sorted(set(df.index[duplicated]))}")
+            df = df[~duplicated]
+        return df.reindex(names)
+
+    @staticmethod
+    def _times_to_days(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        hh:mm:ss 形式の列をまとめて1日を1とした時間に変換する。変換できない値はNaN。
+        応答件数の列（settings.OPERATOR_CALLS_COLUMN）は数値に変換する。
+        行がない場合も列ごとに変換する（DataFrame.applyは空のDataFrameでは関数を適用しない）。
+        """
+        one_day = pd.Timedelta(days=1)
+
+        def convert(column: pd.Series) -> pd.Series:
+            if column.name == settings.OPERATOR_CALLS_COLUMN:
+                return pd.to_numeric(column, errors='coerce')
+            return pd.to_timedelta(column.astype('string'), errors='coerce') / one_day
+        return pd.DataFrame({column: convert(df[column]) for column in df.columns}, index=df.index)
+
+    @staticmethod
     def _float_to_hms(value: float) -> str:
         '''1日を1としたfloat型を'hh:mm:ss'形式の文字列に変換'''
 
@@ -51,30 +125,3 @@ class OperatorCalculator:
         s = int(seconds)
 
         return f"{h:02}:{m:02}:{s:02}"
-    
-    def _time_to_days(self, time_str: str) -> float:
-        """hh:mm:ss 形式の時間を1日を1としたときの時間に変換する関数
-            Args:
-                time_str(str): hh:mm:ss 形式の時間
-            
-            return:
-                float: 1日を1としたときの時間"""
-        # t = dt.datetime.strptime(time_str, "%H:%M:%S")
-        split_time = time_str.split(':')
-        t = (float(split_time[0]) + float(split_time[1]) / 60 + float(split_time[2]) / 3600) / 24
-
-        return t
-    
-    def _replace_sweetname_to_name(self, name):
-        if name in self.sweet_to_name:
-            return self.sweet_to_name[name]
-        else:
-            logger.warning(f"'{name}'がOperaotrsファイルのSweetカラムに存在しません。")
-            return name
-
-    def _replace_ctstage_to_name(self, name):
-        if name in self.ctstage_to_name:
-            return self.ctstage_to_name[name]
-        else:
-            logger.warning(f"'{name}'がOperatorsファイルのCTStageカラムに存在しません。")
-            return name
\ No newline at end of file
@@ -1,31 +1,152 @@
 import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import os
 import pandas as pd
 import threading
+import time
 
 from src.processors.close_processor import CloseProcessor
 from src.processors.shift_processor import ShiftProcessor
+from src.processors.shift_schedule import shift_schedule_path
 from src.processors.excel_sync import SynchronizedExcelProcessor
+from src.processors.offload import get_process_pool, process_offloaded
+from src.processors.open_case_index import OpenCaseIndex, get_open_case_index
+from src.processors.operator_index import OperatorIdentityIndex, get_operator_index
+from src.processors.workbook_cache import get_workbook_cache
 from src.calculator.kpi_calculator import KpiCalculator
 from src.calculator.operator_calculator import OperatorCalculator
-from src.scraper import Scraper
+from src.kpi_store import get_kpi_store
+from src.scheduler import CycleScheduler
+from src.scraper import Scraper, create_scraper
+from src.session_pool import SessionPool
+from src.task_graph import DONE, TaskGraph, TaskRun
 import settings
 
 
 logger = logging.getLogger(__name__)
 
-def collect_data() -> dict:
+# 計算のノード名
+GROUP_KPI_NODE = 'calculate:group'
+OPERATOR_KPI_NODE = 'calculate:operator'
+# scrapeノードが使う資源（セッション）の名前
+SCRAPE_RESOURCE = 'session'
+
+
+class CycleDataPlane:
+    # 共有するデータの名前と型
+    FRAME_TYPES = {
+        'close': pd.DataFrame,  # CloseProcessor.process（氏名ごとのクローズ数）
+        'operators': OperatorIdentityIndex,  # operators.xlsxと氏名の索引
+        'shift': pd.DataFrame,  # ShiftProcessor.process（当日のシフト）
+        'ctstage': pd.DataFrame,  # TEMPLATE_OPのレポート
+        'open_cases': OpenCaseIndex,  # 活動データの折返し待ちの案件の索引
+    }
+
+    def __init__(self) -> None:
+        """
+        1サイクルの中で読み込んだデータを共有する。
+
+        各データは最初に必要になったとき（または同期処理が公開したとき）に1回だけ読み込まれ、
+        グループ別KPIとオペレーター別KPIの両方の処理で使われる。
+        日付で決まるデータ（月間シフト表など）は、作成時の日付（date）のものを使う。
+        """
+        self.date = datetime.date.today()
+        self.results = {}
+        self._frames = {}
+        self._locks = {name: threading.Lock() for name in self.FRAME_TYPES}
+
+    def _check(self, name: str, value) -> None:
+        if name not in self.FRAME_TYPES:
+            raise KeyError(f"データが定義されていません。: {name}")
+        if not isinstance(value, self.FRAME_TYPES[name]):
+            raise TypeError(f"{name}の型が正しくありません。: {type(value).__name__}")
+
+    def publish(self, name: str, value) -> None:
+        """読み込んだデータを公開する"""
+        self._check(name, value)
+        with self._locks[name]:
+            self._frames[name] = value
+        logger.debug(f"サイクルのデータを公開しました。: {name}")
+
+    def load(self, name: str, loader):
+        """
+        データを返す。まだ公開されていない場合はloaderで読み込んで公開する。
+        同時に呼ばれた場合も読み込みは1回だけ行われる。
+        """
+        if name not in self._locks:
+            raise KeyError(f"データが定義されていません。: {name}")
+        with self._locks[name]:
+            if name not in self._frames:
+                value = loader()
+                self._check(name, value)
+                self._frames[name] = value
+                logger.debug(f"サイクルのデータを読み込みました。: {name}")
+            return self._frames[name]
+
+    def get(self, name: str, default=None):
+        """公開済みのデータを返す。公開されていない場合はdefault"""
+        with self._locks[name]:
+            return self._frames.get(name, default)
+
+
+def source_name(file_path: str) -> str:
+    """タスクグラフのノード名に使うファイル名（拡張子なし）"""
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+def merge_results(parts) -> dict:
+    """process・scrapeノードの結果（辞書）をまとめる"""
+    results = {}
+    for part in parts:
+        if isinstance(part, dict):
+            results.update(part)
+        else:
+            logger.error(f"処理結果が辞書型ではありません。: {part}")
+    return results
+
+def scrape_limits(scraper, pool: SessionPool = None) -> dict:
     """
-    Excelファイルの処理とスクレイピング処理を同期的に実行する。
-    
-    Returns
-    -------
-    dict
-        処理結果を格納した辞書型オブジェクト
+    scrapeノードの同時実行数の上限（TaskGraph.runのlimits）。
+    セッションを待つだけのscrapeノードがワーカーのスレッドを占有して、load・processノードの
+    開始を遅らせないよう、使えるセッションの数に合わせる。
     """
-    stop_event = threading.Event()
+    pool = pool or getattr(scraper, 'pool', None)
+    if pool is not None:
+        return {SCRAPE_RESOURCE: pool.size}
+    # プールを持たないScraperは1つのブラウザを、ReporterHttpClientは1つのHTTPセッションを排他的に使う
+    return {SCRAPE_RESOURCE: 1}
 
+def build_cycle_graph(scraper,
+                      stop_event: threading.Event,
+                      data_plane: CycleDataPlane,
+                      calculate: bool = True,
+                      pool: SessionPool = None,
+                      executor=None) -> TaskGraph:
+    """
+    1サイクル分の処理のタスクグラフを作成する。
+
+    Excelファイルごとの sync -> load -> process と、テンプレートごとの scrape を別々のノードにし、
+    グループ別KPI（calculate:group）とオペレーター別KPI（calculate:operator）は
+    それぞれ必要な入力が揃った時点で開始する。
+    同期に失敗したファイルは古い内容のままのため読み込まず、syncノードを失敗として、
+    そのファイルの読込・処理と、それを入力とするKPIの計算をスキップする。
+
+    Parameters
+    ----------
+    scraper : Scraper | ReporterHttpClient
+        テンプレートの取得に使うScraper。
+    stop_event : threading.Event
+        処理を停止するためのイベント。
+    data_plane : CycleDataPlane
+        サイクルのデータ。
+    calculate : bool
+        KPIの計算ノードを含めるか。
+    pool : SessionPool, optional
+        Scraperがプールを持たない場合に、このサイクルで使うセッションプール。
+    executor : ProcessPoolExecutor, optional
+        指定した場合、ファイルの読込と処理（load -> process）をこのプロセスプールで1つのノードとして実行する。
+        同期とスクレイピング（I/O待ち）はスレッドのまま実行する。
+    """
+    graph = TaskGraph()
     excel_processor = SynchronizedExcelProcessor(
         file_paths=settings.EXCEL_FILES,
         max_retries=settings.SYNC_MAX_RETRIES,
@@ -33,65 +154,218 @@ def collect_data() -> dict:
         refresh_interval=settings.REFRESH_INTERVAL
     )
 
+    # Excelファイルの処理: 同期 -> 読込 -> 処理
+    process_nodes = {}
+    for file_path in excel_processor.file_paths:
+        name = source_name(file_path)
+        def sync(file_path=file_path) -> None:
+            if not excel_processor.sync_file(file_path, stop_event):
+                raise RuntimeError(f"{file_path}を同期できませんでした。")
+        graph.add(f'sync:{name}', sync)
+        if executor is not None:
+            graph.add(f'process:{name}',
+                      lambda _, p=file_path: process_offloaded(executor, p, data_plane),
+                      deps=[f'sync:{name}'])
+        else:
+            graph.add(f'load:{name}', lambda _, p=file_path: excel_processor.load_file(p), deps=[f'sync:{name}'])
+            graph.add(f'process:{name}',
+                      lambda processor: excel_processor.process_loaded(processor, data_plane),
+                      deps=[f'load:{name}'])
+        process_nodes[file_path] = f'process:{name}'
+
+    # スクレイピング: テンプレートごと
+    scrape_kwargs = {} if pool is None else {'pool': pool}
+    for template in settings.TEMPLATES:
+        def scrape(template=template) -> dict:
+            result = scraper.scrape_template(template, stop_event, **scrape_kwargs)
+            if template not in result:
+                raise RuntimeError(f"{template}を取得できませんでした。")
+            return result
+        graph.add(f'scrape:{template}', scrape, resource=SCRAPE_RESOURCE)
+
+    if not calculate:
+        return graph
+
+    group_inputs = [process_nodes[settings.ACTIVITY_FILE], process_nodes[settings.SUPPORT_FILE]]
+    group_inputs += [f'scrape:{t}' for t in settings.TEMPLATES if t != settings.TEMPLATE_OP]
+    graph.add(GROUP_KPI_NODE, lambda *parts: calculate_group_kpis_for_all_groups(merge_results(parts)), deps=group_inputs)
+
+    if settings.TEMPLATE_OP in settings.TEMPLATES:
+        # 常駐モードで月をまたいでも、サイクルの日付の月のシフト表を使う
+        shift_path = shift_schedule_path(data_plane.date)
+
+        def calculate_operator(op_result: dict, _) -> pd.DataFrame:
+            df = collect_and_calculate_operator_kpis(op_result[settings.TEMPLATE_OP], data_plane, shift_path)
+            if df is None:
+                raise RuntimeError("オペレーター別KPIを計算できませんでした。")
+            return df
+        graph.add(OPERATOR_KPI_NODE, calculate_operator,
+                  deps=[f'scrape:{settings.TEMPLATE_OP}', process_nodes[settings.CLOSE_FILE]])
+    return graph
+
+def run_cycle(scraper: Scraper = None,
+              data_plane: CycleDataPlane = None,
+              calculate: bool = True,
+              stop_event: threading.Event = None) -> TaskRun:
+    """
+    1サイクル分の処理をタスクグラフで実行する。
+
+    一部のノードが失敗しても、失敗に依存しないノードは実行され、結果はノードごとの状態とともに返す。
+    process・scrapeノードの結果はdata_plane.resultsにまとめる。
+
+    Returns
+    -------
+    TaskRun
+        ノードごとの結果・状態・処理時間。
+    """
+    data_plane = data_plane or CycleDataPlane()
+    stop_event = stop_event or threading.Event()
+    if settings.CYCLE_EXECUTION_MODE not in ('thread', 'process'):
+        raise ValueError(f"CYCLE_EXECUTION_MODEが不正です。: {settings.CYCLE_EXECUTION_MODE}")
+    executor = get_process_pool() if settings.CYCLE_EXECUTION_MODE == 'process' else None
+
     # scraper処理をここに書く
-    scraper = Scraper()
+    if scraper is None:
+        scraper = create_scraper()
 
     # Excelが開いているかを確認して開いている場合はExcelを強制終了する。
     SynchronizedExcelProcessor.check_and_close(settings.EXCEL_FILES)
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = []
-        results = {}
-
-        # Excelファイルの処理をタスクとして追加
-        logger.debug("Excelファイルの処理をタスクとして追加しています。")
-        for file_path in excel_processor.file_paths:
-            futures.append(
-                executor.submit(excel_processor.process_file, file_path, stop_event)
-            )
-        
-        # scraping処理をタスクとして追加
-        logger.debug("スクレイピングの処理をタスクとして追加しています。")
-        futures.append(
-            executor.submit(scraper.scrape_ctstage_report, settings.TEMPLATES, stop_event)
-        )
+    # プールを持たないScraperはこのサイクルだけのプールでテンプレートを取得する（ログインはサイクルごとに1回）
+    pool = None
+    if isinstance(scraper, Scraper) and scraper.pool is None:
+        pool = SessionPool(size=max(1, scraper.parallelism), url=scraper.url, id=scraper.id)
 
-        try:
-            for future in as_completed(futures):
-                result = future.result()
-                if isinstance(result, dict):
-                    results.update(result)
-                else:
-                    logger.error(f"処理結果が辞書型ではありません。: {result}")
-            return results
-        except KeyboardInterrupt:
-            logger.info("停止信号を受け取りました。全てのタスクを停止します。")
-            stop_event.set()
-        
-        except Exception as e:
-            logger.error(f"エラーが発生しました。: {e}")
-            stop_event.set()
+    graph = build_cycle_graph(scraper, stop_event, data_plane, calculate=calculate, pool=pool, executor=executor)
+    try:
+        run = graph.run(max_workers=settings.CYCLE_MAX_WORKERS, stop_event=stop_event,
+                        limits=scrape_limits(scraper, pool))
+    finally:
+        if pool is not None:
+            pool.close_all()
+
+    data_plane.results.update(merge_results(
+        run.results[name] for name in graph.nodes
+        if name.startswith(('process:', 'scrape:')) and run.status[name] == DONE
+    ))
+    if isinstance(data_plane.results.get(settings.TEMPLATE_OP), pd.DataFrame):
+        data_plane.publish('ctstage', data_plane.results[settings.TEMPLATE_OP])
+    # 同期の合間にお待たせ件数を更新できるよう、活動データの索引をプロセスで共有する索引に反映する
+    open_cases = data_plane.get('open_cases')
+    if open_cases is not None:
+        get_open_case_index().restore(open_cases.state())
+    if not run.ok:
+        failed = {name: run.status[name] for name in graph.nodes if run.status[name] != DONE}
+        logger.warning(f"一部の処理が完了しませんでした。: {failed}")
+    return run
+
+def collect_data(scraper: Scraper = None, data_plane: CycleDataPlane = None) -> dict:
+    """
+    Excelファイルの処理とスクレイピング処理を実行する。
+    一部の処理が失敗した場合は、完了した処理の結果だけを返す。
+
+    Parameters
+    ----------
+    scraper : Scraper | ReporterHttpClient, optional
+        再利用するScraper。指定しない場合はサイクルごとに新規作成する。
+    data_plane : CycleDataPlane, optional
+        同期処理で読み込んだデータ（クローズデータなど）と処理結果を公開する先。
+    
+    Returns
+    -------
+    dict
+        処理結果を格納した辞書型オブジェクト
+    """
+    data_plane = data_plane or CycleDataPlane()
+    try:
+        run_cycle(scraper=scraper, data_plane=data_plane, calculate=False)
+        return data_plane.results
+    except KeyboardInterrupt:
+        logger.info("停止信号を受け取りました。全てのタスクを停止します。")
+    except Exception as e:
+        logger.error(f"エラーが発生しました。: {e}")
 
-def calculate_group_kpis_for_all_groups(data: dict) -> dict:
+def calculate_group_kpis_for_all_groups(data: dict) -> pd.DataFrame:
     """
     KPIを計算する。
+
+    Returns
+    -------
+    pd.DataFrame
+        行がグループ（SS, TVS, KMN, HHD）、列が指標のDataFrame
+    """
+    return KpiCalculator(data).metrics_frame()
+
+def refresh_waiting_for_callback(data: dict) -> dict:
+    """
+    前回の同期で作成した折返し待ちの案件の索引から、現在時刻でのお待たせ件数（wfc_*）を更新する。
+    Excelを読み直さずにグループ別KPIを再計算する場合に使う。
+    """
+    data = dict(data)
+    data.update(get_open_case_index().wfc_result())
+    return data
+
+def refresh_group_kpis(data: dict) -> pd.DataFrame:
+    """
+    前回の同期の結果（data）のお待たせ件数だけを現在時刻で更新し、グループ別KPIを再計算する。
+    Excelの同期・読込とスクレイピングは行わない（常駐モードの同期の合間に使う）。
+    """
+    data = refresh_waiting_for_callback(data)
+    kpi_results = calculate_group_kpis_for_all_groups(data)
+    report_group_kpis(data, kpi_results, refreshed=True)
+    return kpi_results
+
+def report_group_kpis(data: dict, kpi_results: pd.DataFrame, refreshed: bool = False) -> None:
+    """
+    グループ別KPIをログに出力し、KPIの時系列に保存する。
+
+    refreshed=True（同期の合間の更新）の場合、前回の同期から変わるのは現在時刻で変わる指標
+    （KpiCalculator.WAITING_METRICS）だけのため、それだけをINFOで出力して時系列に保存する。
+    その他の指標はDEBUGで出力し、保存しない（時系列には同期した時刻の値だけが残る）。
     """
     kpi_calculator = KpiCalculator(data)
-    results = {}
-    results['SS'] = kpi_calculator.get_all_metrics('SS')
-    results['TVS'] = kpi_calculator.get_all_metrics('TVS')
-    results['KMN'] = kpi_calculator.get_all_metrics('KMN')
-    results['HHD'] = kpi_calculator.get_all_metrics('HHD')
+    updated = set(KpiCalculator.WAITING_METRICS) if refreshed else set(kpi_results.columns)
+    for group, row in kpi_results.astype(object).iterrows():
+        for name, value in row.items():
+            level = logging.INFO if name in updated else logging.DEBUG
+            logger.log(level, f"{group} {KpiCalculator.GRAPH.node(name).label}: {value}")
+        # お待たせ30分以上・40分以上・60分以上の案件は20分以上の案件の先頭部分
+        logger.info(f"{group} お待たせ20分以上対応リスト: {list(kpi_calculator.waiting_for_callback_list_over_20min(group))}")
+    if settings.KPI_STORE_ENABLED:
+        try:
+            get_kpi_store().append(kpi_results[[name for name in kpi_results.columns if name in updated]])
+        except Exception as e:
+            logger.error(f"KPIの保存に失敗しました。: {e}")
 
-    return results
+def load_close_data() -> pd.DataFrame:
+    """クローズデータを読み込んで氏名ごとのクローズ数にする"""
+    close_processor = CloseProcessor(settings.CLOSE_FILE)
+    close_processor.load_data()
+    return close_processor.process()
 
-def collect_and_calculate_operator_kpis(op_results: pd.DataFrame) -> dict:
+def collect_and_calculate_operator_kpis(op_results: pd.DataFrame = None,
+                                        data_plane: CycleDataPlane = None,
+                                        shift_path: str = None) -> pd.DataFrame:
     """
     オペレーター別のKPIを計算する。
+
+    Parameters
+    ----------
+    op_results : pd.DataFrame, optional
+        TEMPLATE_OPのレポート。省略時はdata_planeに公開されたもの。
+    data_plane : CycleDataPlane, optional
+        サイクルのデータ。同期処理で公開済みのデータは読み直さない。
+    shift_path : str, optional
+        月間シフト表のパス。省略時はdata_plane.dateの月のシフト表。
     """
+    data_plane = data_plane or CycleDataPlane()
+    shift_path = shift_path or shift_schedule_path(data_plane.date)
+
     # CTStageデータの取得
     try:
-        df_ctstage = op_results
+        df_ctstage = op_results if op_results is not None else data_plane.get('ctstage')
+        if df_ctstage is None:
+            raise ValueError("TEMPLATE_OPのレポートがありません。")
         logger.info("CTStageデータの取得に成功しました。")
     except Exception as e:
         logger.error(f"CTStageデータの取得に失敗しました。: {e}")
@@ -99,17 +373,16 @@ def collect_and_calculate_operator_kpis(op_results: pd.DataFrame) -> dict:
     
     # クローズデータの取得 / 処理
     try:
-        close_processor = CloseProcessor(settings.CLOSE_FILE)
-        close_processor.load_data()
-        df_close = close_processor.process()
+        df_close = data_plane.load('close', load_close_data)
         logger.info("クローズデータの取得に成功しました。")
     except Exception as e:
         logger.error(f"クローズデータの取得に失敗しました。: {e}")
         return
 
-    # オペレーターのリストを取得
+    # オペレーターのリストを取得（operators.xlsxが変更されていない場合は前回の索引を使う）
     try:
-        df_operators = pd.read_excel(settings.OPERATORS_FILE)
+        operator_index = data_plane.load('operators', get_operator_index)
+        df_operators = operator_index.df_operators
         logger.info("オペレーターデータの取得に成功しました。")
     except Exception as e:
         logger.error(f"オペレーターデータの取得に失敗しました。: {e}")
@@ -117,22 +390,132 @@ def collect_and_calculate_operator_kpis(op_results: pd.DataFrame) -> dict:
     
     # シフトデータの取得 / 処理
     try:
-        df_shift = ShiftProcessor(df_operators, settings.SHIFT_SCHEDULE).process()
+        df_shift = data_plane.load(
+            'shift',
+            lambda: ShiftProcessor(shift_path, date=data_plane.date).process()
+        )
         logger.info("シフトデータの取得に成功しました。")
     except Exception as e:
         logger.error(f"シフトデータの取得に失敗しました。: {e}")
         return
     
-    operator_calculator = OperatorCalculator(df_operators, df_ctstage, df_close, df_shift)
+    operator_calculator = OperatorCalculator(df_operators, df_ctstage, df_close, df_shift, operator_index=operator_index)
     df = operator_calculator.calculate()
     return df
 
-def orchestrate_workflow():
-    results = collect_data()
-    kpi_results = calculate_group_kpis_for_all_groups(results)
-    for k, v in kpi_results.items():
-        for k2, v2 in v.items():
-            logger.info(f"{k} {k2}: {v2}")
-    
-    print(results['TEMPLATE_OP'])
-    
\ No newline at end of file
+def orchestrate_workflow(scraper: Scraper = None) -> dict:
+    """
+    1サイクル分の処理を実行し、KPIをログに出力する。
+
+    Returns
+    -------
+    dict
+        process・scrapeノードの結果（グループ別KPIの入力）。グループ別KPIを計算できなかった場合はNone。
+    """
+    data_plane = CycleDataPlane()
+    run = run_cycle(scraper=scraper, data_plane=data_plane)
+    logger.info(f"サイクルの処理結果:\n{run.summary()}")
+
+    kpi_results = run.results.get(GROUP_KPI_NODE)
+    if kpi_results is not None:
+        report_group_kpis(data_plane.results, kpi_results)
+
+    operator_kpis = run.results.get(OPERATOR_KPI_NODE)
+    if operator_kpis is not None:
+        logger.info(f"オペレーター別KPI:\n{operator_kpis.to_string()}")
+    logger.debug(f"ワークブックキャッシュのヒット数/ミス数: {get_workbook_cache().stats}")
+    return data_plane.results if kpi_results is not None else None
+
+
+class DaemonJob:
+    def __init__(self, scraper, sync_interval: float, tick_interval: float) -> None:
+        """
+        常駐モードの1ティック分の処理。
+
+        前回の同期からsync_interval秒経過した（または日付が変わった）ティックでは同期からの全処理
+        （orchestrate_workflow）を行い、それ以外のティックではExcelを読み直さずに、前回の同期の結果と
+        共有の折返し待ちの案件の索引からお待たせ件数とグループ別KPIだけを更新する（refresh_group_kpis）。
+
+        Parameters
+        ----------
+        scraper : Scraper | ReporterHttpClient
+            サイクル間で再利用するScraper。
+        sync_interval : float
+            同期の間隔（秒）。
+        tick_interval : float
+            ティックの間隔（秒）。
+        """
+        self.scraper = scraper
+        self.sync_interval = sync_interval
+        self.tick_interval = tick_interval
+        self.results = None
+        self.date = None
+        self.last_sync = None
+        self.syncs = 0
+        self.refreshes = 0
+
+    def _sync_due(self, now: float) -> bool:
+        if self.last_sync is None or self.date != datetime.date.today():
+            return True
+        # ティックの開始遅延で同期が1ティック遅れないよう、半ティック分の余裕を持たせる
+        return now - self.last_sync >= self.sync_interval - self.tick_interval / 2
+
+    def __call__(self) -> None:
+        now = time.monotonic()
+        if self._sync_due(now):
+            self.last_sync = now
+            self.date = datetime.date.today()
+            self.syncs += 1
+            self.results = orchestrate_workflow(scraper=self.scraper)
+        elif self.results is not None:
+            self.refreshes += 1
+            refresh_group_kpis(self.results)
+
+
+def run_daemon(interval: float = settings.DAEMON_INTERVAL,
+               stop_event: threading.Event = None,
+               max_cycles: int = None) -> CycleScheduler:
+    """
+    常駐モードでorchestrate_workflowを一定間隔ごとに実行する。
+
+    プロセスとログイン済みのブラウザ（SessionPool）をサイクル間で維持し、
+    処理が間隔を超過した場合は次のティックをスキップする。
+    settings.DAEMON_REFRESH_INTERVALが設定されている場合は、同期の合間にその間隔で
+    お待たせ件数とグループ別KPIを更新する（DaemonJob）。
+
+    Parameters
+    ----------
+    interval : float
+        サイクルの間隔（秒）。
+    stop_event : threading.Event, optional
+        常駐処理を停止するためのイベント。
+    max_cycles : int, optional
+        実行する最大ティック数（同期と更新の合計）。Noneの場合は停止されるまで実行する。
+
+    Returns
+    -------
+    CycleScheduler
+        実行に使用したスケジューラ（統計情報の参照用）。
+    """
+    stop_event = stop_event or threading.Event()
+    pool = None
+    if settings.REPORTER_BACKEND == 'selenium':
+        pool = SessionPool(size=max(settings.REPORTER_POOL_SIZE, settings.REPORTER_PARALLELISM))
+    scraper = create_scraper(pool=pool)
+    tick_interval = min(interval, settings.DAEMON_REFRESH_INTERVAL) if settings.DAEMON_REFRESH_INTERVAL else interval
+    job = DaemonJob(scraper, interval, tick_interval)
+    scheduler = CycleScheduler(job, tick_interval, stop_event)
+
+    logger.info(f"常駐モードを開始します。（同期の間隔: {interval} 秒, 更新の間隔: {tick_interval} 秒）")
+    try:
+        scheduler.run(max_cycles=max_cycles)
+    except KeyboardInterrupt:
+        logger.info("停止信号を受け取りました。常駐モードを終了します。")
+        stop_event.set()
+    finally:
+        if pool is not None:
+            pool.close_all()
+        else:
+            scraper.close()
+        logger.info(f"常駐モードを終了しました。: {scheduler.stats}（同期 {job.syncs}回, 更新 {job.refreshes}回）")
+    return scheduler
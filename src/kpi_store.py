@@ -0,0 +1,267 @@
+import atexit
+from contextlib import closing
+import datetime
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+import pandas as pd
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kpi (
+    date TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS kpi_date_grp_metric_ts ON kpi (date, grp, metric, ts);
+"""
+
+_CLOSE = object()
+
+# flushで書き込みスレッドが停止していないかを確認する間隔（秒）
+_FLUSH_POLL_INTERVAL = 0.5
+
+
+class KpiStore:
+    def __init__(self,
+                 path: str = settings.KPI_STORE_PATH,
+                 batch_size: int = settings.KPI_STORE_BATCH_SIZE,
+                 flush_interval: float = settings.KPI_STORE_FLUSH_INTERVAL) -> None:
+        """
+        サイクルごとのグループ別KPIを保存する追記専用の時系列ストア（SQLite）。
+
+        appendは行をキューに入れるだけで、書き込みはバックグラウンドのスレッドが
+        batch_size行ごと、またはflush_interval秒ごとにまとめて行う。
+        (date, grp, metric, ts)の索引により、日中の推移と前日比較を索引だけで取得できる。
+
+        Parameters
+        ----------
+        path : str
+            SQLiteファイルのパス。
+        batch_size : int
+            まとめて書き込む行数。
+        flush_interval : float
+            書き込み待ちの行を書き込むまでの最大待機時間（秒）。
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = {'rows': 0, 'batches': 0, 'failures': 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name='KpiStoreWriter', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def append(self, kpi_frame: pd.DataFrame, timestamp: Optional[datetime.datetime] = None) -> None:
+        """
+        1サイクル分のKPIを書き込み待ちに追加する（書き込みは待たない）。
+
+        Parameters
+        ----------
+        kpi_frame : pd.DataFrame
+            行がグループ、列が指標のDataFrame（KpiCalculator.metrics_frame）。
+        timestamp : datetime.datetime, optional
+            サイクルの時刻。省略時は現在時刻。
+        """
+        if self._closed:
+            raise RuntimeError("KpiStoreは既に閉じられています。")
+        if not self._writer.is_alive():
+            raise RuntimeError("KpiStoreの書き込みスレッドが停止しています。")
+        timestamp = timestamp or datetime.datetime.now()
+        date = timestamp.date().isoformat()
+        ts = timestamp.isoformat(timespec='seconds')
+        long = kpi_frame.astype('float64').stack()
+        self._queue.put([(date, str(group), str(metric), ts, float(value))
+                         for (group, metric), value in long.items()])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        書き込み待ちの行を全て書き込むまで待つ。
+        タイムアウトした場合、閉じられている場合、書き込みスレッドが停止している場合はFalse
+        """
+        if self._closed or not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = _FLUSH_POLL_INTERVAL if deadline is None else min(_FLUSH_POLL_INTERVAL, deadline - time.monotonic())
+            if done.wait(max(wait, 0)):
+                return True
+            if not self._writer.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return done.is_set()
+
+    def close(self) -> None:
+        """書き込み待ちの行を書き込んでからライターを停止する"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_CLOSE)
+        self._writer.join()
+
+    def _write_loop(self) -> None:
+        try:
+            conn = self._connect()
+        except Exception as e:
+            logger.error(f"KPIの保存先に接続できないため、書き込みスレッドを停止します。: {e}")
+            return
+        pending = []
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, list):
+                    pending.extend(item)
+                    if len(pending) < self.batch_size:
+                        continue
+                self._write(conn, pending)
+                pending = []
+
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is _CLOSE:
+                    break
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, rows: list) -> None:
+        if not rows:
+            return
+        try:
+            with conn:
+                conn.executemany("INSERT INTO kpi (date, grp, metric, ts, value) VALUES (?, ?, ?, ?, ?)", rows)
+            self.stats['rows'] += len(rows)
+            self.stats['batches'] += 1
+        except Exception as e:
+            # 書き込めない行があっても書き込みスレッドは停止させない（その行のバッチは破棄する）
+            self.stats['failures'] += 1
+            logger.error(f"KPIの保存に失敗しました（{len(rows)}行）。: {e}")
+
+    def intraday(self,
+                 metric: str,
+                 date: Optional[datetime.date] = None,
+                 groups: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        指標の日中の推移を返す。書き込み待ちの行は含まない（必要な場合は先にflushする）。
+
+        Parameters
+        ----------
+        metric : str
+            指標名。
+        date : datetime.date, optional
+            日付。省略時は今日。
+        groups : List[str], optional
+            グループ。省略時は全てのグループ。
+
+        Returns
+        -------
+        pd.DataFrame
+            行が時刻、列がグループのDataFrame。
+        """
+        date = (date or datetime.date.today()).isoformat()
+        sql = "SELECT ts, grp, value FROM kpi WHERE date = ? AND metric = ?"
+        params = [date, metric]
+        if groups:
+            sql += f" AND grp IN ({', '.join('?' for _ in groups)})"
+            params.extend(groups)
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(sql + " ORDER BY ts", conn, params=params)
+        if df.empty:
+            return pd.DataFrame(columns=groups or [])
+        df['ts'] = pd.to_datetime(df['ts'])
+        return df.pivot_table(index='ts', columns='grp', values='value', aggfunc='last')
+
+    def value_at(self,
+                 metric: str,
+                 group: str,
+                 date: datetime.date,
+                 time: datetime.time) -> Optional[float]:
+        """指定日の指定時刻以前で最後に保存された値を返す。ない場合はNone"""
+        ts = datetime.datetime.combine(date, time).isoformat(timespec='seconds')
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM kpi WHERE date = ? AND grp = ? AND metric = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+                (date.isoformat(), group, metric, ts)
+            ).fetchone()
+        return row[0] if row else None
+
+    def groups(self, date: Optional[datetime.date] = None) -> List[str]:
+        """指定日（省略時は今日）に保存されたグループを返す"""
+        date = (date or datetime.date.today()).isoformat()
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT DISTINCT grp FROM kpi WHERE date = ? ORDER BY grp", (date,)).fetchall()
+        return [row[0] for row in rows]
+
+    def day_over_day(self,
+                     metric: str,
+                     date: Optional[datetime.date] = None,
+                     time: Optional[datetime.time] = None,
+                     groups: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        指標の同時刻の前日比較を返す。
+
+        Parameters
+        ----------
+        metric : str
+            指標名。
+        date : datetime.date, optional
+            比較する日付。省略時は今日。
+        time : datetime.time, optional
+            比較する時刻。各日のこの時刻以前で最後の値を使う。省略時は現在時刻。
+        groups : List[str], optional
+            グループ。省略時はdateに保存された全てのグループ。
+
+        Returns
+        -------
+        pd.DataFrame
+            行がグループ、列が'当日'、'前日'、'差分'のDataFrame。
+        """
+        date = date or datetime.date.today()
+        time = time or datetime.datetime.now().time()
+        previous = date - datetime.timedelta(days=1)
+        groups = groups or self.groups(date)
+        rows = []
+        for group in groups:
+            current_value = self.value_at(metric, group, date, time)
+            previous_value = self.value_at(metric, group, previous, time)
+            diff = None if current_value is None or previous_value is None else current_value - previous_value
+            rows.append((current_value, previous_value, diff))
+        return pd.DataFrame(rows, index=pd.Index(groups, name='グループ'), columns=['当日', '前日', '差分'], dtype='float64')
+
+
+_kpi_store = None
+_kpi_store_lock = threading.Lock()
+
+
+def get_kpi_store() -> KpiStore:
+    """プロセス内で共有するKpiStoreを返す。プロセス終了時に書き込み待ちの行を書き込む"""
+    global _kpi_store
+    with _kpi_store_lock:
+        if _kpi_store is None:
+            _kpi_store = KpiStore()
+            atexit.register(_kpi_store.close)
+        return _kpi_store
@@ -1,4 +1,7 @@
+from .activity_state import ActivityIngestState, file_fingerprint
 from .base import BaseProcessor
+from .open_case_index import OpenCaseIndex
+import numpy as np
 import pandas as pd
 import datetime
 import settings
@@ -13,7 +16,36 @@ THIRTY_MINUTES = settings.SERIAL_30_MINUTES
 FORTY_MINUTES = settings.SERIAL_40_MINUTES
 SIXTY_MINUTES = settings.SERIAL_60_MINUTES
 
+# コールバック待ち時間の区分の境界（各区分は上限を含む）
+CALLBACK_EDGES = np.array([TOWENTY_MINUTES, THIRTY_MINUTES, FORTY_MINUTES, SIXTY_MINUTES])
+
+# コールバック件数を集計するグループ（キーの接尾辞: (サポート区分, 対象とする受付タイプ)）
+CALLBACK_GROUPS = {
+    'ss': ('SS', ('折返し', '留守電')),
+    'tvs': ('TVS', ('折返し', '留守電')),
+    'kmn': ('顧問先', ('折返し', '留守電')),
+    'hhd': ('HHD', ('HHD入電（折返し）', '留守電')),
+}
+
 class ActivityProcessor(BaseProcessor):
+    USECOLS = [
+        '件名',
+        '登録日時',
+        '案件番号 (関連) (サポート案件)',
+        '登録日時 (関連) (サポート案件)',
+        '受付タイプ (関連) (サポート案件)',
+        'サポート区分 (関連) (サポート案件)',
+        '指標に含めない (関連) (サポート案件)',
+        '顛末コード (関連) (サポート案件)',
+    ]
+    # 同じ案件の活動は全て同じ'登録日時 (関連) (サポート案件)'を持つため、当日の案件の活動だけを読めば足りる
+    DATE_COLUMN = '登録日時 (関連) (サポート案件)'
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        # waiting_for_callbackで作成した折返し待ちの案件の索引（共有の索引への反映は呼び出し側で行う）
+        self.open_cases = OpenCaseIndex()
+
     def process(self) -> dict:
         """
         Activityファイルのデータを指定された条件でフィルタリングおよび整形します。
@@ -28,49 +60,12 @@ class ActivityProcessor(BaseProcessor):
         """
         df = self.df.copy()
         result = {}
+        start_date = datetime.date.today()
+        end_date = datetime.date.today()
         try:
-            # '件名'列を文字列型に変換
-            df['件名'] = df['件名'].astype(str)
-
-            # 件名に「【受付】」が含まれていないもののみ残す
-            df = df[~df['件名'].str.contains('【受付】', na=False)]
-            logger.info(f"'【受付】'が含まれるカラムを削除しています。 Remaining rows: {df.shape[0]}")
-
-            # 日付範囲でフィルタリング
-            start_date = datetime.date.today()
-            end_date = datetime.date.today()
-            df = self.filtered_by_date_range(df, '登録日時 (関連) (サポート案件)', start_date, end_date)
-            logger.info(f"指定された日付範囲でフィルタリングしています。 Remaining rows: {df.shape[0]}")
-
-            # 案件番号でソートし、最も早い日時を残して重複を削除
-            df = df.sort_values(by=['案件番号 (関連) (サポート案件)', '登録日時'])
-            df = df.drop_duplicates(subset='案件番号 (関連) (サポート案件)', keep='first')
-            logger.info(f"案件番号でソートし、最も早い日時のデータを残して重複を削除しています。 Remaining rows: {df.shape[0]}")
-
-            # '登録日時'と'登録日時 (関連) (サポート案件)'をdatetime型に変換
-            # self.df['登録日時'] = pd.to_datetime(self.df['登録日時'], unit='d', origin='1899-12-30')
-            # self.df['登録日時 (関連) (サポート案件)'] = pd.to_datetime(self.df['登録日時 (関連) (サポート案件)'], unit='d', origin='1899-12-30')
-
-            # 時間差を計算
-            df['時間差'] = df['登録日時'] - df['登録日時 (関連) (サポート案件)']
-            df['時間差'] = df['時間差'].fillna(0.0)
-            logger.info("'時間差'を計算しています。")
-
-            # 受付タイプが折返しor留守電のものを抽出
-            _df_ss_tvs_kmn = df[(df['受付タイプ (関連) (サポート案件)'] == '折返し') | (df['受付タイプ (関連) (サポート案件)'] == '留守電')]
-            _df_hhd = df[(df['受付タイプ (関連) (サポート案件)'] == 'HHD入電（折返し）') | (df['受付タイプ (関連) (サポート案件)'] == '留守電')]
-            logger.info(f"受付タイプが'折返し'または'留守電'のデータを抽出しています。")
-
-            df_ss = _df_ss_tvs_kmn[(_df_ss_tvs_kmn['サポート区分 (関連) (サポート案件)'] == 'SS')]
-            df_tvs = _df_ss_tvs_kmn[(_df_ss_tvs_kmn['サポート区分 (関連) (サポート案件)'] == 'TVS')]
-            df_kmn = _df_ss_tvs_kmn[(_df_ss_tvs_kmn['サポート区分 (関連) (サポート案件)'] == '顧問先')]
-            df_hhd = _df_hhd[(_df_hhd['サポート区分 (関連) (サポート案件)'] == 'HHD')]
-
-            # グループ別に分割
-            result['cb_0_20_ss'], result['cb_20_30_ss'], result['cb_30_40_ss'], result['cb_40_60_ss'], result['cb_60over_ss'], result['cb_not_include_ss'] = self.group_activities_by_callback_duration(df_ss)
-            result['cb_0_20_tvs'], result['cb_20_30_tvs'], result['cb_30_40_tvs'], result['cb_40_60_tvs'], result['cb_60over_tvs'], result['cb_not_include_tvs'] = self.group_activities_by_callback_duration(df_tvs)
-            result['cb_0_20_kmn'], result['cb_20_30_kmn'], result['cb_30_40_kmn'], result['cb_40_60_kmn'], result['cb_60over_kmn'], result['cb_not_include_kmn'] = self.group_activities_by_callback_duration(df_kmn)
-            result['cb_0_20_hhd'], result['cb_20_30_hhd'], result['cb_30_40_hhd'], result['cb_40_60_hhd'], result['cb_60over_hhd'], result['cb_not_include_hhd'] = self.group_activities_by_callback_duration(df_hhd)
+            df = self.callback_candidates(df, start_date, end_date)
+            df = self.first_activities(df)
+            result.update(self.callback_counts(df))
 
         except Exception as e:
             logger.error(f"活動データのフィルタリング、整形中にエラーが発生しました。: {e}")
@@ -80,12 +75,115 @@ class ActivityProcessor(BaseProcessor):
         result.update(wfc_result)
         logger.debug(f"活動処理結果： {result}")
         return result
+
+    def process_incremental(self, state_file: str = settings.ACTIVITY_STATE_FILE) -> dict:
+        """
+        前回処理時の'登録日時'の最大値（ウォーターマーク）より後に追加された行だけを取り込み、
+        案件ごとの最初の活動を更新してprocessと同じ結果を返します。
+        取り込み済みの行の変更や日付の変更を検知した場合は全件を処理し直します。
+        取り込み済みの行の確認は、ファイルが変更されていない場合は省略し、変更されている場合は
+        ウォーターマーク以前の全ての行の処理に使う列（USECOLS）を対象にします。
+
+        Parameters
+        ----------
+        state_file : str
+            差分取り込みの状態を保存するファイルのパス。
+
+        Returns
+        -------
+        dict
+            活動データのフィルタリングおよび整形結果
+        """
+        today = datetime.date.today()
+        fingerprint = file_fingerprint(self.file_path)
+        result = {}
+        try:
+            state = ActivityIngestState.load(state_file)
+            if state is None:
+                valid, reason = False, "保存された状態がありません。"
+            else:
+                valid, reason = state.is_valid_for(self.df, today, fingerprint)
+
+            if valid:
+                new_rows = state.new_rows(self.df)
+                logger.info(f"ウォーターマーク以降の{new_rows.shape[0]}行を差分として取り込みます。")
+                candidates = self.callback_candidates(new_rows.copy(), today, today)
+                df = self.first_activities(pd.concat([state.first_activities, candidates], ignore_index=True))
+            else:
+                logger.info(f"活動データを全件処理します。: {reason}")
+                df = self.first_activities(self.callback_candidates(self.df.copy(), today, today))
+
+            ActivityIngestState.build(today, self.df, df, self.USECOLS, fingerprint).save(state_file)
+            result.update(self.callback_counts(df))
+
+        except Exception as e:
+            logger.error(f"活動データの差分取り込み中にエラーが発生しました。: {e}")
+            raise
+
+        result.update(self.waiting_for_callback(today, today))
+        logger.debug(f"活動処理結果： {result}")
+        return result
+
+    def callback_candidates(self,
+                            df: pd.DataFrame,
+                            start_date: datetime.date,
+                            end_date: datetime.date) -> pd.DataFrame:
+        """
+        コールバックの対象となる活動（件名に'【受付】'を含まず、案件の登録日時が期間内のもの）を抽出する。
+        """
+        # '件名'列を文字列型に変換
+        df['件名'] = df['件名'].astype(str)
+
+        # 件名に「【受付】」が含まれていないもののみ残す
+        df = df[~df['件名'].str.contains('【受付】', na=False)]
+        logger.info(f"'【受付】'が含まれるカラムを削除しています。 Remaining rows: {df.shape[0]}")
+
+        # 日付範囲でフィルタリング
+        df = self.filtered_by_date_range(df, '登録日時 (関連) (サポート案件)', start_date, end_date)
+        logger.info(f"指定された日付範囲でフィルタリングしています。 Remaining rows: {df.shape[0]}")
+        return df
+
+    def first_activities(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        案件ごとに最も早い活動を残し、案件登録からの'時間差'を計算する。
+        """
+        # 案件番号でソートし、最も早い日時を残して重複を削除
+        df = df.sort_values(by=['案件番号 (関連) (サポート案件)', '登録日時'])
+        df = df.drop_duplicates(subset='案件番号 (関連) (サポート案件)', keep='first')
+        logger.info(f"案件番号でソートし、最も早い日時のデータを残して重複を削除しています。 Remaining rows: {df.shape[0]}")
+
+        # 時間差を計算
+        df['時間差'] = df['登録日時'] - df['登録日時 (関連) (サポート案件)']
+        df['時間差'] = df['時間差'].fillna(0.0)
+        logger.info("'時間差'を計算しています。")
+        return df
+
+    def callback_counts(self, df: pd.DataFrame) -> dict:
+        """
+        案件ごとの最初の活動から、グループ別・待ち時間別のコールバック件数（cb_*）を集計する。
+        """
+        summary = self.callback_duration_summary(df)
+        result = {}
+        for key, (category, reception_types) in CALLBACK_GROUPS.items():
+            rows = summary[(summary['サポート区分'] == category) & summary['受付タイプ'].isin(reception_types)]
+            total = self._bin_counts(rows)
+            included = self._bin_counts(rows[rows['指標に含めない'] == 'いいえ'])
+            not_included = self._bin_counts(rows[rows['指標に含めない'] == 'はい'])
+
+            # 40分以上は「指標に含めない」が「いいえ」のもののみ、60分以上の「はい」は別に集計する
+            result[f'cb_0_20_{key}'] = int(total[0])
+            result[f'cb_20_30_{key}'] = int(total[1])
+            result[f'cb_30_40_{key}'] = int(total[2])
+            result[f'cb_40_60_{key}'] = int(included[3])
+            result[f'cb_60over_{key}'] = int(included[4])
+            result[f'cb_not_include_{key}'] = int(not_included[4])
+        return result
     
     def waiting_for_callback(self,
                              start_date: datetime.date,
                              end_date: datetime.date) -> dict:
         """
-        滞留案件をクループ別、滞留時間別に集計し、案件リストを文字列として作成。
+        滞留案件をクループ別、滞留時間別に集計し、グループごとのWaitingCases（'wfc_ss'など）として
         辞書に格納して返却する。
         
         Parameters
@@ -108,15 +206,9 @@ class ActivityProcessor(BaseProcessor):
 
         df = df[(df['顛末コード (関連) (サポート案件)'] == '対応中') | (df['顛末コード (関連) (サポート案件)'] == '対応待ち')]
 
-        # 件名に「【受付】」が含まれているもののみ残す。
+        # 件名が「【受付】」の活動しかない案件のみ残す。
         df['件名'] = df['件名'].astype(str) 
-        contains_df = df[df['件名'] == '【受付】']
-        uncontains_df = df[df['件名'] != '【受付】']
-
-        only_contains_df = pd.merge(contains_df, uncontains_df, on='案件番号 (関連) (サポート案件)', how='outer', indicator=True)
-        result = only_contains_df[only_contains_df['_merge'] == 'left_only']
-        s = result['案件番号 (関連) (サポート案件)'].unique()
-        df = df[df['案件番号 (関連) (サポート案件)'].isin(s)]
+        df = self.reception_only_cases(df)
 
         # 案件番号、登録日時でソート
         df.sort_values(by=['案件番号 (関連) (サポート案件)', '登録日時'], inplace=True)
@@ -124,96 +216,69 @@ class ActivityProcessor(BaseProcessor):
         # 同一案件番号の最初の活動のみ残して他は削除  
         df.drop_duplicates(subset='案件番号 (関連) (サポート案件)', keep='first', inplace=True)
         
-        # サポート案件の登録日時と、活動の登録日時をPandas Datetime型に変換して、差分を'お待たせ時間'カラムに格納、NaNは０変換
-        current_serial = self.current_time_to_serial()
-        df['お待たせ時間'] = (current_serial - df['登録日時 (関連) (サポート案件)'])
-
         df = self.filtered_by_date_range(df, '登録日時 (関連) (サポート案件)', start_date, end_date)
-        df = df.reset_index(drop=True)
-
-        df_ss = df[(df['サポート区分 (関連) (サポート案件)'] == 'SS')]
-        df_tvs = df[(df['サポート区分 (関連) (サポート案件)'] == 'TVS')]
-        df_kmn = df[(df['サポート区分 (関連) (サポート案件)'] == '顧問先')]
-        df_hhd = df[(df['サポート区分 (関連) (サポート案件)'] == 'HHD')]
-
-        df_wfc_over20_ss, df_wfc_over30_ss, df_wfc_over40_ss, df_wfc_over60_ss = self.convert_to_pending_num(df_ss)
-        df_wfc_over20_tvs, df_wfc_over30_tvs, df_wfc_over40_tvs, df_wfc_over60_tvs = self.convert_to_pending_num(df_tvs)
-        df_wfc_over20_kmn, df_wfc_over30_kmn, df_wfc_over40_kmn, df_wfc_over60_kmn = self.convert_to_pending_num(df_kmn)
-        df_wfc_over20_hhd, df_wfc_over30_hhd, df_wfc_over40_hhd, df_wfc_over60_hhd = self.convert_to_pending_num(df_hhd)
-
-        wfc_over20_ss = self.create_wfc_list(df_wfc_over20_ss)
-        wfc_over30_ss = self.create_wfc_list(df_wfc_over30_ss)
-        wfc_over40_ss = self.create_wfc_list(df_wfc_over40_ss)
-        wfc_over60_ss = self.create_wfc_list(df_wfc_over60_ss)
-        
-        wfc_over20_tvs = self.create_wfc_list(df_wfc_over20_tvs)
-        wfc_over30_tvs = self.create_wfc_list(df_wfc_over30_tvs)
-        wfc_over40_tvs = self.create_wfc_list(df_wfc_over40_tvs)
-        wfc_over60_tvs = self.create_wfc_list(df_wfc_over60_tvs)
-
-        wfc_over20_kmn = self.create_wfc_list(df_wfc_over20_kmn)
-        wfc_over30_kmn = self.create_wfc_list(df_wfc_over30_kmn)
-        wfc_over40_kmn = self.create_wfc_list(df_wfc_over40_kmn)
-        wfc_over60_kmn = self.create_wfc_list(df_wfc_over60_kmn)
-
-        wfc_over20_hhd = self.create_wfc_list(df_wfc_over20_hhd)
-        wfc_over30_hhd = self.create_wfc_list(df_wfc_over30_hhd)
-        wfc_over40_hhd = self.create_wfc_list(df_wfc_over40_hhd)
-        wfc_over60_hhd = self.create_wfc_list(df_wfc_over60_hhd)
-
-        result = {
-            'wfc_over20_ss': wfc_over20_ss,
-            'wfc_over30_ss': wfc_over30_ss,
-            'wfc_over40_ss': wfc_over40_ss,
-            'wfc_over60_ss': wfc_over60_ss,
-            'wfc_over20_tvs': wfc_over20_tvs,
-            'wfc_over30_tvs': wfc_over30_tvs,
-            'wfc_over40_tvs': wfc_over40_tvs,
-            'wfc_over60_tvs': wfc_over60_tvs,
-            'wfc_over20_kmn': wfc_over20_kmn,
-            'wfc_over30_kmn': wfc_over30_kmn,
-            'wfc_over40_kmn': wfc_over40_kmn,
-            'wfc_over60_kmn': wfc_over60_kmn,
-            'wfc_over20_hhd': wfc_over20_hhd,
-            'wfc_over30_hhd': wfc_over30_hhd,
-            'wfc_over40_hhd': wfc_over40_hhd,
-            'wfc_over60_hhd': wfc_over60_hhd,
-        }
-        return result
-    
-    def group_activities_by_callback_duration(self, df: pd.DataFrame) -> tuple:
-        cb_0_20 = df[(df['時間差'] <= TOWENTY_MINUTES)].shape[0]
-        cb_20_30 = df[(df['時間差'] > TOWENTY_MINUTES) & (df['時間差'] <= THIRTY_MINUTES)].shape[0]
-        cb_30_40 = df[(df['時間差'] > THIRTY_MINUTES) & (df['時間差'] <= FORTY_MINUTES)].shape[0]
-        cb_40_60 = df[(df['時間差'] > FORTY_MINUTES) & (df['時間差'] <= SIXTY_MINUTES) & (df['指標に含めない (関連) (サポート案件)'] == 'いいえ')].shape[0]
-        cb_60over = df[(df['時間差'] > SIXTY_MINUTES) & (df['指標に含めない (関連) (サポート案件)'] == 'いいえ')].shape[0]
-        cb_not_include =df[(df['時間差'] > SIXTY_MINUTES) & (df['指標に含めない (関連) (サポート案件)'] == 'はい')].shape[0]
-
-        return cb_0_20, cb_20_30, cb_30_40, cb_40_60, cb_60over, cb_not_include
-    
-    
-    
-    def convert_to_pending_num(self, df: pd.DataFrame) -> tuple:
-        wfc_over_20 = df[df['お待たせ時間'] >= TOWENTY_MINUTES]
-        wfc_over30 = df[df['お待たせ時間'] >= THIRTY_MINUTES]
-        wfc_over40 = df[df['お待たせ時間'] >= FORTY_MINUTES]
-        wfc_over60 = df[df['お待たせ時間'] >= SIXTY_MINUTES]
 
-        return wfc_over_20, wfc_over30, wfc_over40, wfc_over60
+        # お待たせ時間は時刻だけで変わるため、索引を作成してしきい値ごとの案件は二分探索で求める
+        self.open_cases.update(df, end_date)
+        return self.open_cases.wfc_result(self.current_time_to_serial())
     
+    @staticmethod
+    def reception_only_cases(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        件名が「【受付】」の活動しかない案件の行だけを残す（アンチジョイン）。
+
+        「【受付】」以外の活動がある案件番号の集合をハッシュで引き、その案件を除外する。
+        案件あたりの活動数によらず行数に比例する時間で処理できる。
+        """
+        case = df['案件番号 (関連) (サポート案件)']
+        answered_cases = case[df['件名'] != '【受付】'].unique()
+        return df[~case.isin(answered_cases)]
+
+    @staticmethod
+    def callback_duration_bins(df: pd.DataFrame) -> np.ndarray:
+        """
+        '時間差'を待ち時間の区分（0: 0-20分, 1: 20-30分, 2: 30-40分, 3: 40-60分, 4: 60分超）に変換する。
+        各区分は上限を含む（例: ちょうど20分は0）。
+        """
+        return np.searchsorted(CALLBACK_EDGES, df['時間差'].to_numpy(dtype=float), side='left')
+
+    def callback_duration_summary(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        サポート区分 × 受付タイプ × 待ち時間の区分 × 指標に含めない ごとの件数を1回のgroupbyで集計する。
+
+        Returns
+        -------
+        pd.DataFrame
+            'サポート区分', '受付タイプ', 'bin', '指標に含めない', 'count' の列を持つ集計表
+        """
+        keys = pd.DataFrame({
+            'サポート区分': df['サポート区分 (関連) (サポート案件)'].to_numpy(),
+            '受付タイプ': df['受付タイプ (関連) (サポート案件)'].to_numpy(),
+            'bin': self.callback_duration_bins(df),
+            '指標に含めない': df['指標に含めない (関連) (サポート案件)'].to_numpy(),
+        })
+        return keys.groupby(list(keys.columns), dropna=False, sort=False).size().reset_index(name='count')
+
+    @staticmethod
+    def _bin_counts(rows: pd.DataFrame) -> np.ndarray:
+        """集計表の行を待ち時間の区分ごとに合計する"""
+        return np.bincount(rows['bin'].to_numpy(dtype=np.int64),
+                           weights=rows['count'].to_numpy(dtype=np.float64),
+                           minlength=len(CALLBACK_EDGES) + 1)
+
     def callback_classification_by_group(self, df: pd.DataFrame) -> tuple:
-        df_cb_0_20 = df[(df['時間差'] <= TOWENTY_MINUTES)]
-        df_cb_20_30 = df[(df['時間差'] > TOWENTY_MINUTES) & (df['時間差'] <= THIRTY_MINUTES)]
-        df_cb_30_40 = df[(df['時間差'] > THIRTY_MINUTES) & (df['時間差'] <= FORTY_MINUTES)]
-        df_cb_40_60 = df[(df['時間差'] > FORTY_MINUTES) & (df['時間差'] <= SIXTY_MINUTES) & (df['指標に含めない (関連) (サポート案件)'] == 'いいえ')]
-        df_cb_60over = df[(df['時間差'] > SIXTY_MINUTES) & (df['指標に含めない (関連) (サポート案件)'] == 'いいえ')]
-        df_cb_not_include =df[(df['時間差'] > SIXTY_MINUTES) & (df['指標に含めない (関連) (サポート案件)'] == 'はい')]
+        bins = self.callback_duration_bins(df)
+        included = (df['指標に含めない (関連) (サポート案件)'] == 'いいえ').to_numpy()
+        not_included = (df['指標に含めない (関連) (サポート案件)'] == 'はい').to_numpy()
+        df_cb_0_20 = df[bins == 0]
+        df_cb_20_30 = df[bins == 1]
+        df_cb_30_40 = df[bins == 2]
+        df_cb_40_60 = df[(bins == 3) & included]
+        df_cb_60over = df[(bins == 4) & included]
+        df_cb_not_include = df[(bins == 4) & not_included]
 
         return df_cb_0_20, df_cb_20_30, df_cb_30_40, df_cb_40_60, df_cb_60over, df_cb_not_include
     
-    def create_wfc_list(self, df: pd.DataFrame) -> list:
-        return list(df.loc[:, '案件番号 (関連) (サポート案件)'])
-
     @staticmethod
     def datetime_to_serial(dt: datetime.datetime, base_date=datetime.datetime(1899, 12, 30)) -> float:
         """
@@ -0,0 +1,131 @@
+import datetime
+import logging
+import os
+import pickle
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_COLUMN = '登録日時'
+
+
+def file_fingerprint(path: str) -> Optional[tuple]:
+    """ファイルのサイズと更新日時。取得できない場合はNone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ActivityIngestState:
+    def __init__(self,
+                 date: datetime.date,
+                 watermark: float,
+                 columns: tuple,
+                 hash_columns: tuple,
+                 history_rows: int,
+                 history_hash: int,
+                 first_activities: pd.DataFrame,
+                 fingerprint: Optional[tuple] = None) -> None:
+        """
+        活動データの差分取り込み用の状態。
+
+        Parameters
+        ----------
+        date : datetime.date
+            状態を作成した日付。日付が変わった場合は使用しない。
+        watermark : float
+            取り込み済みの'登録日時'の最大値（シリアル値）。
+        columns : tuple
+            状態を作成したときの列名。
+        hash_columns : tuple
+            取り込み済みの行の変更を確認する列（処理に使う列）。
+        history_rows : int
+            ウォーターマーク以前の行数。
+        history_hash : int
+            ウォーターマーク以前の全ての行のhash_columnsの内容のハッシュ（行の順序に依存しない）。
+        first_activities : pd.DataFrame
+            案件ごとの最初の活動（'【受付】'以外）。
+        fingerprint : Optional[tuple]
+            状態を作成したときの活動データのファイルのサイズと更新日時。
+            一致する場合はファイルが変更されていないため、行の確認を省略する。
+        """
+        self.date = date
+        self.watermark = watermark
+        self.columns = columns
+        self.hash_columns = hash_columns
+        self.history_rows = history_rows
+        self.history_hash = history_hash
+        self.first_activities = first_activities
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls,
+              date: datetime.date,
+              df: pd.DataFrame,
+              first_activities: pd.DataFrame,
+              hash_columns: Optional[list] = None,
+              fingerprint: Optional[tuple] = None) -> 'ActivityIngestState':
+        """処理済みの活動データから状態を作成する。hash_columnsを省略した場合は全ての列を確認する"""
+        watermark = df[WATERMARK_COLUMN].max()
+        watermark = float(watermark) if pd.notna(watermark) else float('-inf')
+        hash_columns = tuple(c for c in (hash_columns or df.columns) if c in df.columns)
+        history_rows, history_hash = cls._history_signature(df, watermark, hash_columns)
+        return cls(date, watermark, tuple(df.columns), hash_columns, history_rows, history_hash,
+                   first_activities, fingerprint)
+
+    @staticmethod
+    def _history_signature(df: pd.DataFrame, watermark: float, hash_columns: tuple) -> tuple:
+        """ウォーターマーク以前（'登録日時'が空の行を含む）の行数と、hash_columnsの内容のハッシュを返す"""
+        history = df.loc[~(df[WATERMARK_COLUMN] > watermark), list(hash_columns)]
+        if history.empty:
+            return 0, 0
+        hashes = pd.util.hash_pandas_object(history, index=False)
+        return len(history), int(hashes.sum())
+
+    def new_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ウォーターマークより後に追加された行を返す"""
+        return df[df[WATERMARK_COLUMN] > self.watermark]
+
+    def is_valid_for(self, df: pd.DataFrame, date: datetime.date, fingerprint: Optional[tuple] = None) -> tuple:
+        """
+        この状態に差分を取り込めるかを確認する。
+
+        Returns
+        -------
+        tuple
+            (取り込めるか, 取り込めない場合の理由)
+        """
+        if self.date != date:
+            return False, "日付が変わりました。"
+        if tuple(df.columns) != self.columns:
+            return False, "列構成が変わりました。"
+        if fingerprint is not None and fingerprint == self.fingerprint:
+            return True, ""
+        if self._history_signature(df, self.watermark, self.hash_columns) != (self.history_rows, self.history_hash):
+            return False, "取り込み済みの行が変更されました。"
+        return True, ""
+
+    @classmethod
+    def load(cls, path: str) -> Optional['ActivityIngestState']:
+        """保存された状態を読み込む。存在しない、または読み込めない場合はNone"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+            return state if isinstance(state, cls) else None
+        except Exception as e:
+            logger.warning(f"活動データの差分取り込み状態を読み込めませんでした。: {e}")
+            return None
+
+    def save(self, path: str) -> None:
+        """状態を保存する"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
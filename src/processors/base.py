@@ -2,10 +2,17 @@ import pandas as pd
 import datetime
 import logging
 import settings
+from src.processors.excel_reader import read_excel_filtered
+from src.processors.workbook_cache import read_excel_cached
 
 logger = logging.getLogger(__name__)
 
 class BaseProcessor:
+    # 読込時に残す列（Noneの場合は全ての列）
+    USECOLS = None
+    # 読込時に当日分の行だけを残す日付列（Noneの場合は全ての行）
+    DATE_COLUMN = None
+
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.df = pd.DataFrame()
@@ -13,14 +20,33 @@ class BaseProcessor:
     def load_data(self) -> None:
         """
         Excelファイルを読み込み、DataFrameに格納します。
+        内容が変わっていないファイルはパース済みのキャッシュから読み込みます。
         """
         try:
-            self.df = pd.read_excel(self.file_path)
+            if settings.EXCEL_PUSHDOWN and (self.USECOLS is not None or self.DATE_COLUMN is not None):
+                self.df = self._load_filtered_data()
+            else:
+                self.df = read_excel_cached(self.file_path, name=type(self).__name__)
             logger.info(f"Loaded {self.file_path} with {self.df.shape[0]} rows.")
         except Exception as e:
             logger.error(f"Failed to load {self.file_path}: {e}")
             raise
 
+    def _load_filtered_data(self) -> pd.DataFrame:
+        """
+        サブクラスで宣言した列（USECOLS）と当日分の行（DATE_COLUMN）だけを読み込みます。
+        """
+        today = datetime.date.today()
+        start_serial = self.datetime_to_serial(datetime.datetime.combine(today, datetime.time.min))
+        end_serial = self.datetime_to_serial(datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time.min))
+        variant = f"usecols={self.USECOLS}|date={self.DATE_COLUMN}|{start_serial}-{end_serial}"
+        return read_excel_cached(
+            self.file_path,
+            name=type(self).__name__,
+            variant=variant,
+            loader=lambda: read_excel_filtered(self.file_path, self.USECOLS, self.DATE_COLUMN, start_serial, end_serial)
+        )
+
     def save_data(self, output_file: str) -> None:
         """
         DataFrameをExcelファイルとして保存します。
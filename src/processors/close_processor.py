@@ -8,6 +8,9 @@ logger = logging.getLogger(__name__)
 
 
 class CloseProcessor(BaseProcessor):
+    # 列は位置で参照しているため絞り込まず、当日完了分の行だけを読み込む
+    DATE_COLUMN = '完了日時'
+
     def process(self):
         df = self.df.copy()
         try:
@@ -0,0 +1,113 @@
+import datetime
+import logging
+from typing import List, Optional
+
+import openpyxl
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EXCEL_BASE_DATE = datetime.datetime(1899, 12, 30)
+
+
+def to_serial(value) -> Optional[float]:
+    """
+    セルの値（シリアル値、datetime、日付文字列）をシリアル値に変換する。
+    変換できない場合はNoneを返す。
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return (value - EXCEL_BASE_DATE).total_seconds() / (24 * 60 * 60)
+    if isinstance(value, datetime.date):
+        return float((value - EXCEL_BASE_DATE.date()).days)
+    if isinstance(value, str):
+        try:
+            return to_serial(pd.to_datetime(value).to_pydatetime())
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def _column_names(header: tuple) -> list:
+    """pd.read_excelと同様に、空の列名を'Unnamed: n'に、重複した列名を'name.n'に置き換える"""
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = value if value is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_excel_filtered(file_path: str,
+                        usecols: Optional[List[str]] = None,
+                        date_column: Optional[str] = None,
+                        start_serial: Optional[float] = None,
+                        end_serial: Optional[float] = None) -> pd.DataFrame:
+    """
+    openpyxlの読み取り専用モードで先頭シートを1行ずつ読み、必要な行と列だけをDataFrameにする。
+
+    Parameters
+    ----------
+    file_path : str
+        読み込むExcelファイルのパス。
+    usecols : List[str], optional
+        読み込む列名。Noneの場合は全ての列。
+    date_column : str, optional
+        行の絞り込みに使う日付列。Noneの場合は全ての行を読み込む。
+    start_serial : float, optional
+        date_columnがこの値以上の行を残す（シリアル値）。
+    end_serial : float, optional
+        date_columnがこの値未満の行を残す（シリアル値）。
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        try:
+            names = _column_names(next(rows))
+        except StopIteration:
+            return pd.DataFrame(columns=usecols or [])
+
+        columns = list(usecols) if usecols is not None else names
+        missing = [c for c in columns + ([date_column] if date_column else []) if c not in names]
+        if missing:
+            raise ValueError(f"列が存在しません。: {missing}")
+        indexes = [names.index(c) for c in columns]
+        date_index = names.index(date_column) if date_column else None
+
+        values = [[] for _ in columns]
+        scanned = 0
+        for row in rows:
+            scanned += 1
+            if date_index is not None:
+                serial = to_serial(row[date_index] if date_index < len(row) else None)
+                if serial is None:
+                    continue
+                if start_serial is not None and serial < start_serial:
+                    continue
+                if end_serial is not None and serial >= end_serial:
+                    continue
+            elif all(v is None for v in row):
+                continue
+            for column_values, i in zip(values, indexes):
+                column_values.append(row[i] if i < len(row) else None)
+    finally:
+        workbook.close()
+
+    df = pd.DataFrame({i: column_values for i, column_values in enumerate(values)}, columns=range(len(columns)))
+    df.columns = columns
+    logger.debug(f"{file_path}から{scanned}行中{df.shape[0]}行、{len(columns)}列を読み込みました。")
+    return df
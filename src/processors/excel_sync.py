@@ -1,12 +1,11 @@
 import logging
 import openpyxl
 import os
-import pythoncom  # COM初期化に必要
-import time
-from typing import List
-import win32com.client
+from typing import Callable, List
 
 import settings
+from src.processors.close_processor import CloseProcessor
+from src.processors.refresh_backend import RefreshBackend, RefreshEngine, create_refresh_backend
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
@@ -15,7 +14,8 @@ class SynchronizedExcelProcessor:
     def __init__(self, file_paths: List[str],
                  max_retries: int = settings.SYNC_MAX_RETRIES,
                  retry_delay: int = settings.SYNC_RETRY_DELAY,
-                 refresh_interval: int = settings.REFRESH_INTERVAL
+                 refresh_interval: float = settings.REFRESH_INTERVAL,
+                 backend_factory: Callable[[], RefreshBackend] = create_refresh_backend
                  ) -> None:
         """
         Excelファイルの同期処理を管理するクラス。
@@ -28,15 +28,18 @@ class SynchronizedExcelProcessor:
             同期失敗時の最大リトライ回数（デフォルトは設定ファイルから）。
         retry_delay : int, optional
             リトライ間の待機時間（秒、デフォルトは設定ファイルから）。
-        refresh_interval : int, optional
+        refresh_interval : float, optional
             CalculationState を確認する際の待機時間（秒、デフォルトは設定ファイルから）。。
+        backend_factory : Callable[[], RefreshBackend], optional
+            ファイルごとに更新のバックエンドを作成する関数（デフォルトはsettings.REFRESH_BACKENDから）。
         """
         self.file_paths = file_paths
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.refresh_interval = refresh_interval
+        self.backend_factory = backend_factory
 
-    def process_file(self, file_path, stop_event) -> dict:
+    def process_file(self, file_path, stop_event, data_plane=None) -> dict:
         """
         このクラスのメインのメソッド。
         これを実行するだけ。
@@ -47,117 +50,102 @@ class SynchronizedExcelProcessor:
             処理するExcelファイルのパス。
         stop_event : threading.Event
             処理を停止するためのイベント。
+        data_plane : CycleDataPlane, optional
+            読み込んだデータを公開する先。クローズデータはここに公開し、オペレーター別KPIで使う。
         
         Returns
         -------
         dict
-            ファイルの処理結果。
+            ファイルの処理結果。同期できなかった場合は古い内容を読み込まずにNoneを返す。
         """
-        self._sync_file(file_path, stop_event)
+        if not self.sync_file(file_path, stop_event):
+            logger.error(f"{file_path}を同期できなかったため、読み込みません。")
+            return
+        if self.processor_class(file_path) is None:
+            logger.error(f"ファイル名がPathに含まれていません。{file_path}")
+            return
+        return self.process_loaded(self.load_file(file_path), data_plane)
 
+    @staticmethod
+    def processor_class(file_path: str):
+        """ファイルを処理するProcessorのクラスを返す。対象外のファイルの場合はNone"""
         if settings.ACTIVITY_FILE in file_path:
             from src.processors.activity_processor import ActivityProcessor
-            activity = ActivityProcessor(file_path)
-            activity.load_data()
-            result = activity.process()
-            return result
+            return ActivityProcessor
         elif settings.CLOSE_FILE in file_path:
-            result = {}
-            return result
+            return CloseProcessor
         elif settings.SUPPORT_FILE in file_path:
             from src.processors.support_processor import SupportProcessor
-            support = SupportProcessor(file_path)
-            support.load_data()
-            result = support.process()
-            return result
+            return SupportProcessor
+        return None
+
+    @classmethod
+    def load_file(cls, file_path: str):
+        """同期済みのファイルを読み込んだProcessorを返す"""
+        processor_class = cls.processor_class(file_path)
+        if processor_class is None:
+            raise ValueError(f"ファイル名がPathに含まれていません。{file_path}")
+        processor = processor_class(file_path)
+        processor.load_data()
+        return processor
+
+    @staticmethod
+    def process_loaded(processor, data_plane=None) -> dict:
+        """
+        読み込み済みのProcessorを処理して結果を返す。
+        クローズデータはdata_planeに公開し、結果は空の辞書を返す。
+        活動データで作成した折返し待ちの案件の索引もdata_planeに公開する。
+        """
+        if isinstance(processor, CloseProcessor):
+            if data_plane is not None:
+                data_plane.publish('close', processor.process())
+            return {}
+        if settings.ACTIVITY_INCREMENTAL and hasattr(processor, 'process_incremental'):
+            result = processor.process_incremental()
         else:
-            logger.error(f"ファイル名がPathに含まれていません。{file_path}")
+            result = processor.process()
+        open_cases = getattr(processor, 'open_cases', None)
+        if open_cases is not None and data_plane is not None:
+            data_plane.publish('open_cases', open_cases)
+        return result
 
-    
-    def _sync_file(self, file_path, stop_event) -> None:
+    def sync_file(self, file_path, stop_event) -> bool:
         """
-        個別のExcelファイルを処理します。
+        個別のExcelファイルを更新して保存します。
+        更新の完了はバックエンドの更新状態を確認して待ち、失敗した場合は同じアプリケーションで再試行します。
 
         Parameters
         ----------
         file_path : str
             処理するExcelファイルのパス。
+        stop_event : threading.Event
+            処理を停止するためのイベント。
+
+        Returns
+        -------
+        bool
+            同期が完了した場合はTrue。
         """
         logger.debug(f"{file_path}の処理を開始します。")
         if stop_event.is_set():
             logger.info(f"{file_path}の処理が停止されました。")
-            return
+            return False
         if not os.path.exists(file_path):
             logger.warning(f"ファイルが存在しません。: {file_path}")
-            return
-        
+            return False
+
+        engine = RefreshEngine(
+            self.backend_factory(),
+            poll_interval=self.refresh_interval,
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay
+        )
         try:
-            # COMライブラリを初期化
-            pythoncom.CoInitializeEx(pythoncom.COINIT_APARTMENTTHREADED)
-            logger.debug("COMライブラリを初期化しました。")
-
-            # Excelアプリケーション作成
-            excel = self._create_excel_app()
-            logger.debug('Excelアプリケーションを作成しました。')
-
-            logger.info(f"{file_path}の同期を開始します。")
-            retries = 0
-
-            while retries < self.max_retries and not stop_event.is_set():
-                try:
-                    workbook = excel.Workbooks.Open(file_path)
-                    logger.debug("ワークブックを開きました。")
-                    workbook.RefreshAll()
-                    logger.debug("ワークブックを更新しています。")
-                    time.sleep(self.refresh_interval)
-                    workbook.Save()
-                    logger.debug("ワークブックを保存しました。")
-                    workbook.Close()
-                    logger.info(f"{file_path}の同期が完了しました。")
-                    break
-                except Exception as e:
-                    retries += 1
-                    logger.info(f"{file_path}の同期中にエラーが発生しました。（{retries}回目）: {e}")
-                    if retries >= self.max_retries:
-                        logger.error(f"{file_path}の同期に失敗しました。最大リトライ回数に達しました。: {e}")
-                        # リトライ回数を超えたのでwhileループを抜けます。
-                        break
-
-                    else:
-                        logger.info(f"{file_path}の同期を再試行します。")
-                        time.sleep(self.retry_delay)
-                    
-                    # Excelのクローズ処理を行います。
-                    self._close_app(excel)
-
-                    # 次の処理に備えてExcelアプリケーションを作成します。
-                    excel = self._create_excel_app()
-                    logger.info('Excelアプリケーションを作成しました。')
-
+            return engine.sync(file_path, stop_event)
         except Exception as e:
             logger.error(f"{file_path}の同期処理中に予期しないエラーが発生しました。{e}")
-        finally:
-            # COMライブラリを終了
-            pythoncom.CoUninitialize()
-            logger.debug("COMライブラリを終了しました。")
-        
-        
-    
-    def _create_excel_app(self) -> win32com.client.CDispatch:
-        """
-        Excelアプリケーションを起動し、設定を行うヘルパーメソッド。
+            return False
 
-        Returns
-        -------
-        excel_app : COMObject
-            起動したExcelアプリケーションオブジェクト。
-        """
-        logger.info("Excelアプリケーションを起動します。")
-        excel_app = win32com.client.DispatchEx("Excel.Application")
-        excel_app.Visible = False
-        excel_app.DisplayAlerts = False
-        return excel_app
-    
     @staticmethod
     def check_and_close(file_names: List[str]) -> None:
         """
@@ -186,14 +174,3 @@ class SynchronizedExcelProcessor:
                     logger.info("Excelアプリケーションを強制終了しました。")
                 except Exception as e:
                     logger.error(f"Excelを強制終了する際にエラーが発生しました: {e}")
-
-    def _close_app(self, excel) -> None:
-        """
-        Excelアプリケーションを終了するヘルパー関数。
-        """
-        try:
-            excel.Quit()
-            logger.info("Excelアプリケーションを終了しました。")
-        except Exception as quit_e:
-            logger.warning(f"Excelの終了中にエラーが発生しました。: {quit_e}")
-    
\ No newline at end of file
@@ -0,0 +1,159 @@
+import atexit
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor
+import threading
+from typing import Optional
+
+import pandas as pd
+
+import settings
+from .workbook_cache import HAS_PYARROW
+from .open_case_index import OpenCaseIndex
+
+logger = logging.getLogger(__name__)
+
+# DataFrameの送り方
+ARROW = 'arrow'
+PICKLE = 'pickle'
+
+
+def encode_frame(df: pd.DataFrame) -> tuple:
+    """
+    DataFrameをプロセス間で送るバイト列にする。
+    pyarrowがあればArrow IPC（zstd圧縮、インデックスを含む）、なければpickle。
+    """
+    if HAS_PYARROW:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        sink = pa.BufferOutputStream()
+        options = pa.ipc.IpcWriteOptions(compression='zstd' if pa.Codec.is_available('zstd') else None)
+        with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        return ARROW, sink.getvalue().to_pybytes()
+    return PICKLE, pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_frame(encoded: tuple) -> pd.DataFrame:
+    """encode_frameで作成したバイト列をDataFrameに戻す"""
+    kind, data = encoded
+    if kind == ARROW:
+        import pyarrow as pa
+        return pa.ipc.open_stream(data).read_all().to_pandas()
+    return pickle.loads(data)
+
+
+def encode_payload(result: dict, frame: Optional[pd.DataFrame] = None, index_state: Optional[tuple] = None) -> bytes:
+    """
+    子プロセスの処理結果を1つのバイト列にまとめる。
+
+    Parameters
+    ----------
+    result : dict
+        Processorの処理結果（件数とWaitingCasesなど）。
+    frame : pd.DataFrame, optional
+        CycleDataPlaneに公開するDataFrame（クローズデータ）。
+    index_state : tuple, optional
+        子プロセスで作成した折返し待ちの案件の索引（OpenCaseIndex.state）。
+    """
+    return pickle.dumps({
+        'result': result,
+        'frame': None if frame is None else encode_frame(frame),
+        'index_state': index_state,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def decode_payload(payload: bytes) -> tuple:
+    """encode_payloadで作成したバイト列を(result, frame, index_state)に戻す"""
+    data = pickle.loads(payload)
+    frame = None if data['frame'] is None else decode_frame(data['frame'])
+    return data['result'], frame, data['index_state']
+
+
+def load_and_process(file_path: str) -> bytes:
+    """
+    子プロセスで実行する: 同期済みのファイルを読み込んで処理し、結果をencode_payloadの形式で返す。
+    """
+    from .activity_processor import ActivityProcessor
+    from .close_processor import CloseProcessor
+    from .excel_sync import SynchronizedExcelProcessor
+
+    processor = SynchronizedExcelProcessor.load_file(file_path)
+    if isinstance(processor, CloseProcessor):
+        return encode_payload({}, frame=processor.process())
+    result = SynchronizedExcelProcessor.process_loaded(processor)
+    index_state = processor.open_cases.state() if isinstance(processor, ActivityProcessor) else None
+    return encode_payload(result, index_state=index_state)
+
+
+def process_offloaded(executor: Executor, file_path: str, data_plane=None) -> dict:
+    """
+    ファイルの読込と処理をexecutor（プロセスプール）で実行し、結果を受け取る。
+
+    クローズデータと、活動データで作成された折返し待ちの案件の索引はdata_planeに公開するため、
+    SynchronizedExcelProcessor.process_loadedと同じ結果になる。
+    """
+    result, frame, index_state = decode_payload(executor.submit(load_and_process, file_path).result())
+    if frame is not None and data_plane is not None:
+        data_plane.publish('close', frame)
+    if index_state is not None and data_plane is not None:
+        open_cases = OpenCaseIndex()
+        open_cases.restore(index_state)
+        data_plane.publish('open_cases', open_cases)
+    return result
+
+
+class _ParentLogListener(logging.handlers.QueueListener):
+    """子プロセスのログを、このプロセスの同じ名前のロガーに渡す（ハンドラーと出力先はこのプロセスの設定に従う）"""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        target = logging.getLogger(record.name)
+        if target.isEnabledFor(record.levelno):
+            target.handle(record)
+
+
+def _init_worker_logging(log_queue, level: int) -> None:
+    """子プロセスの初期化: 全てのログをキューで親プロセスに送る"""
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+
+_process_pool = None
+_log_listener = None
+_process_pool_lock = threading.Lock()
+
+
+def _shutdown_process_pool() -> None:
+    if _process_pool is not None:
+        _process_pool.shutdown()
+    if _log_listener is not None:
+        _log_listener.stop()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    読込・処理に使うプロセスプールを返す（プロセス内で共有し、サイクル間で再利用する）。
+    CYCLE_EXECUTION_MODE = 'process'の場合だけ使う（試験的。threadより速いことは確認できていない）。
+    子プロセスはspawnで起動する（Windowsと同じ動作）。
+    spawnした子プロセスにはロギングの設定が引き継がれないため、子プロセスのログ（Processorや
+    read_excel_filteredの警告など）はキューでこのプロセスに送り、このプロセスのログに出力する。
+    """
+    global _process_pool, _log_listener
+    with _process_pool_lock:
+        if _process_pool is None:
+            max_workers = settings.CYCLE_PROCESS_WORKERS or os.cpu_count()
+            context = multiprocessing.get_context('spawn')
+            log_queue = context.Queue()
+            _log_listener = _ParentLogListener(log_queue)
+            _log_listener.start()
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers,
+                                                mp_context=context,
+                                                initializer=_init_worker_logging,
+                                                initargs=(log_queue, logging.getLogger().getEffectiveLevel()))
+            atexit.register(_shutdown_process_pool)
+            logger.debug(f"プロセスプールを作成しました。: {max_workers}プロセス")
+        return _process_pool
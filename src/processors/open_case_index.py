@@ -0,0 +1,192 @@
+import datetime
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+EXCEL_BASE_DATE = datetime.datetime(1899, 12, 30)
+
+# お待たせ件数を集計するグループ（キーの接尾辞: サポート区分）
+WFC_GROUPS = {
+    'ss': 'SS',
+    'tvs': 'TVS',
+    'kmn': '顧問先',
+    'hhd': 'HHD',
+}
+
+# お待たせ時間のしきい値（分: シリアル値）
+WFC_THRESHOLDS = {
+    20: settings.SERIAL_20_MINUTES,
+    30: settings.SERIAL_30_MINUTES,
+    40: settings.SERIAL_40_MINUTES,
+    60: settings.SERIAL_60_MINUTES,
+}
+
+
+def now_serial() -> float:
+    """現在日時をシリアル値に変換する"""
+    return (datetime.datetime.now() - EXCEL_BASE_DATE).total_seconds() / (24 * 60 * 60)
+
+
+class WaitingCases:
+    def __init__(self, cases: np.ndarray, cuts: dict) -> None:
+        """
+        1グループ分のお待たせ案件。
+
+        over60 ⊆ over40 ⊆ over30 ⊆ over20 であるため、案件番号をお待たせ時間の長い順に1つの配列に持ち、
+        しきい値ごとには配列の先頭からの件数（カット位置）だけを持つ。
+        しきい値ごとのリストは配列のスライス（コピーなし）、件数はカット位置そのものになる。
+
+        Parameters
+        ----------
+        cases : np.ndarray
+            お待たせ時間の長い順に並べた案件番号。
+        cuts : dict
+            しきい値（分）をキーとした、お待たせ時間がしきい値以上の案件数。
+        """
+        self.cases = cases
+        self.cuts = cuts
+
+    def over(self, minutes: int) -> np.ndarray:
+        """お待たせ時間がしきい値以上の案件番号を返す（配列のビュー）"""
+        return self.cases[:self.cuts[minutes]]
+
+    def count(self, minutes: int) -> int:
+        """お待たせ時間がしきい値以上の案件数を返す"""
+        return self.cuts[minutes]
+
+    def __len__(self) -> int:
+        return len(self.cases)
+
+    def __repr__(self) -> str:
+        return f"WaitingCases({', '.join(f'over{m}={n}' for m, n in self.cuts.items())})"
+
+
+class OpenCaseIndex:
+    def __init__(self) -> None:
+        """
+        折返し待ちの案件（【受付】の活動しかない対応中・対応待ちの案件）の索引。
+
+        グループごとに案件番号を登録日時（シリアル値）の昇順に並べて保持する。
+        お待たせ時間がしきい値以上の案件は「登録日時 <= 現在 - しきい値」の先頭部分になるため、
+        二分探索だけで件数とリストを返せる。Excelの同期ごとにupdateで置き換え、
+        その間は現在時刻を変えて何度でも問い合わせられる。
+        """
+        self.date = None
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def update(self, df: pd.DataFrame, date: datetime.date) -> None:
+        """
+        索引を作り直す。
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            案件ごとに1行の折返し待ちの案件。
+        date : datetime.date
+            集計日。日付が変わると索引の案件は集計対象外になる。
+        """
+        groups = {}
+        for key, support_type in WFC_GROUPS.items():
+            rows = df[df['サポート区分 (関連) (サポート案件)'] == support_type]
+            registered = rows['登録日時 (関連) (サポート案件)'].to_numpy(dtype=np.float64)
+            order = np.argsort(registered, kind='stable')
+            groups[key] = (registered[order], rows['案件番号 (関連) (サポート案件)'].to_numpy()[order])
+
+        with self._lock:
+            self.date = date
+            self._groups = groups
+        logger.debug(f"折返し待ちの案件の索引を更新しました。: {({k: len(v[1]) for k, v in groups.items()})}")
+
+    def _snapshot(self) -> tuple:
+        with self._lock:
+            return self.date, self._groups
+
+    def state(self) -> tuple:
+        """索引の内容（集計日, グループごとの配列）を返す。別プロセスで作成した索引を受け渡すために使う"""
+        return self._snapshot()
+
+    def restore(self, state: tuple) -> None:
+        """stateで取得した内容で索引を置き換える"""
+        date, groups = state
+        with self._lock:
+            self.date = date
+            self._groups = groups
+
+    @staticmethod
+    def _cut(registered: np.ndarray, minutes: int, current_serial: float) -> int:
+        """
+        お待たせ時間がしきい値以上（現在 - 登録日時 >= しきい値）の案件の件数（先頭からの位置）を返す。
+        二分探索の「登録日時 <= 現在 - しきい値」は丸め誤差でしきい値ちょうどの案件の判定が変わることがあるため、
+        境界の前後だけ元の式で補正する。
+        """
+        threshold = WFC_THRESHOLDS[minutes]
+        position = int(np.searchsorted(registered, current_serial - threshold, side='right'))
+        while position > 0 and not current_serial - registered[position - 1] >= threshold:
+            position -= 1
+        while position < len(registered) and current_serial - registered[position] >= threshold:
+            position += 1
+        return position
+
+    @staticmethod
+    def _is_expired(date: Optional[datetime.date], current_serial: float) -> bool:
+        if date is None:
+            return True
+        date_serial = (datetime.datetime.combine(date, datetime.time.min) - EXCEL_BASE_DATE).days
+        return current_serial >= date_serial + 1
+
+    def waiting(self, group: str, current_serial: Optional[float] = None) -> WaitingCases:
+        """
+        お待たせ時間が最小のしきい値（20分）以上の案件を、しきい値ごとのカット位置とともに返す。
+
+        Parameters
+        ----------
+        group : str
+            WFC_GROUPSのキー。'ss', 'tvs', 'kmn', 'hhd'
+        current_serial : float, optional
+            現在日時のシリアル値。省略時は現在時刻。
+
+        Returns
+        -------
+        WaitingCases
+        """
+        current_serial = now_serial() if current_serial is None else current_serial
+        date, groups = self._snapshot()
+        if group not in WFC_GROUPS:
+            raise ValueError(f"グループが存在しません。: {group}")
+        registered, cases = groups.get(group, (np.empty(0), np.empty(0, dtype=object)))
+        if self._is_expired(date, current_serial):
+            registered, cases = registered[:0], cases[:0]
+        cuts = {minutes: self._cut(registered, minutes, current_serial) for minutes in WFC_THRESHOLDS}
+        return WaitingCases(cases[:max(cuts.values(), default=0)], cuts)
+
+    def waiting_cases(self, group: str, minutes: int, current_serial: Optional[float] = None) -> np.ndarray:
+        """お待たせ時間がしきい値以上の案件番号を、お待たせ時間の長い順に返す"""
+        return self.waiting(group, current_serial).over(minutes)
+
+    def count(self, group: str, minutes: int, current_serial: Optional[float] = None) -> int:
+        """お待たせ時間がしきい値以上の案件数を返す"""
+        return self.waiting(group, current_serial).count(minutes)
+
+    def wfc_result(self, current_serial: Optional[float] = None) -> dict:
+        """
+        ActivityProcessor.waiting_for_callbackと同じ形式（'wfc_ss'などのキーにグループごとのWaitingCases）で返す。
+        しきい値ごとの件数・リストはWaitingCases.count/overで取り出す。
+        """
+        current_serial = now_serial() if current_serial is None else current_serial
+        return {f'wfc_{group}': self.waiting(group, current_serial) for group in WFC_GROUPS}
+
+
+_open_case_index = OpenCaseIndex()
+
+
+def get_open_case_index() -> OpenCaseIndex:
+    """プロセス内で共有するOpenCaseIndexを返す"""
+    return _open_case_index
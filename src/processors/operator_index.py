@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+
+import pandas as pd
+
+import settings
+from .workbook_cache import read_excel_cached
+
+logger = logging.getLogger(__name__)
+
+# 名前を引く列: 種類 -> (operators.xlsxの列名, 警告に使う表示名)
+IDENTITY_COLUMNS = {
+    'sweet': ('Sweet', 'OperatorsファイルのSweetカラム'),
+    'ctstage': ('CTStage', 'OperatorsファイルのCTStageカラム'),
+}
+
+
+class OperatorIdentityIndex:
+    def __init__(self, df_operators: pd.DataFrame) -> None:
+        """
+        Sweet・CTStageの名前から氏名を引くための索引。
+
+        名前の配列をまとめて1回の索引検索（get_indexer）で氏名に置き換え、
+        見つからなかった名前は1件の警告にまとめて報告する。
+        同じ名前が複数行にある場合は最後の行の氏名を使う。
+
+        Parameters
+        ----------
+        df_operators : pd.DataFrame
+            operators.xlsxのデータ。'氏名', 'Sweet', 'CTStage'列を持つ。
+        """
+        self.df_operators = df_operators
+        self._lookups = {}
+        for kind, (column, _) in IDENTITY_COLUMNS.items():
+            rows = df_operators.dropna(subset=[column]).drop_duplicates(subset=column, keep='last')
+            self._lookups[kind] = (pd.Index(rows[column]), rows['氏名'].to_numpy(dtype=object))
+
+    def resolve(self, names: pd.Index, kind: str) -> tuple:
+        """
+        名前の配列を氏名に置き換える。見つからない名前はそのまま残す。
+
+        Parameters
+        ----------
+        names : pd.Index
+            Sweetの名前、またはCTStageのオペレーター名の配列。
+        kind : str
+            'sweet' or 'ctstage'
+
+        Returns
+        -------
+        tuple
+            (氏名に置き換えたpd.Index, 見つからなかった名前のリスト)
+        """
+        if kind not in self._lookups:
+            raise ValueError(f"名前の種類が存在しません。: {kind}")
+        keys, full_names = self._lookups[kind]
+        names = pd.Index(names)
+        positions = keys.get_indexer(names)
+        matched = positions >= 0
+        resolved = names.to_numpy(dtype=object).copy()
+        resolved[matched] = full_names[positions[matched]]
+        unmatched = list(dict.fromkeys(names[~matched]))
+        return pd.Index(resolved, name=names.name), unmatched
+
+    def resolve_index(self, df: pd.DataFrame, kind: str) -> tuple:
+        """
+        DataFrameのインデックスを氏名に置き換えたコピーを返す。
+        見つからなかった名前がある場合は1件の警告にまとめて出力する。
+
+        Returns
+        -------
+        tuple
+            (インデックスを置き換えたpd.DataFrame, 見つからなかった名前のリスト)
+        """
+        index, unmatched = self.resolve(df.index, kind)
+        if unmatched:
+            logger.warning(f"{IDENTITY_COLUMNS[kind][1]}に存在しない名前が{len(unmatched)}件あります。: {unmatched}")
+        df = df.copy()
+        df.index = index
+        return df, unmatched
+
+
+_operator_index = None
+_operator_index_identity = None
+_operator_index_lock = threading.Lock()
+
+
+def get_operator_index(file_path: str = settings.OPERATORS_FILE) -> OperatorIdentityIndex:
+    """
+    operators.xlsxから作成した索引を返す。ファイルのパス・更新日時・サイズが前回と同じ場合は作り直さない。
+    """
+    global _operator_index, _operator_index_identity
+    stat = os.stat(file_path)
+    identity = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _operator_index_lock:
+        if _operator_index is None or _operator_index_identity != identity:
+            df_operators = read_excel_cached(file_path, name='operators')
+            _operator_index = OperatorIdentityIndex(df_operators)
+            _operator_index_identity = identity
+            logger.debug(f"オペレーターの索引を作成しました。: {df_operators.shape[0]}人")
+        return _operator_index
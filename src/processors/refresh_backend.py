@@ -0,0 +1,395 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+# ExcelのXlCalculationState.xlDone
+XL_DONE = 0
+# ExcelのXlListObjectSourceType.xlSrcQuery
+XL_SRC_QUERY = 3
+# ExcelのXlConnectionType（OLEDB, ODBC）
+XL_CONNECTION_TYPE_OLEDB = 1
+XL_CONNECTION_TYPE_ODBC = 2
+
+# FileRefreshBackendが読む設定ファイルの接尾辞（<ブック>.refresh.json）
+FAKE_SPEC_SUFFIX = '.refresh.json'
+
+
+class RefreshBackend:
+    """
+    ワークブックの更新（外部データの再取得）を行うバックエンドのインターフェース。
+    1つのインスタンスは1つのスレッド・1つのアプリケーションで使う。
+    """
+
+    def start(self) -> None:
+        """アプリケーションを起動する"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def open(self, file_path: str):
+        """ワークブックを開いて返す"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def refresh(self, workbook) -> None:
+        """更新を開始する（完了は待たない）"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def is_refreshing(self, workbook) -> bool:
+        """更新・再計算が完了していない場合はTrue"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def save(self, workbook) -> None:
+        """ワークブックを保存する"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def close(self, workbook) -> None:
+        """ワークブックを保存せずに閉じる（エラーは無視する）"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def is_alive(self) -> bool:
+        """アプリケーションが応答する場合はTrue"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    def restart(self) -> None:
+        """アプリケーションを起動し直す"""
+        self.stop()
+        self.start()
+
+    def stop(self) -> None:
+        """アプリケーションを終了する"""
+        raise NotImplementedError("Subclasses should implement this method.")
+
+
+class ComRefreshBackend(RefreshBackend):
+    def __init__(self) -> None:
+        """
+        Excel（COM）でワークブックを更新するバックエンド。
+        pywin32はstartで読み込むため、Windows以外でもモジュールはimportできる。
+        """
+        self.app = None
+        self._pythoncom = None
+
+    def start(self) -> None:
+        import pythoncom  # COM初期化に必要
+
+        self._pythoncom = pythoncom
+        pythoncom.CoInitializeEx(pythoncom.COINIT_APARTMENTTHREADED)
+        logger.debug("COMライブラリを初期化しました。")
+        self._start_app()
+
+    def open(self, file_path: str):
+        return self.app.Workbooks.Open(file_path)
+
+    def refresh(self, workbook) -> None:
+        workbook.RefreshAll()
+
+    def is_refreshing(self, workbook) -> bool:
+        if self.app.CalculationState != XL_DONE:
+            return True
+        for sheet in workbook.Worksheets:
+            for query_table in sheet.QueryTables:
+                if query_table.Refreshing:
+                    return True
+            for list_object in sheet.ListObjects:
+                if list_object.SourceType == XL_SRC_QUERY and list_object.QueryTable.Refreshing:
+                    return True
+        for connection in workbook.Connections:
+            if connection.Type == XL_CONNECTION_TYPE_OLEDB and connection.OLEDBConnection.Refreshing:
+                return True
+            if connection.Type == XL_CONNECTION_TYPE_ODBC and connection.ODBCConnection.Refreshing:
+                return True
+        return False
+
+    def save(self, workbook) -> None:
+        workbook.Save()
+
+    def close(self, workbook) -> None:
+        try:
+            workbook.Close(SaveChanges=False)
+        except Exception as e:
+            logger.warning(f"ワークブックを閉じる際にエラーが発生しました。: {e}")
+
+    def is_alive(self) -> bool:
+        try:
+            self.app.Visible
+            return True
+        except Exception:
+            return False
+
+    def restart(self) -> None:
+        # COMライブラリは初期化したまま、Excelだけを起動し直す
+        self._quit()
+        self._start_app()
+
+    def _start_app(self) -> None:
+        import win32com.client
+
+        logger.info("Excelアプリケーションを起動します。")
+        self.app = win32com.client.DispatchEx("Excel.Application")
+        self.app.Visible = False
+        self.app.DisplayAlerts = False
+
+    def _quit(self) -> None:
+        if self.app is None:
+            return
+        try:
+            self.app.Quit()
+            logger.info("Excelアプリケーションを終了しました。")
+        except Exception as e:
+            logger.warning(f"Excelの終了中にエラーが発生しました。: {e}")
+        self.app = None
+
+    def stop(self) -> None:
+        self._quit()
+        if self._pythoncom is not None:
+            self._pythoncom.CoUninitialize()
+            self._pythoncom = None
+            logger.debug("COMライブラリを終了しました。")
+
+
+class FakeWorkbook:
+    def __init__(self, file_path: str, duration: float) -> None:
+        self.file_path = file_path
+        self.duration = duration
+        self.started = None
+
+
+class FileRefreshBackend(RefreshBackend):
+    def __init__(self, duration: float = 1.0, failures: int = 0) -> None:
+        """
+        Excelを使わずにファイルだけで更新を模擬するバックエンド（Linuxでのテスト・ベンチマーク用）。
+
+        更新はduration秒後に完了し、保存ではファイルの更新日時だけを変える。
+        ブックごとの動作は <ブック>.refresh.json（{"duration": 秒, "failures": 失敗する回数}）で上書きできる。
+        failuresの回数だけ、そのブックの更新の開始が失敗する。
+
+        Parameters
+        ----------
+        duration : float
+            更新にかかる時間（秒）。
+        failures : int
+            ブックごとに更新が失敗する回数。
+        """
+        self.duration = duration
+        self.failures = failures
+        self.running = False
+        self.starts = 0
+        self.attempts = {}
+        self.saved = []
+
+    def _spec(self, file_path: str) -> dict:
+        spec = {'duration': self.duration, 'failures': self.failures}
+        spec_path = f"{file_path}{FAKE_SPEC_SUFFIX}"
+        if os.path.exists(spec_path):
+            with open(spec_path, encoding='utf-8') as f:
+                spec.update(json.load(f))
+        return spec
+
+    def start(self) -> None:
+        self.running = True
+        self.starts += 1
+
+    def open(self, file_path: str) -> FakeWorkbook:
+        if not self.running:
+            raise RuntimeError("アプリケーションが起動していません。")
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(file_path)
+        return FakeWorkbook(file_path, float(self._spec(file_path)['duration']))
+
+    def refresh(self, workbook: FakeWorkbook) -> None:
+        attempt = self.attempts.get(workbook.file_path, 0) + 1
+        self.attempts[workbook.file_path] = attempt
+        if attempt <= int(self._spec(workbook.file_path)['failures']):
+            raise RuntimeError(f"更新に失敗しました（疑似エラー、{attempt}回目）。")
+        workbook.started = time.monotonic()
+
+    def is_refreshing(self, workbook: FakeWorkbook) -> bool:
+        return time.monotonic() - workbook.started < workbook.duration
+
+    def save(self, workbook: FakeWorkbook) -> None:
+        os.utime(workbook.file_path)
+        self.saved.append(workbook.file_path)
+
+    def close(self, workbook: FakeWorkbook) -> None:
+        pass
+
+    def is_alive(self) -> bool:
+        return self.running
+
+    def stop(self) -> None:
+        self.running = False
+
+
+def create_refresh_backend() -> RefreshBackend:
+    """settings.REFRESH_BACKENDに応じてバックエンドを作成する"""
+    if settings.REFRESH_BACKEND == 'com':
+        return ComRefreshBackend()
+    if settings.REFRESH_BACKEND == 'file':
+        return FileRefreshBackend()
+    raise ValueError(f"REFRESH_BACKENDが不正です。: {settings.REFRESH_BACKEND}")
+
+
+class AdaptiveTimeout:
+    def __init__(self,
+                 minimum: float = settings.REFRESH_TIMEOUT_MIN,
+                 maximum: float = settings.REFRESH_TIMEOUT_MAX,
+                 factor: float = settings.REFRESH_TIMEOUT_FACTOR,
+                 smoothing: float = 0.3) -> None:
+        """
+        ブックごとの更新時間の指数移動平均から更新待ちのタイムアウトを決める。
+
+        タイムアウトは 平均 × factor を[minimum, maximum]に収めた値で、履歴がないブックはmaximum。
+        タイムアウトした場合は平均をそのタイムアウトまで引き上げ、次の試行では待ち時間を延ばす。
+
+        Parameters
+        ----------
+        minimum : float
+            タイムアウトの最小値（秒）。
+        maximum : float
+            タイムアウトの最大値（秒）。
+        factor : float
+            平均の何倍まで待つか。
+        smoothing : float
+            指数移動平均の重み（新しい値の比率）。
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.smoothing = smoothing
+        self._averages = {}
+        self._lock = threading.Lock()
+
+    def timeout(self, key: str) -> float:
+        with self._lock:
+            average = self._averages.get(key)
+        if average is None:
+            return self.maximum
+        return min(self.maximum, max(self.minimum, average * self.factor))
+
+    def average(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._averages.get(key)
+
+    def record(self, key: str, duration: float) -> None:
+        """更新にかかった時間を記録する"""
+        with self._lock:
+            average = self._averages.get(key)
+            self._averages[key] = duration if average is None else average + self.smoothing * (duration - average)
+
+    def record_timeout(self, key: str, timeout: float) -> None:
+        """タイムアウトしたことを記録する（平均をタイムアウトまで引き上げる）"""
+        with self._lock:
+            self._averages[key] = max(self._averages.get(key, 0.0), timeout)
+
+
+class RefreshEngine:
+    def __init__(self,
+                 backend: RefreshBackend,
+                 poll_interval: float = settings.REFRESH_INTERVAL,
+                 max_retries: int = settings.SYNC_MAX_RETRIES,
+                 retry_delay: float = settings.SYNC_RETRY_DELAY,
+                 timeouts: Optional[AdaptiveTimeout] = None) -> None:
+        """
+        ワークブックを開いて更新し、完了を確認してから保存する。
+
+        更新の開始後は固定時間待つのではなく、poll_interval秒ごとにバックエンドの更新状態
+        （CalculationState・クエリの更新中フラグ）を確認し、完了した時点で保存する。
+        失敗した場合は同じアプリケーションで再試行し、アプリケーションが応答しない場合だけ起動し直す。
+
+        Parameters
+        ----------
+        backend : RefreshBackend
+            更新を行うバックエンド。
+        poll_interval : float
+            更新状態を確認する間隔（秒）。
+        max_retries : int
+            最大試行回数。
+        retry_delay : float
+            再試行までの待機時間（秒）。
+        timeouts : AdaptiveTimeout, optional
+            更新待ちのタイムアウト。省略時はプロセス内で共有するもの。
+        """
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeouts = timeouts or get_refresh_timeouts()
+        self.durations = []
+
+    def sync(self, file_path: str, stop_event: threading.Event) -> bool:
+        """
+        ワークブックを更新して保存する。
+
+        Returns
+        -------
+        bool
+            保存まで完了した場合はTrue。
+        """
+        self.backend.start()
+        try:
+            logger.info(f"{file_path}の同期を開始します。")
+            for attempt in range(1, self.max_retries + 1):
+                if stop_event.is_set():
+                    logger.info(f"{file_path}の処理が停止されました。")
+                    return False
+                workbook = None
+                try:
+                    workbook = self.backend.open(file_path)
+                    logger.debug("ワークブックを開きました。")
+                    duration = self._refresh(file_path, workbook, stop_event)
+                    self.backend.save(workbook)
+                    logger.debug("ワークブックを保存しました。")
+                    self.backend.close(workbook)
+                    self.durations.append(duration)
+                    logger.info(f"{file_path}の同期が完了しました。（更新: {duration:.2f} 秒）")
+                    return True
+                except Exception as e:
+                    logger.info(f"{file_path}の同期中にエラーが発生しました。（{attempt}回目）: {e}")
+                    if workbook is not None:
+                        self.backend.close(workbook)
+                    if attempt >= self.max_retries or stop_event.is_set():
+                        break
+                    if not self.backend.is_alive():
+                        logger.info("アプリケーションが応答しないため起動し直します。")
+                        self.backend.restart()
+                    logger.info(f"{file_path}の同期を再試行します。")
+                    stop_event.wait(self.retry_delay)
+            logger.error(f"{file_path}の同期に失敗しました。最大リトライ回数に達しました。")
+            return False
+        finally:
+            self.backend.stop()
+
+    def _refresh(self, file_path: str, workbook, stop_event: threading.Event) -> float:
+        """更新を開始して完了まで待ち、更新にかかった時間（秒）を返す"""
+        timeout = self.timeouts.timeout(file_path)
+        started = time.monotonic()
+        self.backend.refresh(workbook)
+        logger.debug(f"ワークブックを更新しています。（タイムアウト: {timeout:.1f} 秒）")
+        while self.backend.is_refreshing(workbook):
+            elapsed = time.monotonic() - started
+            if elapsed >= timeout:
+                self.timeouts.record_timeout(file_path, timeout)
+                raise TimeoutError(f"更新が{timeout:.1f}秒以内に完了しませんでした。")
+            if stop_event.wait(min(self.poll_interval, timeout - elapsed)):
+                raise RuntimeError("停止信号を受け取りました。")
+        duration = time.monotonic() - started
+        self.timeouts.record(file_path, duration)
+        return duration
+
+
+_refresh_timeouts = None
+_refresh_timeouts_lock = threading.Lock()
+
+
+def get_refresh_timeouts() -> AdaptiveTimeout:
+    """プロセス内で共有するAdaptiveTimeoutを返す（更新時間の履歴をサイクル間で引き継ぐ）"""
+    global _refresh_timeouts
+    with _refresh_timeouts_lock:
+        if _refresh_timeouts is None:
+            _refresh_timeouts = AdaptiveTimeout()
+        return _refresh_timeouts
@@ -1,7 +1,6 @@
 import pandas as pd
-import settings
 import datetime
-from src.processors.base import BaseProcessor
+from src.processors.shift_schedule import load_shift_schedule, shift_schedule_path
 
 import logging
 
@@ -10,18 +9,21 @@ logger = logging.getLogger(__name__)
 
 class ShiftProcessor:
     def __init__(self,
-                 df_operators: pd.DataFrame,
-                 file_path: str = settings.SHIFT_SCHEDULE):
-        self.sweet_to_name = df_operators.set_index('Sweet')['氏名'].to_dict()
-        self.ctstage_to_name = df_operators.set_index('CTStage')['氏名'].to_dict()
-        self.df = pd.read_csv(file_path, skiprows=2, header=1, index_col=1, quotechar='"', encoding='shift_jis')
+                 file_path: str = None,
+                 date: datetime.date = None):
+        # 対象日（省略時は今日）。file_pathを省略した場合はこの日の月のシフト表を使う
+        self.date = date or datetime.date.today()
+        # 月間シフト表はファイルが変更された場合だけ読み込み、日×オペレーターの配列に変換して再利用する
+        self.schedule = load_shift_schedule(file_path or shift_schedule_path(self.date))
 
-    def process(self) -> dict:
-        date_str = datetime.date.today().strftime("%d")
-        df = self.df.iloc[:, :-1]
-        # "組織名"、"従業員ID"、"種別" の列を削除
-        df = df.drop(columns=["組織名", "従業員ID", "種別"])
-        df_shift = df[[date_str]]
-        df_shift.columns = ["シフト"]
-        
-        return df_shift
+    def process(self) -> pd.DataFrame:
+        """
+        対象日のシフトを返す。
+
+        Returns
+        -------
+        pd.DataFrame
+            インデックスがSweetの名前、列が'シフト'のDataFrame。
+        """
+        date_str = self.date.strftime("%d")
+        return self.schedule.day_frame(date_str)
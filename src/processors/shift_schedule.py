@@ -0,0 +1,205 @@
+import datetime
+import hashlib
+import logging
+import os
+import pickle
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+# シフトの文字列から開始・終了時刻を取り出す（例: '9:00-18:00', '09:00～18:00'）
+SHIFT_INTERVAL_PATTERN = re.compile(r'(\d{1,2}):(\d{2})\s*[-~～〜]\s*(\d{1,2}):(\d{2})')
+
+# 日付以外の列
+NON_DAY_COLUMNS = ["組織名", "従業員ID", "種別"]
+
+NO_SHIFT = -1
+
+# ディスクのキャッシュ（WORKBOOK_CACHE_DIR）のファイル名の接頭辞
+CACHE_PREFIX = 'shift_'
+# プロセス内とディスクに保持するシフト表のファイル数（月をまたぐ処理のため、今月と前月）
+MAX_CACHED_SCHEDULES = 2
+
+
+def parse_shift_interval(value) -> tuple:
+    """
+    シフトの文字列を(開始, 終了)の0時からの分に変換する。時刻がない場合（休みなど）は(-1, -1)。
+    終了が開始より前の場合は日をまたぐシフトとして終了に24時間を加える。
+    """
+    if not isinstance(value, str):
+        return NO_SHIFT, NO_SHIFT
+    match = SHIFT_INTERVAL_PATTERN.search(unicodedata.normalize('NFKC', value))
+    if match is None:
+        return NO_SHIFT, NO_SHIFT
+    start_h, start_m, end_h, end_m = (int(g) for g in match.groups())
+    start = start_h * 60 + start_m
+    end = end_h * 60 + end_m
+    if end <= start:
+        end += 24 * 60
+    return start, end
+
+
+class CompiledShiftSchedule:
+    def __init__(self, operators: pd.Index, days: list, labels: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> None:
+        """
+        月間シフト表を日×オペレーターの配列にしたもの。
+
+        Parameters
+        ----------
+        operators : pd.Index
+            オペレーター名（シフト表の2列目）。
+        days : list
+            日付の列名（'01'など）。
+        labels : np.ndarray
+            日×オペレーターのシフトの文字列。
+        starts : np.ndarray
+            日×オペレーターのシフト開始（0時からの分、int16）。シフトがない場合は-1。
+        ends : np.ndarray
+            日×オペレーターのシフト終了（0時からの分、int16）。シフトがない場合は-1。
+        """
+        self.operators = operators
+        self.days = list(days)
+        self.labels = labels
+        self.starts = starts
+        self.ends = ends
+        self._day_positions = {day: i for i, day in enumerate(self.days)}
+
+    @classmethod
+    def from_csv(cls, file_path: str) -> 'CompiledShiftSchedule':
+        """Shift-JISの *_Campaign_ScheduleList.csv を読み込んで変換する"""
+        df = pd.read_csv(file_path, skiprows=2, header=1, index_col=1, quotechar='"', encoding='shift_jis')
+        df = df.iloc[:, :-1].drop(columns=NON_DAY_COLUMNS)
+        labels = df.to_numpy(dtype=object).T
+        parsed = {}
+        starts = np.full(labels.shape, NO_SHIFT, dtype=np.int16)
+        ends = np.full(labels.shape, NO_SHIFT, dtype=np.int16)
+        for (d, o), value in np.ndenumerate(labels):
+            if value not in parsed:
+                parsed[value] = parse_shift_interval(value)
+            starts[d, o], ends[d, o] = parsed[value]
+        return cls(df.index, [str(c) for c in df.columns], labels, starts, ends)
+
+    def _position(self, day: str) -> int:
+        if day not in self._day_positions:
+            raise KeyError(f"シフト表に日付の列が存在しません。: {day}")
+        return self._day_positions[day]
+
+    def day_frame(self, day: str) -> pd.DataFrame:
+        """指定日のシフトをShiftProcessor.processと同じ形式（'シフト'列のDataFrame）で返す"""
+        return pd.DataFrame({"シフト": self.labels[self._position(day)]}, index=self.operators)
+
+    def intervals(self, day: str) -> tuple:
+        """指定日の(開始, 終了)の配列を返す（コピーしないビュー）"""
+        position = self._position(day)
+        return self.starts[position], self.ends[position]
+
+    def on_shift(self, day: str, minute: int) -> np.ndarray:
+        """指定日の指定時刻（0時からの分）にシフトに入っているオペレーターのマスクを返す"""
+        starts, ends = self.intervals(day)
+        return (starts != NO_SHIFT) & (starts <= minute) & (minute < ends)
+
+    def staffing(self, day: str, step: int = 30) -> pd.Series:
+        """指定日のstep分ごとのシフト人数を返す（前日から日をまたぐシフトは含まない）"""
+        starts, ends = self.intervals(day)
+        minutes = np.arange(0, 24 * 60, step)
+        working = starts != NO_SHIFT
+        counts = ((starts[working, None] <= minutes) & (minutes < ends[working, None])).sum(axis=0)
+        return pd.Series(counts, index=pd.Index(minutes, name='分'), name='シフト人数')
+
+
+_schedules = {}
+_schedules_lock = threading.Lock()
+
+
+def _file_identity(file_path: str) -> tuple:
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size
+
+
+def _cache_path(identity: tuple) -> str:
+    key = hashlib.sha1(repr(identity).encode('utf-8')).hexdigest()
+    return os.path.join(settings.WORKBOOK_CACHE_DIR, f"{CACHE_PREFIX}{key}.pkl")
+
+
+def _remove_stale_caches(keep: set) -> None:
+    """ディスクのキャッシュのうち、keep以外（更新前の版や、使わなくなった月のシフト表）を削除する"""
+    try:
+        names = os.listdir(settings.WORKBOOK_CACHE_DIR)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(settings.WORKBOOK_CACHE_DIR, name)
+        if name.startswith(CACHE_PREFIX) and name.endswith('.pkl') and path not in keep:
+            try:
+                os.remove(path)
+                logger.debug(f"シフト表の古いキャッシュを削除しました。: {path}")
+            except OSError:
+                pass
+
+
+def shift_schedule_path(date: datetime.date = None) -> str:
+    """dateの月（省略時は今日）の月間シフト表のパス"""
+    date = date or datetime.date.today()
+    return os.path.join(settings.SHIFT_SCHEDULE_DIR, date.strftime(settings.SHIFT_SCHEDULE_NAME_FORMAT))
+
+
+def load_shift_schedule(file_path: str = None) -> CompiledShiftSchedule:
+    """
+    月間シフト表を変換したものを返す。ファイルのパス・更新日時・サイズが変わらない間は、
+    プロセス内のキャッシュ、またはディスクのキャッシュ（WORKBOOK_CACHE_DIR）を使い、CSVを読み直さない。
+    キャッシュは最近読み込んだMAX_CACHED_SCHEDULES個のファイルの最新の版だけを残す。
+    file_pathを省略した場合は今月のシフト表を読み込む。
+    """
+    file_path = file_path or shift_schedule_path()
+    identity = _file_identity(file_path)
+    with _schedules_lock:
+        schedule = _schedules.get(identity)
+    if schedule is not None:
+        with _schedules_lock:
+            # 最近使ったものを末尾に移す（削除は先頭から）
+            _schedules[identity] = _schedules.pop(identity, schedule)
+        return schedule
+
+    cache_path = _cache_path(identity)
+    schedule = None
+    if settings.WORKBOOK_CACHE_ENABLED and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                schedule = pickle.load(f)
+            logger.debug(f"シフト表をキャッシュから読み込みました。: {file_path}")
+        except Exception as e:
+            logger.warning(f"シフト表のキャッシュの読み込みに失敗しました。: {e}")
+            schedule = None
+
+    stored = False
+    if schedule is None:
+        schedule = CompiledShiftSchedule.from_csv(file_path)
+        logger.debug(f"シフト表を変換しました。: {file_path}（{len(schedule.days)}日 × {len(schedule.operators)}人）")
+        if settings.WORKBOOK_CACHE_ENABLED:
+            try:
+                os.makedirs(settings.WORKBOOK_CACHE_DIR, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(schedule, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+                stored = True
+            except Exception as e:
+                logger.warning(f"シフト表のキャッシュの保存に失敗しました。: {e}")
+
+    with _schedules_lock:
+        for key in [k for k in _schedules if k[0] == identity[0]]:
+            del _schedules[key]
+        _schedules[identity] = schedule
+        while len(_schedules) > MAX_CACHED_SCHEDULES:
+            del _schedules[next(iter(_schedules))]
+        keep = {_cache_path(key) for key in _schedules}
+    if stored:
+        _remove_stale_caches(keep)
+    return schedule
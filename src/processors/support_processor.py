@@ -1,4 +1,5 @@
 from .base import BaseProcessor
+import numpy as np
 import pandas as pd
 import datetime
 import settings
@@ -6,7 +7,38 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 直受け・留守電の件数に含めない顛末コード
+EXCLUDED_OUTCOMES = ['折返し不要・ｷｬﾝｾﾙ', 'ﾒｰﾙ・FAX回答（送信）', 'SRB投稿（要望）', 'ﾒｰﾙ・FAX文書（受信）']
+
+# 直受けとする受付タイプ
+DIRECT_RECEPTION_TYPES = ['直受け', 'HHD入電（直受け）']
+
+# 件数を集計するグループ（キーの接尾辞: サポート区分）
+SUPPORT_GROUPS = {
+    'ss': 'SS',
+    'tvs': 'TVS',
+    'kmn': '顧問先',
+    'hhd': 'HHD',
+}
+
+# 案件の分類
+CATEGORIES = ['direct', 'ivr', 'excluded']
+
+
+def category_codes(series: pd.Series, categories: list) -> np.ndarray:
+    """
+    列を因子化し、行ごとに値のcategoriesでの位置を返す。categoriesにない値と空欄は-1。
+    文字列の比較は重複を除いた値に対してだけ行う。
+    """
+    codes, uniques = pd.factorize(series)
+    lookup = np.append(pd.Index(categories).get_indexer(uniques), -1)
+    return lookup[codes]
+
+
 class SupportProcessor(BaseProcessor):
+    USECOLS = ['登録日時', '受付タイプ', '顛末コード', 'かんたん！保守区分', '回答タイプ', 'サポート区分']
+    DATE_COLUMN = '登録日時'
+
     def process(self) -> dict:
         """
         Supportファイルのデータを指定された条件でフィルタリングおよび整形します。
@@ -19,42 +51,18 @@ class SupportProcessor(BaseProcessor):
         result = {}
 
         try:
-            base_df = self.df.fillna('') # これを入れないとdf['かんたん！保守区分'] == ''が上手く判定されない
-            
             # 日付範囲でフィルタリング
             start_date = datetime.date.today()
             end_date = datetime.date.today()
             
             # start_dateからend_dateの範囲のデータを抽出
-            base_df = self.filtered_by_date_range(base_df, '登録日時', start_date, end_date)
-
-            # 直受けの検索条件
-            df = base_df.copy()
-            df = df[
-                ((df['受付タイプ'] == '直受け') | (df['受付タイプ'] == 'HHD入電（直受け）')) & 
-                (~df['顛末コード'].isin(['折返し不要・ｷｬﾝｾﾙ', 'ﾒｰﾙ・FAX回答（送信）', 'SRB投稿（要望）', 'ﾒｰﾙ・FAX文書（受信）'])) &
-                ((df['かんたん！保守区分'] == '会員') | (df['かんたん！保守区分'] == '')) &
-                (df['回答タイプ'] != '2次T転送')
-                ]
-            
-            # グループ別に分割
-            result['direct_ss'] = df[df['サポート区分'] == 'SS'].shape[0]
-            result['direct_tvs'] = df[df['サポート区分'] == 'TVS'].shape[0]
-            result['direct_kmn'] = df[df['サポート区分'] == '顧問先'].shape[0]
-            result['direct_hhd'] = df[df['サポート区分'] == 'HHD'].shape[0]
-
-            # 留守電数の検索条件
-            df = base_df.copy()
-            df = df[
-                (df['受付タイプ'] == '留守電') & 
-                (~df['顛末コード'].isin(['折返し不要・ｷｬﾝｾﾙ', 'ﾒｰﾙ・FAX回答（送信）', 'SRB投稿（要望）', 'ﾒｰﾙ・FAX文書（受信）']))
-                ]
-            
-            # グループ別に分割
-            result['ivr_ss'] = df[df['サポート区分'] == 'SS'].shape[0]
-            result['ivr_tvs'] = df[df['サポート区分'] == 'TVS'].shape[0]
-            result['ivr_kmn'] = df[df['サポート区分'] == '顧問先'].shape[0]
-            result['ivr_hhd'] = df[df['サポート区分'] == 'HHD'].shape[0]
+            df = self.filtered_by_date_range(self.df, '登録日時', start_date, end_date)
+
+            # 直受け・留守電・対象外に分類し、サポート区分とのクロス集計で全グループの件数を一度に求める
+            table = self.crosstab(df)
+            for key, support_type in SUPPORT_GROUPS.items():
+                result[f'direct_{key}'] = int(table.at['direct', support_type])
+                result[f'ivr_{key}'] = int(table.at['ivr', support_type])
 
             logger.debug(f"サポート案件処理結果: {result}")
             return result
@@ -62,4 +70,54 @@ class SupportProcessor(BaseProcessor):
         except Exception as e:
             logger.error(f"直受け件数、留守電数の算定中にエラーが発生しました。: {e}")
             raise
-        
\ No newline at end of file
+
+    @classmethod
+    def crosstab(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        分類（行）とサポート区分（列）のクロス集計表を作成する。
+        SUPPORT_GROUPSにないサポート区分（空欄を含む）の案件は数えない。
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            サポート案件のデータ
+
+        Returns
+        -------
+        pd.DataFrame
+            index: CATEGORIES, columns: SUPPORT_GROUPSのサポート区分
+        """
+        support_types = list(SUPPORT_GROUPS.values())
+        category = cls.classify(df)
+        group = category_codes(df['サポート区分'], support_types)
+        counted = group >= 0
+        cells = np.bincount(category[counted] * len(support_types) + group[counted],
+                            minlength=len(CATEGORIES) * len(support_types))
+        return pd.DataFrame(cells.reshape(len(CATEGORIES), len(support_types)), index=CATEGORIES, columns=support_types)
+
+    @staticmethod
+    def classify(df: pd.DataFrame) -> np.ndarray:
+        """
+        案件を直受け（0）、留守電（1）、対象外（2）に分類する。番号はCATEGORIESの位置。
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            サポート案件のデータ
+
+        Returns
+        -------
+        np.ndarray
+            行ごとの分類の番号
+        """
+        reception = category_codes(df['受付タイプ'], DIRECT_RECEPTION_TYPES + ['留守電'])
+        counted = category_codes(df['顛末コード'], EXCLUDED_OUTCOMES) < 0
+
+        # かんたん！保守区分は空欄も会員と同じく直受けに含める
+        maintenance = df['かんたん！保守区分']
+        member = (category_codes(maintenance, ['会員', '']) >= 0) | maintenance.isna().to_numpy()
+
+        direct = ((reception >= 0) & (reception < len(DIRECT_RECEPTION_TYPES)) & counted & member
+                  & (df['回答タイプ'] != '2次T転送').to_numpy())
+        ivr = (reception == len(DIRECT_RECEPTION_TYPES)) & counted
+        return np.select([direct, ivr], [0, 1], default=2)
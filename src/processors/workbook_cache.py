@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from typing import Callable, Optional
+
+import pandas as pd
+
+import settings
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+
+class WorkbookCache:
+    # このキャッシュが作成するファイルの接頭辞と拡張子。
+    # cache_dirには他の状態ファイル（活動データの取込状態・シフト表の変換結果など）も置かれるため、
+    # 削除・サイズの集計はこれに一致するファイルだけを対象にする
+    ENTRY_PREFIX = 'wb_'
+    ENTRY_SUFFIXES = ('.feather', '.pkl')
+
+    def __init__(self,
+                 cache_dir: str = settings.WORKBOOK_CACHE_DIR,
+                 max_bytes: int = settings.WORKBOOK_CACHE_MAX_BYTES) -> None:
+        """
+        パース済みのワークブックをディスクに保存するキャッシュ。
+
+        キーはファイルの絶対パス・サイズ・内容のハッシュ（および読込条件）。
+        更新日時とサイズが前回と同じ場合はハッシュの再計算を省略する。
+        保存形式はpyarrowがあればFeather、なければpickle。
+        合計サイズがmax_bytesを超えた場合は最も古く参照されたものから削除する（LRU）。
+        削除の対象はこのキャッシュが保存したファイル（wb_*.feather, wb_*.pkl）だけ。
+
+        Parameters
+        ----------
+        cache_dir : str
+            キャッシュの保存先ディレクトリ。
+        max_bytes : int
+            キャッシュの合計サイズの上限（バイト）。
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def read_excel(self,
+                   file_path: str,
+                   name: str = 'default',
+                   variant: str = '',
+                   loader: Optional[Callable[[], pd.DataFrame]] = None,
+                   **read_kwargs) -> pd.DataFrame:
+        """
+        キャッシュがあればキャッシュから、なければExcelファイルを読み込んでキャッシュに保存する。
+
+        Parameters
+        ----------
+        file_path : str
+            読み込むExcelファイルのパス。
+        name : str
+            ヒット数・ミス数を集計する名前（プロセッサ名など）。
+        variant : str
+            読込条件を区別する文字列（列の絞り込み条件など）。
+        loader : Callable[[], pd.DataFrame], optional
+            キャッシュがない場合の読込関数。省略時はpd.read_excel(file_path, **read_kwargs)。
+
+        Returns
+        -------
+        pd.DataFrame
+        """
+        key = self._key(file_path, variant + repr(sorted(read_kwargs.items())))
+        df = self._load(key)
+        if df is not None:
+            self._count(name, 'hits')
+            logger.debug(f"{file_path}をキャッシュから読み込みました。")
+            return df
+
+        self._count(name, 'misses')
+        df = loader() if loader is not None else pd.read_excel(file_path, **read_kwargs)
+        try:
+            self._store(key, df)
+        except Exception as e:
+            logger.warning(f"{file_path}のキャッシュの保存に失敗しました。: {e}")
+        return df
+
+    def _key(self, file_path: str, variant: str) -> str:
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        identity = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            content_hash = self._hashes.get(identity)
+        if content_hash is None:
+            content_hash = self._hash_file(path)
+            with self._lock:
+                self._hashes = {k: v for k, v in self._hashes.items() if k[0] != path}
+                self._hashes[identity] = content_hash
+        return hashlib.sha1(f"{path}|{stat.st_size}|{content_hash}|{variant}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_paths(self, key: str) -> list:
+        return [os.path.join(self.cache_dir, f"{self.ENTRY_PREFIX}{key}{suffix}") for suffix in self.ENTRY_SUFFIXES]
+
+    def _entries(self) -> list:
+        """このキャッシュが保存したファイル"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.startswith(self.ENTRY_PREFIX)
+                and entry.name.endswith(self.ENTRY_SUFFIXES)]
+
+    def _load(self, key: str) -> Optional[pd.DataFrame]:
+        for path in self._entry_paths(key):
+            if not os.path.exists(path):
+                continue
+            try:
+                if path.endswith('.feather'):
+                    df = pd.read_feather(path)
+                else:
+                    with open(path, 'rb') as f:
+                        df = pickle.load(f)
+                os.utime(path)  # LRU用に最終参照日時を更新
+                return df
+            except Exception as e:
+                logger.warning(f"キャッシュの読み込みに失敗しました。: {path}: {e}")
+                self._remove(path)
+        return None
+
+    def _store(self, key: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        feather_path, pickle_path = self._entry_paths(key)
+        tmp_path = f"{pickle_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        stored = False
+        if HAS_PYARROW and isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1:
+            try:
+                df.to_feather(tmp_path)
+                os.replace(tmp_path, feather_path)
+                stored = True
+            except Exception as e:
+                # 型が混在した列などFeatherで保存できない場合はpickleで保存する
+                logger.debug(f"Featherで保存できないため、pickleで保存します。: {e}")
+                self._remove(tmp_path)
+        if not stored:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, pickle_path)
+        self._evict()
+
+    def _evict(self) -> None:
+        """合計サイズが上限を超えている場合、最も古く参照されたものから削除する"""
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                logger.debug(f"キャッシュを削除しました。: {path}")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _count(self, name: str, kind: str) -> None:
+        with self._lock:
+            stats = self.stats.setdefault(name, {'hits': 0, 'misses': 0})
+            stats[kind] += 1
+
+    def clear(self) -> None:
+        """このキャッシュが保存した全てのファイルを削除する"""
+        for entry in self._entries():
+            self._remove(entry.path)
+
+
+_workbook_cache = None
+_workbook_cache_lock = threading.Lock()
+
+
+def get_workbook_cache() -> WorkbookCache:
+    """プロセス内で共有するWorkbookCacheを返す"""
+    global _workbook_cache
+    with _workbook_cache_lock:
+        if _workbook_cache is None:
+            _workbook_cache = WorkbookCache()
+        return _workbook_cache
+
+
+def read_excel_cached(file_path: str, name: str = 'default', variant: str = '',
+                      loader: Optional[Callable[[], pd.DataFrame]] = None, **read_kwargs) -> pd.DataFrame:
+    """
+    settings.WORKBOOK_CACHE_ENABLEDがTrueの場合は共有キャッシュを経由してExcelファイルを読み込む。
+    """
+    if not settings.WORKBOOK_CACHE_ENABLED:
+        return loader() if loader is not None else pd.read_excel(file_path, **read_kwargs)
+    return get_workbook_cache().read_excel(file_path, name=name, variant=variant, loader=loader, **read_kwargs)
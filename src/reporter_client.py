@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from typing import List
+import urllib.parse
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.scraper import group_analysis_result, report_dataframe_lxml
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionExpiredError(Exception):
+    """レポーターのセッションが切れている場合に送出される"""
+
+
+class ReporterHttpClient:
+    def __init__(self,
+                 url: str = settings.REPORTER_URL,
+                 id: str = settings.REPORTER_ID,
+                 timeout: float = settings.REPORTER_HTTP_TIMEOUT,
+                 pool_maxsize: int = settings.REPORTER_HTTP_POOL_SIZE) -> None:
+        """
+        ブラウザを使わずに、レポーター画面が送信するリクエストを直接再現して
+        テンプレートのレポートを取得するクライアント。
+
+        Scraperと同じscrape_ctstage_reportを持つため、settings.REPORTER_BACKEND = 'http' で
+        そのまま置き換えられる。HTTPセッション（Cookieと接続）はサイクル間で再利用する。
+
+        Parameters
+        ----------
+        url : str
+            レポーターのURL。
+        id : str
+            レポーターのログインID。
+        timeout : float
+            1リクエストあたりのタイムアウト（秒）。
+        pool_maxsize : int
+            HTTP接続プールの最大接続数。
+        """
+        self.url = url
+        self.id = id
+        self.timeout = timeout
+        self.report_latencies = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.logged_in = False
+        # 選択中のテンプレートはセッションごとの状態のため、テンプレートの呼び出しからレポートの取得までを排他にする
+        self._lock = threading.Lock()
+
+    def _endpoint(self, path: str) -> str:
+        return urllib.parse.urljoin(self.url, path)
+
+    def login(self) -> None:
+        """レポーターにログイン"""
+        try:
+            logger.info("ログインを試みています。")
+            response = self.session.post(self._endpoint(settings.REPORTER_HTTP_LOGIN_PATH),
+                                         data={'operator_id': self.id},
+                                         timeout=self.timeout)
+            response.raise_for_status()
+            if 'template-title-span' not in response.text:
+                raise SessionExpiredError("ログイン後の画面が表示されませんでした。")
+            self.logged_in = True
+        except Exception as e:
+            self.logged_in = False
+            logger.error(f"ログインに失敗しました。: {e}")
+            raise
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """リクエストを送信し、セッション切れの場合はSessionExpiredErrorを送出する"""
+        response = self.session.request(method, self._endpoint(path), timeout=self.timeout, **kwargs)
+        if response.status_code == 401 or 'logon-operator-id' in response.text:
+            self.logged_in = False
+            raise SessionExpiredError(f"セッションが切れています。: {path}")
+        response.raise_for_status()
+        return response
+
+    def fetch_report(self, template: str, tab: int) -> str:
+        """
+        テンプレートを呼び出し、指定タブのレポートHTMLを取得する。
+        セッションが切れている場合は1回だけ再ログインして再取得する。
+
+        Parameters
+        ----------
+        template : str
+            呼び出すテンプレート。
+        tab : int
+            レポートのタブ。0 or 1
+
+        Returns
+        -------
+        str
+            normal-list*-table-*-table を含むHTML。
+        """
+        for attempt in range(2):
+            if not self.logged_in:
+                self.login()
+            try:
+                start = time.monotonic()
+                self._request('POST', settings.REPORTER_HTTP_TEMPLATE_PATH, data={'template': template})
+                response = self._request('GET', settings.REPORTER_HTTP_REPORT_PATH, params={'tab': tab})
+                self.report_latencies[(template, f'normal-list{tab + 1}-dummy-{tab}')] = time.monotonic() - start
+                return response.text
+            except SessionExpiredError:
+                if attempt > 0:
+                    raise
+                logger.info("セッションの有効期限が切れているため、再ログインします。")
+
+    def report_dataframe(self, template: str, tab: int) -> pd.DataFrame:
+        """指定タブのレポートをDataFrameとして取得する"""
+        html = self.fetch_report(template, tab)
+        return report_dataframe_lxml(html, f'normal-list{tab + 1}-dummy-{tab}')
+
+    def scrape_group_analysis_data(self, template: str) -> dict:
+        with self._lock:
+            df1 = self.report_dataframe(template, 0)
+            df2 = self.report_dataframe(template, 1)
+        return group_analysis_result(df1, df2)
+
+    def scrape_operator_analysis_data(self, template: str) -> pd.DataFrame:
+        with self._lock:
+            return self.report_dataframe(template, 0)
+
+    def scrape_ctstage_report(self, templates: List[str], stop_event) -> dict:
+        """
+        Scraper.scrape_ctstage_reportと同じ形式でテンプレートのデータを取得する。
+
+        Parameters
+        ----------
+        templates : List[str]
+            取得するテンプレートのリスト。
+        stop_event : threading.Event
+            処理を停止するためのイベント。
+
+        Returns
+        -------
+        dict
+            テンプレート名をキーとした取得結果。
+        """
+        results = {}
+        if stop_event.is_set():
+            logger.info(f"スクレイピング処理が停止されました。")
+        for template in templates:
+            retries = 0
+            while retries < settings.REPORTER_MAX_RETRIES and not stop_event.is_set():
+                try:
+                    if template == settings.TEMPLATE_OP:
+                        results[template] = self.scrape_operator_analysis_data(template)
+                    else:
+                        results[template] = self.scrape_group_analysis_data(template)
+                    break
+                except Exception as e:
+                    retries += 1
+                    logger.error(f"{template}の取得中にエラーが発生しました({retries}回目)。: {e}")
+                    self.logged_in = False
+        return results
+
+    def scrape_template(self, template: str, stop_event) -> dict:
+        """1テンプレート分を取得する。複数のスレッドから呼び出せるが、テンプレートの取得は1つずつ行う"""
+        return self.scrape_ctstage_report([template], stop_event)
+
+    def close(self) -> None:
+        """HTTPセッションを閉じる"""
+        self.session.close()
+        self.logged_in = False
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CycleScheduler:
+    def __init__(self,
+                 job: Callable[[], object],
+                 interval: float,
+                 stop_event: Optional[threading.Event] = None) -> None:
+        """
+        一定間隔（固定レート）でジョブを実行する常駐スケジューラ。
+
+        ティックは開始時刻 + n * interval に固定され、処理が間隔を超過した場合は
+        サイクルを積み上げずに、過ぎてしまったティックをスキップする。
+
+        Parameters
+        ----------
+        job : Callable[[], object]
+            1サイクル分の処理。
+        interval : float
+            サイクルの間隔（秒）。
+        stop_event : threading.Event, optional
+            スケジューラを停止するためのイベント。
+        """
+        if interval <= 0:
+            raise ValueError(f"intervalは正の値である必要があります。: {interval}")
+        self.job = job
+        self.interval = interval
+        self.stop_event = stop_event or threading.Event()
+
+        self.cycles = 0
+        self.failures = 0
+        self.skipped_ticks = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_duration = 0.0
+
+    def run(self, max_cycles: Optional[int] = None) -> None:
+        """
+        stop_eventがセットされるまで（またはmax_cycles回実行するまで）ジョブを実行する。
+
+        Parameters
+        ----------
+        max_cycles : int, optional
+            実行する最大サイクル数。Noneの場合は無制限。
+        """
+        start = time.monotonic()
+        tick = 0
+
+        while not self.stop_event.is_set():
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+
+            # 次のティックまで待機（stop_eventがセットされたら即座に抜ける）
+            scheduled = start + tick * self.interval
+            wait = scheduled - time.monotonic()
+            if wait > 0 and self.stop_event.wait(wait):
+                break
+
+            started = time.monotonic()
+            self.last_lag = started - scheduled
+            self.max_lag = max(self.max_lag, self.last_lag)
+            self._run_cycle()
+            finished = time.monotonic()
+            self.last_duration = finished - started
+
+            logger.info(f"サイクル{self.cycles}: 開始遅延 {self.last_lag:.3f} 秒, 処理時間 {self.last_duration:.3f} 秒")
+
+            # 処理中に過ぎてしまったティックはスキップする
+            next_tick = int((finished - start) // self.interval) + 1
+            skipped = next_tick - tick - 1
+            if skipped > 0:
+                self.skipped_ticks += skipped
+                logger.warning(f"処理時間が間隔（{self.interval} 秒）を超過したため、{skipped}回分のティックをスキップしました。")
+            tick = next_tick
+
+    def _run_cycle(self) -> None:
+        self.cycles += 1
+        try:
+            self.job()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"サイクル{self.cycles}の実行中にエラーが発生しました。: {e}")
+
+    @property
+    def stats(self) -> dict:
+        """スケジューラの統計情報を返す。"""
+        return {
+            "cycles": self.cycles,
+            "failures": self.failures,
+            "skipped_ticks": self.skipped_ticks,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+            "last_duration": self.last_duration,
+        }
@@ -1,21 +1,164 @@
 from bs4 import BeautifulSoup
-import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
+import lxml.html
 import pandas as pd
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import Select
+import threading
 import time
-from typing import List
-import pandas as pd
+from typing import List, Optional
 
 import settings
 
 
 logger = logging.getLogger(__name__)
 
+# bodyテーブルの行を削除し、削除済みの印を付ける。レポート作成の前に実行し、行が再び表示されたことで
+# 新しいレポートを検出する（前回と同じ内容のレポートも検出できる）
+_CLEAR_TABLE_SCRIPT = """
+var table = document.getElementById(arguments[0]);
+if (!table) { return false; }
+var bodies = table.getElementsByTagName('tbody');
+for (var i = 0; i < bodies.length; i++) {
+    while (bodies[i].firstChild) { bodies[i].removeChild(bodies[i].firstChild); }
+}
+table.setAttribute('data-report-cleared', '1');
+return true;
+"""
+
+# bodyテーブルの内容のシグネチャ（行数と先頭行・最終行のハッシュ）を返す。
+# テーブルがない場合と、_CLEAR_TABLE_SCRIPTで削除したままの（まだ表示されていない）場合はnull。
+# 削除の印がないテーブル（レポーターが作り直したもの）の行が0件の場合は'0'
+_TABLE_STATE_SCRIPT = """
+var table = document.getElementById(arguments[0]);
+if (!table) { return null; }
+var rows = table.querySelectorAll('tbody tr');
+if (rows.length === 0) { return table.hasAttribute('data-report-cleared') ? null : '0'; }
+function hash(text) {
+    var h = 5381;
+    for (var i = 0; i < text.length; i++) { h = ((h * 33) ^ text.charCodeAt(i)) >>> 0; }
+    return h.toString(16);
+}
+return rows.length + ':' + hash(rows[0].textContent) + ':' + hash(rows[rows.length - 1].textContent);
+"""
+
+# 対象テーブルのヘッダーとボディのxmpテキストだけを取得する
+_EXTRACT_TABLE_SCRIPT = """
+var head = document.getElementById(arguments[0] + '-table-head-table');
+var body = document.getElementById(arguments[0] + '-table-body-table');
+if (!head || !body) { return null; }
+function texts(el) {
+    var result = [];
+    var xmps = el ? el.getElementsByTagName('xmp') : [];
+    for (var i = 0; i < xmps.length; i++) {
+        var text = xmps[i].textContent;
+        result.push(text === '' ? null : text);
+    }
+    return result;
+}
+var rows = [];
+var trs = body.querySelectorAll('tbody tr');
+for (var i = 0; i < trs.length; i++) { rows.push(texts(trs[i])); }
+return {header: texts(head.querySelector('thead tr')), rows: rows};
+"""
+
+
+def build_report_dataframe(header: List[str], rows: List[list]) -> pd.DataFrame:
+    """
+    ヘッダーと行のリストから、先頭列をインデックスとしたDataFrameを作成する。
+
+    行を列ごとのリストに組み替えてから作成するため、行単位での構築より高速。
+    出力はcreate_dateframe_soupと同じ形式。
+    """
+    width = len(header)
+    rows = [row[:width] + [None] * (width - len(row)) for row in rows]
+    columns = list(zip(*rows)) if rows else [()] * width
+    df = pd.DataFrame({i: list(column) for i, column in enumerate(columns)}, columns=range(width))
+    df.columns = header
+    df.set_index(df.columns[0], inplace=True)
+    return df
+
+
+def extract_table_lxml(html, list_name: str) -> tuple:
+    """
+    lxmlのXPathで対象のテーブルIDだけを参照し、ヘッダーと行のリストを取得する。
+
+    Parameters
+    ----------
+    html : str | bytes
+        ページソース。
+    list_name : str
+        'normal-list1-dummy-0' or 'normal-list2-dummy-1'
+
+    Returns
+    -------
+    tuple
+        (ヘッダーのリスト, 行のリスト)
+    """
+    tree = lxml.html.fromstring(html)
+    head = tree.xpath('//table[@id=$id]', id=f'{list_name}-table-head-table')
+    body = tree.xpath('//table[@id=$id]', id=f'{list_name}-table-body-table')
+    if not head or not body:
+        raise ValueError(f"{list_name}のテーブルが見つかりません。")
+
+    def texts(elements) -> list:
+        return [el.text_content() or None for el in elements]
+
+    header = texts(head[0].xpath('((.//thead)[1]//tr)[1]//xmp'))
+    rows = [texts(tr.xpath('.//xmp')) for tr in body[0].xpath('(.//tbody)[1]//tr')]
+    return header, rows
+
+
+def report_dataframe_lxml(html, list_name: str) -> pd.DataFrame:
+    """ページソースからlxmlでテーブルを抽出してDataFrameに変換する"""
+    header, rows = extract_table_lxml(html, list_name)
+    return build_report_dataframe(header, rows)
+
+
+def report_dataframe_soup(html, list_name: str) -> pd.DataFrame:
+    """ページソース全体をBeautifulSoupでパースしてテーブルをDataFrameに変換する"""
+    try:
+        logger.debug("HTMLをパースしています。")
+        soup = BeautifulSoup(html, 'lxml')
+    except Exception as e:
+        logger.error(f"HTMLのパース中にエラーが発生しました。: {e}")
+
+    data_table = []
+
+    # headerのリストを作成
+    header_table = soup.find(id=f'{list_name}-table-head-table')
+    xmp = header_table.thead.tr.find_all('xmp')
+    header_list = [i.string for i in xmp]
+    data_table.append(header_list)
+
+    # bodyのリストを作成
+    body_table = soup.find(id=f'{list_name}-table-body-table')
+    tr = body_table.tbody.find_all('tr')
+    for td in tr:
+        xmp = td.find_all('xmp')
+        row = [i.string for i in xmp]
+        data_table.append(row)
+
+    # テーブルをDataFrameに変換
+    df = pd.DataFrame(data_table[1:], columns=data_table[0])
+    df.set_index(df.columns[0], inplace=True)
+    return df
+
+
+def group_analysis_result(df1: pd.DataFrame, df2: pd.DataFrame) -> dict:
+    """グループ分析の2つのタブのテーブルから必要なデータを辞書に格納する"""
+    return {
+        "total_calls": int(df1.iloc[0, 0]), # 総着信数
+        "IVR_interruptions_before_response": int(df1.iloc[0, 1]), # IVR応答前放棄呼数
+        "ivr_interruptions": int(df1.iloc[0, 2]), # IVR切断数
+        "time_out": int(df2.iloc[0, 0]), # タイムアウト数
+        "abandoned_during_operator": int(df2.iloc[0, 1]) # ACD放棄呼数
+    }
+
+
 class Base:
     def __init__(self,
                  url: str = settings.REPORTER_URL,
@@ -24,6 +167,7 @@ class Base:
         self.id = id
         self.df = pd.DataFrame()
         self.driver = None
+        self.report_latencies = {}
 
     def create_driver(self) -> None:
         try:
@@ -48,7 +192,7 @@ class Base:
 
             # driverの作成
             self.driver = webdriver.Chrome(options=options)
-            self.driver.implicitly_wait(5)
+            self.driver.implicitly_wait(settings.REPORTER_IMPLICIT_WAIT)
         except Exception as e:
             logger.error(f"driverの作成に失敗しました。: {e}")
     
@@ -71,6 +215,33 @@ class Base:
             logger.error(f"ログインに失敗しました。: {e}")
             raise
 
+    def is_alive(self) -> bool:
+        """driverが応答可能な状態かを確認する"""
+        if self.driver is None:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception as e:
+            logger.debug(f"driverが応答しません。: {e}")
+            return False
+
+    def is_logged_in(self) -> bool:
+        """レポーターにログイン済み（テンプレート呼び出しが可能な状態）かを確認する"""
+        try:
+            return len(self._find_elements_now(By.ID, 'template-title-span')) > 0
+        except Exception as e:
+            logger.debug(f"ログイン状態の確認に失敗しました。: {e}")
+            return False
+
+    def _find_elements_now(self, by: str, value: str) -> list:
+        """implicit waitを無効にして要素を即座に検索する"""
+        self.driver.implicitly_wait(0)
+        try:
+            return self.driver.find_elements(by, value)
+        finally:
+            self.driver.implicitly_wait(settings.REPORTER_IMPLICIT_WAIT)
+
     def call_template(self, template: str) -> None:
         """
         テンプレート呼び出し
@@ -107,6 +278,98 @@ class Base:
             logger.error(f"レポートの作成に失敗しました。: {e}")
             raise
 
+    def create_report_and_wait(self, template: str, element_id: str, list_name: str) -> float:
+        """
+        レポートを作成し、テーブルにデータが表示されるまで待機する。
+
+        Parameters
+        ----------
+        template : str
+            タイムアウトの決定と計測結果の記録に使うテンプレート名。
+        element_id : str
+            選択するタブによって、"0" or "1"
+        list_name : str
+            'normal-list1-dummy-0' or 'normal-list2-dummy-1'
+
+        Returns
+        -------
+        float
+            レポート作成からデータ表示までの所要時間（秒）。
+
+        Raises
+        ------
+        TimeoutError
+            やり直しを含めて、レポートが表示されなかった場合。
+        """
+        timeout = settings.REPORT_READY_TIMEOUTS.get(template, settings.REPORT_READY_TIMEOUT)
+        for attempt in range(settings.REPORT_READY_RETRIES + 1):
+            # 表示中の（前回の）行を削除してから作成し、行が再び表示されるのを待つ
+            self.clear_report(list_name)
+            self.create_report(element_id=element_id)
+            try:
+                latency = self.wait_for_report(list_name, timeout)
+                break
+            except TimeoutError:
+                if attempt >= settings.REPORT_READY_RETRIES:
+                    raise
+                logger.warning(f"{template}のレポート({list_name})が表示されないため、作成をやり直します。")
+        self.report_latencies[(template, list_name)] = latency
+        logger.debug(f"{template}のレポート({list_name})が{latency:.3f}秒で表示されました。")
+        return latency
+
+    def clear_report(self, list_name: str) -> bool:
+        """表示中のbodyテーブルの行を削除する。テーブルがなければFalse"""
+        return bool(self.driver.execute_script(_CLEAR_TABLE_SCRIPT, f'{list_name}-table-body-table'))
+
+    def report_signature(self, list_name: str) -> Optional[str]:
+        """
+        表示中のbodyテーブルのシグネチャ（行数と先頭行・最終行のハッシュ）。
+        テーブルがない、またはclear_reportで削除した行がまだ表示されていなければNone
+        """
+        return self.driver.execute_script(_TABLE_STATE_SCRIPT, f'{list_name}-table-body-table')
+
+    def wait_for_report(self, list_name: str, timeout: float = settings.REPORT_READY_TIMEOUT) -> float:
+        """
+        clear_reportで削除したbodyテーブルに行が表示され、内容がREPORT_READY_STABLE_POLLS回続けて
+        変わらなくなるまでポーリングする。前回と同じ内容のレポートも、行が再び表示されたことで検出する。
+
+        Parameters
+        ----------
+        list_name : str
+            'normal-list1-dummy-0' or 'normal-list2-dummy-1'
+        timeout : float
+            待機する最大時間（秒）。
+
+        Returns
+        -------
+        float
+            待機を開始してからデータが揃うまでの時間（秒）。
+
+        Raises
+        ------
+        TimeoutError
+            timeout秒以内に行が表示されなかった場合。
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        previous = None
+        stable = 0
+
+        while True:
+            signature = self.report_signature(list_name)
+            if signature is not None:
+                if signature == previous:
+                    stable += 1
+                else:
+                    previous = signature
+                    stable = 1
+                if stable >= settings.REPORT_READY_STABLE_POLLS:
+                    return time.monotonic() - start
+
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"{list_name}のレポートが{timeout}秒以内に表示されませんでした。")
+            time.sleep(settings.REPORT_READY_POLL_INTERVAL)
+
     def select_tabs(self, tab_element_id: str = "1"):
         """
         レポートのタブ切り替え
@@ -129,7 +392,40 @@ class Base:
     
     def create_dateframe(self, list_name: str) -> pd.DataFrame:
         """
-        
+        レポートのテーブルをDataFrameに変換する。
+
+        settings.FAST_TABLE_EXTRACTがTrueの場合は、execute_scriptで対象テーブルのxmpテキストだけを
+        取得する。失敗した場合はページソース全体をBeautifulSoupでパースする。
+
+        'normal-list1-dummy-0'
+        'normal-list2-dummy-1'
+        """
+        if settings.FAST_TABLE_EXTRACT:
+            try:
+                header, rows = self.extract_table(list_name)
+                return build_report_dataframe(header, rows)
+            except Exception as e:
+                logger.warning(f"テーブルの高速抽出に失敗したため、ページソースから抽出します。: {e}")
+        return self.create_dateframe_soup(list_name)
+
+    def extract_table(self, list_name: str) -> tuple:
+        """
+        ブラウザ上で対象テーブルのヘッダーとボディのxmpテキストを取得する。
+
+        Returns
+        -------
+        tuple
+            (ヘッダーのリスト, 行のリスト)
+        """
+        table = self.driver.execute_script(_EXTRACT_TABLE_SCRIPT, list_name)
+        if table is None:
+            raise ValueError(f"{list_name}のテーブルが見つかりません。")
+        return table['header'], table['rows']
+
+    def create_dateframe_soup(self, list_name: str) -> pd.DataFrame:
+        """
+        ページソース全体をBeautifulSoupでパースしてテーブルをDataFrameに変換する。
+
         'normal-list1-dummy-0'
         'normal-list2-dummy-1'
         """
@@ -138,32 +434,7 @@ class Base:
             html = self.driver.page_source.encode('utf-8')
         except Exception as e:
             logger.error(f"ページソースをUTF-8でエンコード中にエラーが発生しました。: {e}")
-        try:
-            logger.debug("HTMLをパースしています。")
-            soup = BeautifulSoup(html, 'lxml')
-        except Exception as e:
-            logger.error(f"HTMLのパース中にエラーが発生しました。: {e}")
-        
-        data_table = []
-
-        # headerのリストを作成
-        header_table = soup.find(id=f'{list_name}-table-head-table')
-        xmp = header_table.thead.tr.find_all('xmp')
-        header_list = [i.string for i in xmp]
-        data_table.append(header_list)
-
-        # bodyのリストを作成
-        body_table = soup.find(id=f'{list_name}-table-body-table')
-        tr = body_table.tbody.find_all('tr')
-        for td in tr:
-            xmp = td.find_all('xmp')
-            row = [i.string for i in xmp]
-            data_table.append(row)
-        
-        # テーブルをDataFrameに変換
-        df = pd.DataFrame(data_table[1:], columns=data_table[0])
-        df.set_index(df.columns[0], inplace=True)
-        return df
+        return report_dataframe_soup(html, list_name)
 
     def close_driver(self):
         """driverを閉じる"""
@@ -178,13 +449,67 @@ class Base:
 
 
 class Scraper(Base):
+    def __init__(self,
+                 url: str = settings.REPORTER_URL,
+                 id: str = settings.REPORTER_ID,
+                 pool=None,
+                 parallelism: int = settings.REPORTER_PARALLELISM) -> None:
+        """
+        Parameters
+        ----------
+        pool : SessionPool, optional
+            ログイン済みのセッションを貸し出すプール。指定した場合はスクレイピング終了後も
+            ブラウザを閉じずにプールへ返却し、次回の呼び出しで再利用する。
+        parallelism : int
+            同時にスクレイピングするセッション数。2以上の場合はテンプレートを
+            複数のセッションに振り分けて並列に取得する。
+        """
+        super().__init__(url, id)
+        self.pool = pool
+        self.session = None
+        self.parallelism = parallelism
+        self._template_lock = threading.Lock()
+
+    def _open_session(self) -> None:
+        """driverを用意してログインする。プールがあればプールから借りる。"""
+        if self.pool is None:
+            self.create_driver()
+            self.login()
+        else:
+            self.session = self.pool.acquire()
+            self.driver = self.session.driver
+
+    def _reopen_session(self) -> None:
+        """エラー発生後にdriverを復旧する。プールがあればブラウザを再利用する。"""
+        if self.pool is None:
+            self.close_driver()
+            self.create_driver()
+            self.login()
+        else:
+            self.session = self.pool.recover(self.session)
+            self.driver = self.session.driver
+
+    def _close_session(self) -> None:
+        """driverを閉じる。プールがあればプールへ返却する。"""
+        if self.pool is None:
+            self.close_driver()
+            logger.debug("Web Driverを終了しました。")
+        else:
+            if self.session is not None:
+                self.pool.release(self.session)
+                logger.debug("セッションをプールに返却しました。")
+            self.session = None
+            self.driver = None
+
     def scrape_ctstage_report(self, templates: List[str], stop_event):
+        if self.parallelism > 1 and len(templates) > 1:
+            return self.scrape_ctstage_report_parallel(templates, stop_event)
+
         results = {}
         if stop_event.is_set():
             logger.info(f"スクレイピング処理が停止されました。")
         try:
-            self.create_driver()
-            self.login()
+            self._open_session()
             for template in templates:
                 retries = 0
                 while retries < settings.REPORTER_MAX_RETRIES and not stop_event.is_set():
@@ -200,43 +525,111 @@ class Scraper(Base):
                     except Exception as e:
                         retries += 1
                         logger.error(f"{template}のスクレイピング中にエラーが発生しました({retries}回目)。: {e}")
-                        self.close_driver()
-                        self.create_driver()
-                        self.login()
+                        self._reopen_session()
             return results
                         
         except Exception as e:
             logger.error(f"スクレイピング中に予期しないエラーが発生しました。")
             return results
         finally:
-            self.close_driver()
-            logger.debug("Web Driverを終了しました。")
+            self._close_session()
+
+    def scrape_ctstage_report_parallel(self, templates: List[str], stop_event) -> dict:
+        """
+        テンプレートを最大parallelism個のセッションに振り分けて並列にスクレイピングする。
+
+        Parameters
+        ----------
+        templates : List[str]
+            取得するテンプレートのリスト。
+        stop_event : threading.Event
+            処理を停止するためのイベント。
+
+        Returns
+        -------
+        dict
+            テンプレート名をキーとした取得結果（逐次実行時と同じ形式）。
+        """
+        from src.session_pool import SessionPool
+
+        max_workers = min(self.parallelism, len(templates))
+        pool = self.pool
+        own_pool = pool is None
+        if own_pool:
+            pool = SessionPool(size=max_workers, url=self.url, id=self.id)
+
+        logger.info(f"{len(templates)}件のテンプレートを{max_workers}セッションで並列にスクレイピングします。")
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self._scrape_template_in_worker, pool, template, stop_event): template
+                    for template in templates
+                }
+                for future in as_completed(futures):
+                    template = futures[future]
+                    try:
+                        results.update(future.result())
+                    except Exception as e:
+                        logger.error(f"{template}の並列スクレイピング中にエラーが発生しました。: {e}")
+        finally:
+            if own_pool:
+                pool.close_all()
+        return results
+
+    def _scrape_template_in_worker(self, pool, template: str, stop_event) -> dict:
+        """1テンプレート分を独立したScraper（セッション）で取得する"""
+        worker = Scraper(self.url, self.id, pool=pool, parallelism=1)
+        result = worker.scrape_ctstage_report([template], stop_event)
+        self.report_latencies.update(worker.report_latencies)
+        return result
+
+    def scrape_template(self, template: str, stop_event, pool=None) -> dict:
+        """
+        1テンプレート分を取得する。プール（引数またはself.pool）がある場合はプールから借りた
+        セッションで取得するため、複数のスレッドから同時に呼び出せる。
+        """
+        pool = pool or self.pool
+        if pool is not None:
+            return self._scrape_template_in_worker(pool, template, stop_event)
+        with self._template_lock:
+            return self.scrape_ctstage_report([template], stop_event)
     
     def scrape_group_analysis_data(self, template: str) -> dict:
         self.call_template(template)
-        self.create_report(element_id="0")
-        time.sleep(1)
+        self.create_report_and_wait(template, element_id="0", list_name='normal-list1-dummy-0')
         df1 = self.create_dateframe('normal-list1-dummy-0')
 
         self.select_tabs(tab_element_id="2")
-        self.create_report(element_id="1")
-        time.sleep(1)
+        self.create_report_and_wait(template, element_id="1", list_name='normal-list2-dummy-1')
         df2 = self.create_dateframe('normal-list2-dummy-1')
 
-        # 必要なデータを辞書に保存
-        template_result = {
-            "total_calls": int(df1.iloc[0, 0]), # 総着信数
-            "IVR_interruptions_before_response": int(df1.iloc[0, 1]), # IVR応答前放棄呼数
-            "ivr_interruptions": int(df1.iloc[0, 2]), # IVR切断数
-            "time_out": int(df2.iloc[0, 0]), # タイムアウト数
-            "abandoned_during_operator": int(df2.iloc[0, 1]) # ACD放棄呼数
-        }
-
-        return template_result
+        return group_analysis_result(df1, df2)
 
     def scrape_operator_analysis_data(self, template: str) -> dict:
         self.call_template(template)
-        self.create_report(element_id="0")
-        time.sleep(1)
+        self.create_report_and_wait(template, element_id="0", list_name='normal-list1-dummy-0')
         df = self.create_dateframe('normal-list1-dummy-0')
         return df
+
+
+def create_scraper(pool=None):
+    """
+    settings.REPORTER_BACKENDに応じてレポーターのデータ取得クラスを作成する。
+
+    Parameters
+    ----------
+    pool : SessionPool, optional
+        Seleniumバックエンドで使用するセッションプール。
+
+    Returns
+    -------
+    Scraper | ReporterHttpClient
+        scrape_ctstage_reportを持つオブジェクト。
+    """
+    if settings.REPORTER_BACKEND == 'http':
+        from src.reporter_client import ReporterHttpClient
+        return ReporterHttpClient()
+    if settings.REPORTER_BACKEND != 'selenium':
+        raise ValueError(f"REPORTER_BACKENDが不正です。: {settings.REPORTER_BACKEND}")
+    return Scraper(pool=pool)
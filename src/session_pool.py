@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from src.scraper import Base
+import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPool:
+    def __init__(self,
+                 size: int = settings.REPORTER_POOL_SIZE,
+                 url: str = settings.REPORTER_URL,
+                 id: str = settings.REPORTER_ID) -> None:
+        """
+        ログイン済みのレポーターセッション（webdriver.Chrome）をサイクル間で維持するプール。
+
+        貸し出し前にセッションの死活とログイン状態を確認し、ブラウザが落ちている場合のみ
+        再作成、ログインが切れている場合のみ再ログインする。
+
+        Parameters
+        ----------
+        size : int
+            同時に維持するセッションの最大数。
+        url : str
+            レポーターのURL。
+        id : str
+            レポーターのログインID。
+        """
+        if size < 1:
+            raise ValueError(f"sizeは1以上である必要があります。: {size}")
+        self.size = size
+        self.url = url
+        self.id = id
+
+        self._idle: List[Base] = []
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self.created = 0
+        self.reused = 0
+        self.relogins = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> Base:
+        """
+        ログイン済みのセッションを借りる。空きがない場合は返却されるまで待機する。
+
+        Parameters
+        ----------
+        timeout : float, optional
+            空きを待つ最大時間（秒）。Noneの場合は無制限。
+
+        Returns
+        -------
+        Base
+            ログイン済みのセッション。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("セッションプールは既に閉じられています。")
+                if self._idle:
+                    session = self._idle.pop()
+                    break
+                if self._in_use < self.size:
+                    session = None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("セッションの空き待ちがタイムアウトしました。")
+                self._condition.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if session is None:
+                return self._create_session()
+            return self._check_session(session)
+        except Exception:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, session: Base) -> None:
+        """セッションをプールに返却する"""
+        with self._condition:
+            self._in_use -= 1
+            if self._closed:
+                session.close_driver()
+            else:
+                self._idle.append(session)
+            self._condition.notify()
+
+    def discard(self, session: Base) -> None:
+        """セッションを破棄する（ブラウザを終了し、プールに戻さない）"""
+        session.close_driver()
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    def recover(self, session: Base) -> Base:
+        """
+        エラーが発生したセッションを復旧する。
+
+        ブラウザが応答する場合は再起動せずにトップページへ戻し、必要な場合のみ再ログインする。
+        応答しない場合はブラウザを作り直す。
+        """
+        if not session.is_alive():
+            logger.info("セッションが応答しないため、ブラウザを再作成します。")
+            return self._rebuild_session(session)
+        try:
+            session.driver.get(self.url)
+            if not session.is_logged_in():
+                session.login()
+                self.relogins += 1
+            return session
+        except Exception as e:
+            logger.warning(f"セッションの復旧に失敗したため、ブラウザを再作成します。: {e}")
+            return self._rebuild_session(session)
+
+    def close_all(self) -> None:
+        """待機中の全てのセッションを閉じ、以降の貸し出しを停止する"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for session in idle:
+            session.close_driver()
+        logger.info(f"セッションプールを閉じました。: {self.stats}")
+
+    def _create_session(self) -> Base:
+        logger.info("新しいレポーターセッションを作成しています。")
+        session = Base(self.url, self.id)
+        session.create_driver()
+        try:
+            session.login()
+        except Exception:
+            session.close_driver()
+            raise
+        self.created += 1
+        return session
+
+    def _check_session(self, session: Base) -> Base:
+        """再利用前のヘルスチェック。必要な場合のみ再作成・再ログインする。"""
+        if not session.is_alive():
+            logger.info("セッションが応答しないため、ブラウザを再作成します。")
+            return self._rebuild_session(session)
+
+        if not session.is_logged_in():
+            logger.info("セッションの有効期限が切れているため、再ログインします。")
+            session.login()
+            self.relogins += 1
+        self.reused += 1
+        return session
+
+    def _rebuild_session(self, session: Base) -> Base:
+        """ブラウザを作り直してログインする"""
+        session.close_driver()
+        session.create_driver()
+        session.login()
+        self.created += 1
+        return session
+
+    @property
+    def stats(self) -> dict:
+        """プールの統計情報を返す。"""
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "created": self.created,
+            "reused": self.reused,
+            "relogins": self.relogins,
+        }
@@ -0,0 +1,338 @@
+"""
+CTStageレポーターのローカルスタブ。
+
+実際のレポーターと同じ要素ID（ログインフォーム、テンプレート選択、レポート作成ボタン、
+normal-list*-table-*-table）を持つページを返すため、Scraperをオフラインで動作確認できる。
+
+    python -m src.stub_reporter --port 8765 --delay 0.5
+
+起動後、REPORTER_URL=http://127.0.0.1:8765/ を設定してScraperを実行する。
+画面と同じリクエスト（/login, /api/template, /api/report）を受け付けるため、
+REPORTER_BACKEND = 'http' のReporterHttpClientもこのスタブに対して確認できる。
+"""
+import argparse
+import html
+import http.cookies
+import http.server
+import logging
+import secrets
+import threading
+import time
+import urllib.parse
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE = 'REPORTER_SESSION'
+
+GROUP_NAMES = {
+    'TEMPLATE_SS': 'SS',
+    'TEMPLATE_TVS': 'TVS',
+    'TEMPLATE_KMN': '顧問先',
+    'TEMPLATE_HHD': 'HHD',
+}
+
+LIST1_HEADER = ['グループ', '着信数', 'IVR応答前放棄呼数', 'IVR切断数']
+LIST2_HEADER = ['グループ', 'タイムアウト数', 'ACD放棄呼数']
+OPERATOR_HEADER = ['オペレーター', 'ログイン時間', '平均通話時間', '平均後処理時間']
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>CTStage Reporter (stub)</title></head>
+<body>
+<form method="post" action="/login">
+  <input id="logon-operator-id" name="operator_id" type="text">
+  <button id="logon-btn" type="submit">ログイン</button>
+</form>
+</body></html>
+"""
+
+MAIN_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>CTStage Reporter (stub)</title></head>
+<body>
+<div id="template-panel">
+  <span id="template-title-span">テンプレート</span>
+  <select id="template-download-select">
+    <option value="">--</option>
+    {options}
+  </select>
+  <button id="template-creation-btn" type="button">呼出</button>
+</div>
+<div>
+  <span id="normal-title1">集計1</span>
+  <span id="normal-title2">集計2</span>
+</div>
+<table><tr>
+  <td id="panel-td-create-report-0">レポート作成</td>
+  <td id="panel-td-create-report-1">レポート作成</td>
+</tr></table>
+<div id="normal-list1-container"></div>
+<div id="normal-list2-container"></div>
+<script>
+var pending = Promise.resolve();
+function post(url, body) {{
+  return fetch(url, {{method: 'POST', body: new URLSearchParams(body)}});
+}}
+function container(tab) {{
+  return document.getElementById('normal-list' + (tab + 1) + '-container');
+}}
+document.getElementById('template-creation-btn').onclick = function () {{
+  var template = document.getElementById('template-download-select').value;
+  container(0).innerHTML = '';
+  container(1).innerHTML = '';
+  pending = post('/api/template', {{template: template}});
+}};
+function createReport(tab) {{
+  container(tab).innerHTML = '';
+  pending = pending.then(function () {{
+    return fetch('/api/report?tab=' + tab);
+  }}).then(function (r) {{
+    if (r.status === 401) {{ location.href = '/'; return ''; }}
+    return r.text();
+  }}).then(function (h) {{ container(tab).innerHTML = h; }});
+}}
+document.getElementById('panel-td-create-report-0').onclick = function () {{ createReport(0); }};
+document.getElementById('panel-td-create-report-1').onclick = function () {{ createReport(1); }};
+</script>
+</body></html>
+"""
+
+
+def _seed(template: str) -> int:
+    return sum(ord(c) for c in template)
+
+
+def _hms(seconds: int) -> str:
+    return f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+
+
+def report_rows(template: str, tab: int, operators: int = 20) -> tuple:
+    """
+    テンプレートとタブに対応する決定的なダミーデータを返す。
+
+    Returns
+    -------
+    tuple
+        (ヘッダーのリスト, 行のリスト)
+    """
+    seed = _seed(template)
+    if template in GROUP_NAMES:
+        group = GROUP_NAMES[template]
+        if tab == 0:
+            return LIST1_HEADER, [[group, str(100 + seed % 150), str(seed % 7), str(seed % 11)]]
+        return LIST2_HEADER, [[group, str(5 + seed % 13), str(seed % 9)]]
+
+    rows = []
+    for i in range(operators):
+        rows.append([
+            f"op{i + 1:03}",
+            _hms(6 * 3600 + (seed * (i + 1)) % 7200),
+            _hms(240 + (seed + i * 37) % 360),
+            _hms(60 + (seed + i * 53) % 240),
+        ])
+    return OPERATOR_HEADER, rows
+
+
+def build_report_fragment(template: str, tab: int, operators: int = 20) -> str:
+    """レポーターと同じ構造（thead/tbody内のxmp）のテーブルHTMLを作成する"""
+    header, rows = report_rows(template, tab, operators)
+    list_name = f"normal-list{tab + 1}-dummy-{tab}"
+    head_cells = ''.join(f"<th><xmp>{html.escape(h)}</xmp></th>" for h in header)
+    body_rows = ''.join(
+        '<tr>' + ''.join(f"<td><xmp>{html.escape(v)}</xmp></td>" for v in row) + '</tr>'
+        for row in rows
+    )
+    return (
+        f'<table id="{list_name}-table-head-table"><thead><tr>{head_cells}</tr></thead></table>'
+        f'<table id="{list_name}-table-body-table"><tbody>{body_rows}</tbody></table>'
+    )
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    server: 'StubReporterServer'
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _session(self) -> Optional[dict]:
+        cookie = http.cookies.SimpleCookie(self.headers.get('Cookie', ''))
+        if SESSION_COOKIE not in cookie:
+            return None
+        return self.server.get_session(cookie[SESSION_COOKIE].value)
+
+    def _form(self) -> dict:
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode('utf-8')
+        return {k: v[0] for k, v in urllib.parse.parse_qs(body).items()}
+
+    def _send(self, status: int, body: str = '', content_type: str = 'text/html; charset=utf-8', headers: dict = None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location: str, headers: dict = None):
+        self._send(303, headers={'Location': location, **(headers or {})})
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        session = self._session()
+
+        if parsed.path == '/':
+            if session is not None:
+                return self._send(200, self.server.main_page)
+            return self._send(200, LOGIN_PAGE)
+
+        if parsed.path == '/main':
+            if session is None:
+                return self._redirect('/')
+            return self._send(200, self.server.main_page)
+
+        if parsed.path == '/api/report':
+            if session is None:
+                return self._send(401, 'session expired', 'text/plain; charset=utf-8')
+            query = urllib.parse.parse_qs(parsed.query)
+            tab = int(query.get('tab', ['0'])[0])
+            template = session.get('template')
+            if not template:
+                return self._send(400, 'template is not selected', 'text/plain; charset=utf-8')
+            self.server.report_requests += 1
+            if self.server.delay > 0:
+                time.sleep(self.server.delay)
+            return self._send(200, build_report_fragment(template, tab, self.server.operators))
+
+        self._send(404, 'not found', 'text/plain; charset=utf-8')
+
+    def do_POST(self):
+        parsed = urllib.parse.urlparse(self.path)
+
+        if parsed.path == '/login':
+            form = self._form()
+            if not form.get('operator_id'):
+                return self._send(200, LOGIN_PAGE)
+            token = self.server.create_session(form['operator_id'])
+            return self._redirect('/main', {'Set-Cookie': f"{SESSION_COOKIE}={token}; Path=/"})
+
+        session = self._session()
+        if session is None:
+            return self._send(401, 'session expired', 'text/plain; charset=utf-8')
+
+        if parsed.path == '/api/template':
+            template = self._form().get('template', '')
+            if template not in self.server.templates:
+                return self._send(400, f'unknown template: {template}', 'text/plain; charset=utf-8')
+            session['template'] = template
+            return self._send(204)
+
+        self._send(404, 'not found', 'text/plain; charset=utf-8')
+
+
+class StubReporterServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 templates: List[str] = None,
+                 delay: float = 0.0,
+                 session_ttl: Optional[float] = None,
+                 operators: int = 20) -> None:
+        """
+        Parameters
+        ----------
+        host : str
+            待ち受けるホスト。
+        port : int
+            待ち受けるポート。0の場合は空きポートを自動で割り当てる。
+        templates : List[str], optional
+            選択可能なテンプレート。省略時はsettings.TEMPLATESと同じもの。
+        delay : float
+            レポート作成（/api/report）の応答を遅らせる時間（秒）。
+        session_ttl : float, optional
+            セッションの有効期限（秒）。Noneの場合は期限切れにならない。
+        operators : int
+            オペレーター分析テンプレートで返すオペレーター数。
+        """
+        super().__init__((host, port), _Handler)
+        self.templates = templates or list(GROUP_NAMES) + ['TEMPLATE_OP']
+        self.delay = delay
+        self.session_ttl = session_ttl
+        self.operators = operators
+        self.report_requests = 0
+        self.logins = 0
+        self.main_page = MAIN_PAGE.format(options=''.join(
+            f'<option value="{html.escape(t)}">{html.escape(t)}</option>' for t in self.templates
+        ))
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def create_session(self, operator_id: str) -> str:
+        token = secrets.token_hex(16)
+        with self._lock:
+            self._sessions[token] = {'operator_id': operator_id, 'created': time.monotonic(), 'template': None}
+            self.logins += 1
+        return token
+
+    def get_session(self, token: str) -> Optional[dict]:
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if self.session_ttl is not None and time.monotonic() - session['created'] > self.session_ttl:
+                del self._sessions[token]
+                return None
+            return session
+
+    def expire_sessions(self) -> None:
+        """全てのセッションを期限切れにする（再ログインの確認用）"""
+        with self._lock:
+            self._sessions.clear()
+
+    def start(self) -> 'StubReporterServer':
+        """バックグラウンドスレッドでサーバーを起動する"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"スタブレポーターを起動しました。: {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止する"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='CTStageレポーターのローカルスタブ')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='レポート作成の応答遅延（秒）')
+    parser.add_argument('--session-ttl', type=float, default=None, help='セッションの有効期限（秒）')
+    parser.add_argument('--operators', type=int, default=20, help='オペレーター分析で返す人数')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name)s:%(message)s')
+    server = StubReporterServer(args.host, args.port, delay=args.delay,
+                                session_ttl=args.session_ttl, operators=args.operators)
+    logger.info(f"スタブレポーターを起動しました。: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
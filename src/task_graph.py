@@ -0,0 +1,216 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ノードの状態
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'  # 依存先が失敗・スキップしたため実行しなかった
+CANCELLED = 'cancelled'  # 停止信号を受け取ったため実行しなかった
+
+
+class TaskNode:
+    def __init__(self,
+                 name: str,
+                 func: Callable,
+                 deps: tuple = (),
+                 label: Optional[str] = None,
+                 resource: Optional[str] = None) -> None:
+        """
+        タスクグラフのノード。
+
+        Parameters
+        ----------
+        name : str
+            ノード名。
+        func : Callable
+            処理。依存先のノードの結果がdepsと同じ順序で渡される。
+        deps : tuple
+            依存先のノード名。
+        label : str, optional
+            表示名。
+        resource : str, optional
+            ノードが使う共有の資源の名前（セッションプールなど）。TaskGraph.runのlimitsで
+            同じ資源を使うノードの同時実行数を制限する。
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.label = label or name
+        self.resource = resource
+
+    def __repr__(self) -> str:
+        return f"TaskNode({self.name!r}, deps={self.deps})"
+
+
+class TaskRun:
+    def __init__(self, names: Iterable[str]) -> None:
+        """
+        タスクグラフの1回分の実行結果。
+
+        results : 成功したノードの結果
+        status : ノードの状態（done, failed, skipped, cancelled）
+        timings : 成功・失敗したノードの(開始, 終了)（実行開始からの秒）
+        errors : 失敗したノードの例外
+        """
+        self.status = {name: PENDING for name in names}
+        self.results = {}
+        self.timings = {}
+        self.errors = {}
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """全てのノードが成功したか"""
+        return all(status == DONE for status in self.status.values())
+
+    def names(self, status: str) -> List[str]:
+        """指定した状態のノード名を返す"""
+        return [name for name, s in self.status.items() if s == status]
+
+    def duration(self, name: str) -> Optional[float]:
+        """ノードの処理時間（秒）。実行していない場合はNone"""
+        if name not in self.timings:
+            return None
+        start, end = self.timings[name]
+        return end - start
+
+    def summary(self) -> str:
+        """ノードごとの状態と処理時間を返す（ログ用）"""
+        lines = [f"全体: {self.elapsed:.3f} 秒"]
+        for name, status in self.status.items():
+            if name in self.timings:
+                start, end = self.timings[name]
+                lines.append(f"{name}: {status} {end - start:.3f} 秒（開始 +{start:.3f} 秒）")
+            else:
+                lines.append(f"{name}: {status}")
+        return '\n'.join(lines)
+
+
+class TaskGraph:
+    def __init__(self) -> None:
+        """
+        依存関係を宣言したタスクのグラフ（DAG）。
+
+        runは依存先が全て成功したノードから順にスレッドプールで実行し、
+        一部のノードが失敗しても、失敗に依存しないノードは最後まで実行する。
+        """
+        self.nodes: Dict[str, TaskNode] = {}
+
+    def add(self, name: str, func: Callable, deps: Iterable[str] = (), label: Optional[str] = None,
+            resource: Optional[str] = None) -> TaskNode:
+        """ノードを登録する。依存先は先に登録しておく必要がある"""
+        deps = tuple(deps)
+        if name in self.nodes:
+            raise ValueError(f"ノードが既に登録されています。: {name}")
+        missing = [d for d in deps if d not in self.nodes]
+        if missing:
+            raise ValueError(f"{name}の依存先が登録されていません。: {missing}")
+        node = TaskNode(name, func, deps, label, resource)
+        self.nodes[name] = node
+        return node
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.nodes
+
+    def dependents(self, name: str) -> List[str]:
+        """ノードに直接依存しているノード名を返す"""
+        return [n for n, node in self.nodes.items() if name in node.deps]
+
+    def run(self,
+            max_workers: int,
+            stop_event: Optional[threading.Event] = None,
+            limits: Optional[Dict[str, int]] = None) -> TaskRun:
+        """
+        グラフを実行する。
+
+        Parameters
+        ----------
+        max_workers : int
+            同時に実行するノードの最大数。
+        stop_event : threading.Event, optional
+            セットされると、まだ開始していないノードを実行しない。
+        limits : Dict[str, int], optional
+            資源（TaskNode.resource）ごとの同時実行数の上限。上限に達している資源を使うノードは、
+            ワーカーのスレッドを占有せずに資源が空くまで待つ。
+
+        Returns
+        -------
+        TaskRun
+            ノードごとの結果・状態・処理時間。
+        """
+        stop_event = stop_event or threading.Event()
+        limits = limits or {}
+        run = TaskRun(self.nodes)
+        waiting = {name: set(node.deps) for name, node in self.nodes.items()}
+        in_use = {resource: 0 for resource in limits}
+        origin = time.monotonic()
+
+        def available(node: TaskNode) -> bool:
+            return node.resource not in limits or in_use[node.resource] < limits[node.resource]
+
+        def execute(node: TaskNode):
+            started = time.monotonic() - origin
+            try:
+                return node.func(*(run.results[dep] for dep in node.deps))
+            finally:
+                run.timings[node.name] = (started, time.monotonic() - origin)
+
+        def skip(name: str) -> None:
+            for dependent in self.dependents(name):
+                if run.status[dependent] == PENDING:
+                    run.status[dependent] = SKIPPED
+                    waiting.pop(dependent, None)
+                    logger.warning(f"{dependent}は依存先の{name}が完了しなかったため実行しません。")
+                    skip(dependent)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            try:
+                while waiting or running:
+                    if stop_event.is_set():
+                        for name in waiting:
+                            run.status[name] = CANCELLED
+                        waiting.clear()
+                    for name in [n for n, deps in waiting.items() if not deps]:
+                        node = self.nodes[name]
+                        if not available(node):
+                            continue
+                        if node.resource in in_use:
+                            in_use[node.resource] += 1
+                        del waiting[name]
+                        logger.debug(f"{name}を開始します。")
+                        running[executor.submit(execute, node)] = name
+                    if not running:
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        if self.nodes[name].resource in in_use:
+                            in_use[self.nodes[name].resource] -= 1
+                        try:
+                            run.results[name] = future.result()
+                            run.status[name] = DONE
+                            for dependent in self.dependents(name):
+                                if dependent in waiting:
+                                    waiting[dependent].discard(name)
+                        except Exception as e:
+                            run.status[name] = FAILED
+                            run.errors[name] = e
+                            logger.error(f"{name}の実行中にエラーが発生しました。: {e}")
+                            skip(name)
+            except BaseException:
+                stop_event.set()
+                for future, name in running.items():
+                    if future.cancel():
+                        run.status[name] = CANCELLED
+                raise
+            finally:
+                run.elapsed = time.monotonic() - origin
+        return run
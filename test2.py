@@ -1,4 +1,4 @@
-from src.controller import collect_data, collect_and_calculate_operator_kpis
+from src.controller import CycleDataPlane, collect_data, collect_and_calculate_operator_kpis
 import logging
 import time
 
@@ -6,8 +6,9 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(name
 logger = logging.getLogger(__name__)
 
 start = time.time()
-results = collect_data()
-df = collect_and_calculate_operator_kpis(results['TEMPLATE_OP'])
+data_plane = CycleDataPlane()
+results = collect_data(data_plane=data_plane)
+df = collect_and_calculate_operator_kpis(data_plane=data_plane)
 
 end = time.time()
 time_diff = end - start
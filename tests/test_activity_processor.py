@@ -0,0 +1,226 @@
+"""
+ActivityProcessorの集計（コールバック件数・お待たせ案件）を、変更前の実装と同じ手順の参照実装と比較する。
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import settings
+from benchmarks import synthetic
+from src.processors.activity_processor import ActivityProcessor
+from src.processors.base import BaseProcessor
+
+CASE = '案件番号 (関連) (サポート案件)'
+REGISTERED = '登録日時 (関連) (サポート案件)'
+RECEPTION = '受付タイプ (関連) (サポート案件)'
+SUPPORT = 'サポート区分 (関連) (サポート案件)'
+EXCLUDED = '指標に含めない (関連) (サポート案件)'
+OUTCOME = '顛末コード (関連) (サポート案件)'
+
+GROUPS = {'ss': 'SS', 'tvs': 'TVS', 'kmn': '顧問先', 'hhd': 'HHD'}
+CALLBACK_RECEPTION = {'ss': ['折返し', '留守電'], 'tvs': ['折返し', '留守電'], 'kmn': ['折返し', '留守電'],
+                      'hhd': ['HHD入電（折返し）', '留守電']}
+THRESHOLDS = {
+    20: settings.SERIAL_20_MINUTES,
+    30: settings.SERIAL_30_MINUTES,
+    40: settings.SERIAL_40_MINUTES,
+    60: settings.SERIAL_60_MINUTES,
+}
+
+
+def today_range(df: pd.DataFrame) -> pd.DataFrame:
+    start = synthetic.today_serial()
+    return df[(df[REGISTERED] >= start) & (df[REGISTERED] < start + 1)]
+
+
+def reference_callback_counts(df: pd.DataFrame) -> dict:
+    """変更前のprocess（グループ・区分ごとに行を絞り込んで数える）"""
+    df = df.copy()
+    df['件名'] = df['件名'].astype(str)
+    df = today_range(df[~df['件名'].str.contains('【受付】', na=False)])
+    df = df.sort_values(by=[CASE, '登録日時']).drop_duplicates(subset=CASE, keep='first')
+    df['時間差'] = (df['登録日時'] - df[REGISTERED]).fillna(0.0)
+
+    t20, t30, t40, t60 = THRESHOLDS.values()
+    result = {}
+    for key, support_type in GROUPS.items():
+        rows = df[df[RECEPTION].isin(CALLBACK_RECEPTION[key]) & (df[SUPPORT] == support_type)]
+        delay, included = rows['時間差'], rows[EXCLUDED] == 'いいえ'
+        result[f'cb_0_20_{key}'] = int((delay <= t20).sum())
+        result[f'cb_20_30_{key}'] = int(((delay > t20) & (delay <= t30)).sum())
+        result[f'cb_30_40_{key}'] = int(((delay > t30) & (delay <= t40)).sum())
+        result[f'cb_40_60_{key}'] = int(((delay > t40) & (delay <= t60) & included).sum())
+        result[f'cb_60over_{key}'] = int(((delay > t60) & included).sum())
+        result[f'cb_not_include_{key}'] = int(((delay > t60) & (rows[EXCLUDED] == 'はい')).sum())
+    return result
+
+
+def reference_waiting_for_callback(df: pd.DataFrame, current_serial: float) -> dict:
+    """変更前のwaiting_for_callback（外部結合のindicatorで【受付】だけの案件を求め、案件番号順のリストを返す）"""
+    df = df[df[RECEPTION].isin(['折返し', '留守電'])]
+    df = df[df[EXCLUDED] == 'いいえ']
+    df = df[df[OUTCOME].isin(['対応中', '対応待ち'])].copy()
+    df['件名'] = df['件名'].astype(str)
+    merged = pd.merge(df[df['件名'] == '【受付】'], df[df['件名'] != '【受付】'], on=CASE, how='outer', indicator=True)
+    df = df[df[CASE].isin(merged.loc[merged['_merge'] == 'left_only', CASE].unique())]
+    df = df.sort_values(by=[CASE, '登録日時']).drop_duplicates(subset=CASE, keep='first')
+    df = today_range(df)
+
+    result = {}
+    for key, support_type in GROUPS.items():
+        rows = df[df[SUPPORT] == support_type]
+        for minutes, threshold in THRESHOLDS.items():
+            result[f'wfc_over{minutes}_{key}'] = list(rows.loc[current_serial - rows[REGISTERED] >= threshold, CASE])
+    return result
+
+
+def boundary_frame(current_serial: float) -> pd.DataFrame:
+    """
+    待ち時間・お待たせ時間が20/30/40/60分ちょうどと、その前後（±1ms相当）の案件の活動。
+    コールバックの案件は【受付】以外の活動を持ち、お待たせの案件は【受付】の活動だけを持つ。
+    """
+    registered = synthetic.today_serial() + 0.25
+    rows = []
+    for key, support_type in GROUPS.items():
+        for reception in CALLBACK_RECEPTION[key]:
+            for minutes, threshold in THRESHOLDS.items():
+                for offset in (-1e-8, 0.0, 1e-8):
+                    for excluded in ('いいえ', 'はい'):
+                        case = f"CAS-CB{len(rows):05}"
+                        rows.append([case, '【受付】', registered, registered, reception, support_type, excluded, '完了'])
+                        rows.append([case, '対応', registered + threshold + offset, registered, reception, support_type, excluded, '完了'])
+        for minutes, threshold in THRESHOLDS.items():
+            for offset in (-1e-8, 0.0, 1e-8):
+                case = f"CAS-WF{len(rows):05}"
+                waiting_since = current_serial - threshold + offset
+                rows.append([case, '【受付】', waiting_since, waiting_since, '折返し', support_type, 'いいえ', '対応中'])
+    # 活動の登録日時が空の案件（時間差は0として数える）
+    rows.append(['CAS-NA00000', '対応', np.nan, registered, '折返し', 'SS', 'いいえ', '完了'])
+    return pd.DataFrame(rows, columns=[CASE, '件名', '登録日時', REGISTERED, RECEPTION, SUPPORT, EXCLUDED, OUTCOME])
+
+
+def run_process(df: pd.DataFrame, current_serial: float, monkeypatch) -> dict:
+    monkeypatch.setattr(BaseProcessor, 'current_time_to_serial', lambda self, base_date=None: current_serial)
+    processor = ActivityProcessor('')
+    processor.df = df
+    return processor.process()
+
+
+def assert_same_as_reference(result: dict, df: pd.DataFrame, current_serial: float) -> None:
+    expected_counts = reference_callback_counts(df)
+    assert {k: result[k] for k in expected_counts} == expected_counts
+
+    expected_lists = reference_waiting_for_callback(df, current_serial)
+    assert not any(key.startswith('wfc_over') for key in result)
+    for group in GROUPS:
+        waiting = result[f'wfc_{group}']
+        for minutes in THRESHOLDS:
+            expected = expected_lists[f'wfc_over{minutes}_{group}']
+            assert waiting.count(minutes) == len(expected)
+            assert sorted(waiting.over(minutes)) == sorted(expected)
+
+
+@pytest.mark.parametrize('rows, seed', [(2000, 0), (5000, 1), (20000, 2)])
+@pytest.mark.parametrize('time_of_day', [0.3, 0.6, 0.999])
+def test_process_matches_reference_on_synthetic(rows, seed, time_of_day, monkeypatch):
+    df = synthetic.activity_frame(rows, seed)
+    current_serial = synthetic.today_serial() + time_of_day
+    assert_same_as_reference(run_process(df, current_serial, monkeypatch), df, current_serial)
+
+
+def test_process_matches_reference_at_threshold_boundaries(monkeypatch):
+    current_serial = synthetic.today_serial() + 0.75
+    df = boundary_frame(current_serial)
+    result = run_process(df, current_serial, monkeypatch)
+    assert_same_as_reference(result, df, current_serial)
+    # 境界の前後で区分が分かれていること（参照実装と一致するだけでなく、全ての区分に件数がある）
+    assert all(result[f'cb_{b}_ss'] > 0 for b in ('0_20', '20_30', '30_40', '40_60', '60over', 'not_include'))
+    assert all(0 < result['wfc_ss'].count(m) for m in THRESHOLDS)
+
+
+def test_process_empty_frame(monkeypatch):
+    df = synthetic.activity_frame(100).iloc[:0]
+    current_serial = synthetic.today_serial() + 0.5
+    result = run_process(df, current_serial, monkeypatch)
+    assert_same_as_reference(result, df, current_serial)
+    assert all(v == 0 for k, v in result.items() if k.startswith('cb_'))
+    assert all(result[f'wfc_{group}'].count(m) == 0 for group in GROUPS for m in THRESHOLDS)
+
+
+def test_process_without_todays_cases(monkeypatch):
+    df = synthetic.activity_frame(1000, seed=3)
+    df[REGISTERED] -= 2
+    current_serial = synthetic.today_serial() + 0.5
+    result = run_process(df, current_serial, monkeypatch)
+    assert_same_as_reference(result, df, current_serial)
+    assert all(v == 0 for k, v in result.items() if k.startswith('cb_'))
+
+
+def test_reception_only_cases_matches_outer_merge():
+    df = synthetic.activity_frame(5000, seed=4)
+    df['件名'] = df['件名'].astype(str)
+    merged = pd.merge(df[df['件名'] == '【受付】'], df[df['件名'] != '【受付】'], on=CASE, how='outer', indicator=True)
+    expected = df[df[CASE].isin(merged.loc[merged['_merge'] == 'left_only', CASE].unique())]
+    pd.testing.assert_frame_equal(ActivityProcessor.reception_only_cases(df), expected)
+    assert ActivityProcessor.reception_only_cases(df.iloc[:0]).empty
+
+
+def test_process_incremental_matches_full_process(tmp_path, monkeypatch):
+    df = synthetic.activity_frame(6000, seed=5).sort_values('登録日時', ignore_index=True)
+    current_serial = synthetic.today_serial() + 0.999
+    state_file = str(tmp_path / 'activity_state.pkl')
+    monkeypatch.setattr(BaseProcessor, 'current_time_to_serial', lambda self, base_date=None: current_serial)
+
+    for end in (3000, 4500, 6000):
+        processor = ActivityProcessor('')
+        processor.df = df.iloc[:end]
+        incremental = processor.process_incremental(state_file)
+        expected = run_process(df.iloc[:end], current_serial, monkeypatch)
+        assert {k: v for k, v in incremental.items() if not k.startswith('wfc_')} == \
+               {k: v for k, v in expected.items() if not k.startswith('wfc_')}
+        for group in GROUPS:
+            for minutes in THRESHOLDS:
+                assert list(incremental[f'wfc_{group}'].over(minutes)) == list(expected[f'wfc_{group}'].over(minutes))
+
+
+
+def test_process_incremental_rebuilds_when_old_row_is_edited(tmp_path, monkeypatch, caplog):
+    """件数が変わらなくても、ウォーターマーク以前のどの行が変更された場合も全件を処理し直す"""
+    df = synthetic.activity_frame(6000, seed=7).sort_values('登録日時', ignore_index=True)
+    current_serial = synthetic.today_serial() + 0.999
+    state_file = str(tmp_path / 'activity_state.pkl')
+    monkeypatch.setattr(BaseProcessor, 'current_time_to_serial', lambda self, base_date=None: current_serial)
+    processor = ActivityProcessor('')
+    processor.df = df
+    processor.process_incremental(state_file)
+
+    edited = df.copy()
+    edited.loc[10, OUTCOME] = '完了' if edited.loc[10, OUTCOME] != '完了' else '対応中'
+    edited.loc[20, EXCLUDED] = 'はい' if edited.loc[20, EXCLUDED] != 'はい' else 'いいえ'
+    processor = ActivityProcessor('')
+    processor.df = edited
+    with caplog.at_level(logging.INFO):
+        incremental = processor.process_incremental(state_file)
+    assert '活動データを全件処理します。' in caplog.text
+    expected = run_process(edited, current_serial, monkeypatch)
+    assert {k: v for k, v in incremental.items() if not k.startswith('wfc_')} == \
+           {k: v for k, v in expected.items() if not k.startswith('wfc_')}
+
+def test_open_case_index_answers_later_queries_like_reference(monkeypatch):
+    """同期後に現在時刻だけを進めた問い合わせが、その時刻で集計し直した結果と一致する"""
+    df = synthetic.activity_frame(5000, seed=6)
+    synced_at = synthetic.today_serial() + 0.4
+    processor = ActivityProcessor('')
+    processor.df = df
+    monkeypatch.setattr(BaseProcessor, 'current_time_to_serial', lambda self, base_date=None: synced_at)
+    processor.process()
+
+    for elapsed_minutes in (0, 5, 20, 45, 90):
+        current_serial = synced_at + elapsed_minutes / (24 * 60)
+        expected = reference_waiting_for_callback(df, current_serial)
+        for group in GROUPS:
+            for minutes in THRESHOLDS:
+                cases = processor.open_cases.waiting_cases(group, minutes, current_serial)
+                assert sorted(cases) == sorted(expected[f'wfc_over{minutes}_{group}'])
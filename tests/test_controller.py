@@ -0,0 +1,169 @@
+"""
+常駐モードのティック（DaemonJob: 同期と、同期の合間のお待たせ件数の更新）と、更新時のKPIの出力・保存を確認する。
+"""
+import datetime
+import logging
+import types
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('selenium')
+
+import settings  # noqa: E402
+from benchmarks import synthetic  # noqa: E402
+from src import controller  # noqa: E402
+from src.calculator.kpi_calculator import KpiCalculator  # noqa: E402
+from src.processors import open_case_index  # noqa: E402
+from src.processors.activity_processor import ActivityProcessor  # noqa: E402
+from src.processors.base import BaseProcessor  # noqa: E402
+from src.processors.support_processor import SupportProcessor  # noqa: E402
+
+SYNC_INTERVAL = 300
+TICK_INTERVAL = 60
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    """時計を進められるDaemonJobと、同期・更新の呼び出し記録"""
+    clock = types.SimpleNamespace(now=0.0)
+    calls = []
+    monkeypatch.setattr(controller, 'time', types.SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(controller, 'orchestrate_workflow',
+                        lambda scraper: calls.append(('sync', clock.now)) or {'synced_at': clock.now})
+    monkeypatch.setattr(controller, 'refresh_group_kpis', lambda data: calls.append(('refresh', data['synced_at'])))
+    job = controller.DaemonJob(scraper=None, sync_interval=SYNC_INTERVAL, tick_interval=TICK_INTERVAL)
+
+    def tick(at: float) -> None:
+        clock.now = at
+        job()
+    return job, tick, calls
+
+
+def test_syncs_every_sync_interval_and_refreshes_in_between(daemon):
+    job, tick, calls = daemon
+    for i in range(11):
+        tick(i * TICK_INTERVAL)
+    assert [kind for kind, _ in calls] == ['sync'] + ['refresh'] * 4 + ['sync'] + ['refresh'] * 4 + ['sync']
+    # 更新は直前の同期の結果を使う
+    assert [at for kind, at in calls if kind == 'refresh'] == [0] * 4 + [300] * 4
+    assert (job.syncs, job.refreshes) == (3, 8)
+
+
+def test_late_tick_does_not_delay_sync(daemon):
+    """ティックの開始が遅れても、半ティック以内なら同期を1ティック遅らせない"""
+    job, tick, calls = daemon
+    for at in (0, 60, 120, 180, 240, 300 - TICK_INTERVAL / 2 + 1):
+        tick(at)
+    assert calls[-1][0] == 'sync'
+
+
+def test_date_change_forces_sync(daemon):
+    job, tick, calls = daemon
+    tick(0)
+    job.date = datetime.date.today() - datetime.timedelta(days=1)
+    tick(TICK_INTERVAL)
+    assert [kind for kind, _ in calls] == ['sync', 'sync']
+
+
+def test_no_refresh_without_sync_result(daemon, monkeypatch):
+    """同期でグループ別KPIを計算できなかった場合は、次の同期まで更新しない"""
+    job, tick, calls = daemon
+    monkeypatch.setattr(controller, 'orchestrate_workflow', lambda scraper: calls.append(('sync', 0)) and None)
+    tick(0)
+    tick(TICK_INTERVAL)
+    assert [kind for kind, _ in calls] == ['sync']
+
+
+class FakeStore:
+    def __init__(self) -> None:
+        self.frames = []
+
+    def append(self, kpi_frame) -> None:
+        self.frames.append(kpi_frame)
+
+
+@pytest.fixture
+def synced(monkeypatch):
+    """同期時点のcollect_dataの結果と、その同期で作成した折返し待ちの案件の索引、KPIの保存先"""
+    synced_at = synthetic.today_serial() + 0.5
+    monkeypatch.setattr(BaseProcessor, 'current_time_to_serial', lambda self, base_date=None: synced_at)
+    activity = ActivityProcessor('')
+    activity.df = synthetic.activity_frame(5000, 0)
+    support = SupportProcessor('')
+    support.df = synthetic.support_frame(5000, 0)
+    data = {**synthetic.group_analysis_results(500, 0), **activity.process(), **support.process()}
+    monkeypatch.setattr(controller, 'get_open_case_index', lambda: activity.open_cases)
+
+    store = FakeStore()
+    monkeypatch.setattr(settings, 'KPI_STORE_ENABLED', True)
+    monkeypatch.setattr(controller, 'get_kpi_store', lambda: store)
+    return synced_at, data, store
+
+
+def logged_metrics(caplog) -> dict:
+    """ログに出力された指標の表示名と、そのログレベル"""
+    levels = {}
+    for record in caplog.records:
+        message = record.getMessage()
+        if 'お待たせ20分以上対応リスト' not in message:
+            levels[message.split(' ', 1)[1].rsplit(': ', 1)[0]] = record.levelno
+    return levels
+
+
+def test_sync_reports_and_stores_every_metric(synced, caplog):
+    _, data, store = synced
+    kpi_results = controller.calculate_group_kpis_for_all_groups(data)
+    with caplog.at_level(logging.DEBUG, logger=controller.logger.name):
+        controller.report_group_kpis(data, kpi_results)
+    assert list(store.frames[0].columns) == list(kpi_results.columns)
+    assert set(logged_metrics(caplog).values()) == {logging.INFO}
+
+
+def test_refresh_reports_and_stores_only_waiting_metrics(synced, monkeypatch, caplog):
+    synced_at, data, store = synced
+    at_sync = controller.calculate_group_kpis_for_all_groups(data)
+    monkeypatch.setattr(open_case_index, 'now_serial', lambda: synced_at + 30 / (24 * 60))
+    with caplog.at_level(logging.DEBUG, logger=controller.logger.name):
+        refreshed = controller.refresh_group_kpis(data)
+
+    # 現在時刻で変わる指標だけが変わり、それだけを保存する
+    others = [name for name in refreshed.columns if name not in KpiCalculator.WAITING_METRICS]
+    pd.testing.assert_frame_equal(refreshed[others], at_sync[others])
+    waiting = 'waiting_for_callback_count_over_60min'
+    assert (refreshed[waiting] >= at_sync[waiting]).all() and (refreshed[waiting] > at_sync[waiting]).any()
+    assert set(store.frames[0].columns) == set(KpiCalculator.WAITING_METRICS)
+
+    waiting_labels = {KpiCalculator.GRAPH.node(name).label for name in KpiCalculator.WAITING_METRICS}
+    levels = logged_metrics(caplog)
+    assert {label for label, level in levels.items() if level == logging.INFO} == waiting_labels
+    assert len(levels) == len({KpiCalculator.GRAPH.node(name).label for name in refreshed.columns})
+
+
+class FakeScraper:
+    def scrape_template(self, template, stop_event) -> dict:
+        return {template: pd.DataFrame()}
+
+
+def test_failed_sync_is_failed_and_stale_file_is_not_loaded(monkeypatch):
+    """同期に失敗したファイルは読み込まず、それを入力とするグループ別KPIもスキップする"""
+    loaded = []
+    monkeypatch.setattr(controller.SynchronizedExcelProcessor, 'sync_file',
+                        lambda self, path, stop_event: path != settings.ACTIVITY_FILE)
+    monkeypatch.setattr(controller.SynchronizedExcelProcessor, 'load_file',
+                        staticmethod(lambda path: loaded.append(path) or path))
+    monkeypatch.setattr(controller.SynchronizedExcelProcessor, 'process_loaded',
+                        staticmethod(lambda processor, data_plane=None: {}))
+    monkeypatch.setattr(controller, 'collect_and_calculate_operator_kpis',
+                        lambda op_result, data_plane, shift_path: pd.DataFrame({'kpi': [1]}))
+
+    graph = controller.build_cycle_graph(FakeScraper(), controller.threading.Event(), controller.CycleDataPlane())
+    run = graph.run(max_workers=4)
+
+    activity = controller.source_name(settings.ACTIVITY_FILE)
+    assert run.status[f'sync:{activity}'] == 'failed'
+    assert run.status[f'load:{activity}'] == run.status[f'process:{activity}'] == 'skipped'
+    assert run.status[controller.GROUP_KPI_NODE] == 'skipped'
+    assert run.status[controller.OPERATOR_KPI_NODE] == 'done'
+    assert settings.ACTIVITY_FILE not in loaded and len(loaded) == len(settings.EXCEL_FILES) - 1
+    assert f'sync:{activity}: failed' in run.summary()
@@ -0,0 +1,127 @@
+"""
+read_excel_filtered（列と当日分の行だけの読込）を、pd.read_excelで全体を読み込んでから絞り込んだ結果と比較する。
+"""
+import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+import settings
+from benchmarks import synthetic
+from src.processors.activity_processor import ActivityProcessor
+from src.processors.base import BaseProcessor
+from src.processors.close_processor import CloseProcessor
+from src.processors.excel_reader import EXCEL_BASE_DATE, read_excel_filtered
+from src.processors.support_processor import SupportProcessor
+
+
+def write_rows(path: str, header: list, rows: list) -> None:
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def test_matches_read_excel_then_filter(tmp_path):
+    df = synthetic.support_frame(3000, seed=0, days=3)
+    df.loc[df.sample(frac=0.05, random_state=0).index, '受付タイプ'] = None
+    path = str(tmp_path / 'support.xlsx')
+    synthetic.write_excel(df, path)
+    start = synthetic.today_serial()
+    usecols = ['登録日時', '受付タイプ', 'サポート区分']
+
+    actual = read_excel_filtered(path, usecols, '登録日時', start, start + 1)
+    expected = pd.read_excel(path, usecols=usecols)
+    expected = expected[(expected['登録日時'] >= start) & (expected['登録日時'] < start + 1)][usecols]
+    assert 0 < len(actual) < len(df)
+    pd.testing.assert_frame_equal(actual, expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_date_cells_of_each_type(tmp_path):
+    today = datetime.date.today()
+    noon = datetime.datetime.combine(today, datetime.time(12))
+    start = float((today - EXCEL_BASE_DATE.date()).days)
+    cells = {
+        'serial': start + 0.5,
+        'datetime': noon,
+        'date': today,
+        'text': noon.strftime('%Y/%m/%d %H:%M:%S'),
+        'yesterday': start - 0.5,
+        'tomorrow': start + 1,
+        'empty': None,
+        'invalid': '不明',
+    }
+    path = str(tmp_path / 'dates.xlsx')
+    write_rows(path, ['名前', '日時'], [[name, value] for name, value in cells.items()])
+    df = read_excel_filtered(path, ['名前'], '日時', start, start + 1)
+    assert df['名前'].tolist() == ['serial', 'datetime', 'date', 'text']
+
+
+def test_without_date_column_skips_only_empty_rows(tmp_path):
+    path = str(tmp_path / 'plain.xlsx')
+    write_rows(path, ['a', None, 'a'], [[1, 2, 3], [None, None, None], [4, None, 6]])
+    df = read_excel_filtered(path)
+    # 列名はpd.read_excelと同じ（空の列名は'Unnamed: n'、重複は'name.n'）
+    assert list(df.columns) == list(pd.read_excel(path).columns) == ['a', 'Unnamed: 1', 'a.1']
+    expected = pd.DataFrame([[1, 2, 3], [4, np.nan, 6]], columns=df.columns)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_missing_column_raises(tmp_path):
+    path = str(tmp_path / 'plain.xlsx')
+    write_rows(path, ['a', 'b'], [[1, 2]])
+    with pytest.raises(ValueError):
+        read_excel_filtered(path, ['a', 'c'])
+    with pytest.raises(ValueError):
+        read_excel_filtered(path, ['a'], date_column='日時')
+
+
+def test_empty_sheet(tmp_path):
+    path = str(tmp_path / 'empty.xlsx')
+    openpyxl.Workbook().save(path)
+    df = read_excel_filtered(path, ['a', 'b'])
+    assert df.empty and list(df.columns) == ['a', 'b']
+
+
+@pytest.fixture
+def fixed_now(monkeypatch):
+    current_serial = synthetic.today_serial() + 0.75
+    monkeypatch.setattr(BaseProcessor, 'current_time_to_serial', lambda self, base_date=None: current_serial)
+    monkeypatch.setattr(settings, 'WORKBOOK_CACHE_ENABLED', False)
+
+
+def load_and_process(processor_class, path: str, pushdown: bool, monkeypatch):
+    monkeypatch.setattr(settings, 'EXCEL_PUSHDOWN', pushdown)
+    processor = processor_class(path)
+    processor.load_data()
+    return processor, processor.process()
+
+
+@pytest.mark.parametrize('processor_class, make_frame', [
+    (ActivityProcessor, lambda: synthetic.activity_frame(3000, seed=1, days=3)),
+    (SupportProcessor, lambda: synthetic.support_frame(3000, seed=2, days=3)),
+])
+def test_processor_results_are_the_same_with_pushdown(tmp_path, monkeypatch, fixed_now, processor_class, make_frame):
+    path = str(tmp_path / 'data.xlsx')
+    synthetic.write_excel(make_frame(), path)
+    full, expected = load_and_process(processor_class, path, False, monkeypatch)
+    filtered, actual = load_and_process(processor_class, path, True, monkeypatch)
+    assert len(filtered.df) < len(full.df)
+    assert {k: v for k, v in actual.items() if not k.startswith('wfc_')} == \
+           {k: v for k, v in expected.items() if not k.startswith('wfc_')}
+    for key in (k for k in expected if k.startswith('wfc_')):
+        for minutes in expected[key].cuts:
+            assert sorted(actual[key].over(minutes)) == sorted(expected[key].over(minutes))
+
+
+def test_close_processor_result_is_the_same_with_pushdown(tmp_path, monkeypatch, fixed_now):
+    path = str(tmp_path / 'close.xlsx')
+    synthetic.write_excel(synthetic.close_frame(3000, synthetic.operators_frame(50), seed=3, days=3), path)
+    _, expected = load_and_process(CloseProcessor, path, False, monkeypatch)
+    _, actual = load_and_process(CloseProcessor, path, True, monkeypatch)
+    pd.testing.assert_frame_equal(actual, expected)
+    assert np.asarray(actual).sum() > 0
@@ -0,0 +1,123 @@
+"""
+KpiStore（バックグラウンドでのまとめ書き、flush・close、日中の推移と前日比較）を一時ファイルのSQLiteで確認する。
+"""
+import datetime
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.kpi_store import KpiStore
+
+GROUPS = ['SS', 'TVS', 'KMN', 'HHD']
+TODAY = datetime.date(2024, 5, 10)
+YESTERDAY = TODAY - datetime.timedelta(days=1)
+
+
+def kpi_frame(value: float) -> pd.DataFrame:
+    """行がグループ、列が指標のKPI（metrics_frameと同じ形）"""
+    return pd.DataFrame({'response_rate': [value + i for i in range(len(GROUPS))],
+                         'total_calls': [int(value * 100) + i for i in range(len(GROUPS))]},
+                        index=pd.Index(GROUPS, name='グループ'))
+
+
+def at(date: datetime.date, hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime.combine(date, datetime.time(hour, minute))
+
+
+def stored_rows(path: str) -> int:
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM kpi").fetchone()[0]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = KpiStore(str(tmp_path / 'kpi' / 'history.sqlite3'), batch_size=1000, flush_interval=60)
+    yield store
+    store.close()
+
+
+def test_append_is_written_in_batches_on_flush(store):
+    store.append(kpi_frame(0.5), at(TODAY, 9))
+    store.append(kpi_frame(0.6), at(TODAY, 10))
+    # batch_sizeに達するまでは書き込まない
+    assert stored_rows(store.path) == 0
+    assert store.flush(timeout=5)
+    assert stored_rows(store.path) == 2 * len(GROUPS) * 2
+    assert store.stats == {'rows': 16, 'batches': 1, 'failures': 0}
+
+
+def test_batch_size_triggers_write(tmp_path):
+    store = KpiStore(str(tmp_path / 'history.sqlite3'), batch_size=8, flush_interval=60)
+    try:
+        store.append(kpi_frame(0.5), at(TODAY, 9))
+        deadline = time.monotonic() + 5
+        while store.stats['batches'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.stats['rows'] == 8
+    finally:
+        store.close()
+
+
+def test_close_writes_pending_rows_and_rejects_append(store):
+    store.append(kpi_frame(0.5), at(TODAY, 9))
+    store.close()
+    assert stored_rows(store.path) == 8
+    assert not store.flush(timeout=1)
+    with pytest.raises(RuntimeError):
+        store.append(kpi_frame(0.5))
+
+
+def test_intraday_pivots_by_time_and_group(store):
+    for hour, value in ((9, 0.5), (10, 0.6), (11, 0.7)):
+        store.append(kpi_frame(value), at(TODAY, hour))
+    store.append(kpi_frame(0.1), at(YESTERDAY, 9))
+    store.flush(timeout=5)
+
+    df = store.intraday('response_rate', TODAY)
+    assert list(df.index) == [at(TODAY, h) for h in (9, 10, 11)]
+    assert sorted(df.columns) == sorted(GROUPS)
+    np.testing.assert_allclose(df['SS'], [0.5, 0.6, 0.7])
+    assert list(store.intraday('response_rate', TODAY, groups=['TVS']).columns) == ['TVS']
+    assert store.intraday('response_rate', TODAY - datetime.timedelta(days=7)).empty
+
+
+def test_day_over_day_uses_last_value_at_or_before_time(store):
+    store.append(kpi_frame(0.5), at(YESTERDAY, 9))
+    store.append(kpi_frame(0.55), at(YESTERDAY, 10, 30))
+    store.append(kpi_frame(0.7), at(TODAY, 9))
+    store.append(kpi_frame(0.8), at(TODAY, 10))
+    store.append(kpi_frame(0.9), at(TODAY, 11))
+    store.flush(timeout=5)
+
+    df = store.day_over_day('response_rate', TODAY, datetime.time(10, 15))
+    assert df.loc['SS', '当日'] == pytest.approx(0.8)
+    assert df.loc['SS', '前日'] == pytest.approx(0.5)
+    assert df.loc['SS', '差分'] == pytest.approx(0.3)
+    assert sorted(df.index) == sorted(GROUPS)
+
+    # 前日の値がない時刻は前日・差分が欠損
+    early = store.day_over_day('response_rate', TODAY, datetime.time(9, 0), groups=['SS'])
+    assert early.loc['SS', '当日'] == pytest.approx(0.7)
+    assert early.loc['SS', '前日'] == pytest.approx(0.5)
+    none = store.day_over_day('response_rate', YESTERDAY, datetime.time(12, 0), groups=['SS'])
+    assert np.isnan(none.loc['SS', '前日']) and np.isnan(none.loc['SS', '差分'])
+
+
+def test_failed_batch_does_not_stop_writer(store, monkeypatch):
+    original = store._write
+    failures = iter([True])
+
+    def write(conn, rows):
+        if next(failures, False):
+            return original(conn, [row[:4] for row in rows])  # 列数が足りない行で失敗させる
+        return original(conn, rows)
+    monkeypatch.setattr(store, '_write', write)
+    store.append(kpi_frame(0.5), at(TODAY, 9))
+    store.flush(timeout=5)
+    store.append(kpi_frame(0.6), at(TODAY, 10))
+    assert store.flush(timeout=5)
+    assert store.stats['failures'] == 1 and store.stats['rows'] == 8
@@ -0,0 +1,80 @@
+"""
+MetricGraph（登録時の検証、依存順、循環の検出、1回だけの計算）を確認する。
+"""
+import pytest
+
+from src.calculator.kpi_calculator import KpiCalculator
+from src.calculator.metric_graph import MetricGraph, MetricNode
+
+
+def small_graph(calls: list = None) -> MetricGraph:
+    """a, b -> total -> rate <- a"""
+    calls = [] if calls is None else calls
+    graph = MetricGraph()
+    graph.add_input('a')
+    graph.add_input('b', label='B件数')
+    graph.add('total', ['a', 'b'], lambda a, b: calls.append('total') or a + b)
+    graph.add('rate', ['a', 'total'], lambda a, total: calls.append('rate') or a / total)
+    return graph
+
+
+def test_unregistered_or_duplicate_metric_is_rejected():
+    graph = small_graph()
+    with pytest.raises(ValueError):
+        graph.add('c', ['missing'], lambda x: x)
+    with pytest.raises(ValueError):
+        graph.add('self', ['self'], lambda x: x)
+    with pytest.raises(ValueError):
+        graph.add_input('a')
+    with pytest.raises(KeyError):
+        graph.node('missing')
+
+
+def test_order_puts_dependencies_first_for_kpi_graph():
+    graph = KpiCalculator.GRAPH
+    order = graph.order()
+    assert sorted(order) == sorted(graph.nodes)
+    position = {name: i for i, name in enumerate(order)}
+    for name, node in graph.nodes.items():
+        assert all(position[dep] < position[name] for dep in node.deps), name
+
+
+def test_dependencies_and_dependents():
+    graph = small_graph()
+    assert graph.dependencies('rate') == ['a', 'total']
+    assert graph.dependencies('rate', recursive=True) == ['a', 'b', 'total']
+    assert graph.dependents('a') == ['total', 'rate']
+    assert graph.inputs() == ['a', 'b'] and graph.outputs() == ['total', 'rate']
+    assert graph.node('b').label == 'B件数' and graph.node('a').label == 'a'
+
+
+def test_cycle_is_detected():
+    graph = small_graph()
+    # addでは循環を作れないため、nodesを直接置き換える
+    graph.nodes['a'] = MetricNode('a', ('rate',), lambda rate: rate)
+    with pytest.raises(ValueError, match='a -> rate -> a|rate -> a -> rate'):
+        graph.order(['rate'])
+
+
+def test_order_cache_is_cleared_when_metric_is_added():
+    graph = small_graph()
+    assert graph.order() == ['a', 'b', 'total', 'rate']
+    graph.add('double', ['total'], lambda total: total * 2)
+    assert graph.order() == ['a', 'b', 'total', 'rate', 'double']
+
+
+def test_evaluate_computes_each_metric_once():
+    calls, inputs = [], []
+    graph = small_graph(calls)
+
+    def resolve(name):
+        inputs.append(name)
+        return {'a': 1, 'b': 3}[name]
+
+    memo = {}
+    assert graph.evaluate(['rate', 'total'], resolve, memo) == {'rate': 0.25, 'total': 4}
+    assert graph.evaluate(['rate'], resolve, memo) == {'rate': 0.25}
+    assert sorted(calls) == ['rate', 'total'] and sorted(inputs) == ['a', 'b']
+    # メモを渡さない場合は評価ごとに計算し直す
+    graph.evaluate(['rate'], resolve)
+    assert len(calls) == 4
@@ -0,0 +1,121 @@
+"""
+OperatorCalculator.calculateの結果を、オペレーターごとに1人ずつ計算する参照実装と比較する。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import settings
+from benchmarks import synthetic
+from src.calculator.operator_calculator import OperatorCalculator
+from src.processors.close_processor import CloseProcessor
+from src.processors.shift_processor import ShiftProcessor
+
+METRICS = ['ログイン時間', 'ATT', 'ACW', 'クローズ', 'CPH']
+
+
+def time_to_days(value) -> float:
+    """変更前の_time_to_days（hh:mm:ss を1日を1とした時間に変換する）"""
+    if not isinstance(value, str):
+        return np.nan
+    h, m, s = value.split(':')
+    return (float(h) + float(m) / 60 + float(s) / 3600) / 24
+
+
+def reference_operator_kpis(df_operators, df_ctstage, df_close, df_shift) -> pd.DataFrame:
+    ctstage_to_name = df_operators.set_index('CTStage')['氏名'].to_dict()
+    sweet_to_name = df_operators.dropna(subset=['Sweet']).set_index('Sweet')['氏名'].to_dict()
+    ctstage, shift = {}, {}
+    for name, row in df_ctstage.iterrows():
+        ctstage.setdefault(ctstage_to_name.get(name, name), row)
+    for name, row in df_shift.iterrows():
+        shift.setdefault(sweet_to_name.get(name, name), row['シフト'])
+
+    def per_call(row, total_column, average_column):
+        if total_column in row.index and settings.OPERATOR_CALLS_COLUMN in row.index:
+            calls = row[settings.OPERATOR_CALLS_COLUMN]
+            return time_to_days(row[total_column]) / calls if calls > 0 else np.nan
+        return time_to_days(row[average_column]) if average_column in row.index else np.nan
+
+    rows = {}
+    for name in df_operators.loc[df_operators['active'] == 1, '氏名'].drop_duplicates():
+        row = ctstage.get(name)
+        if row is None:
+            login, att, acw = np.nan, np.nan, np.nan
+        else:
+            login = time_to_days(row.get(settings.OPERATOR_LOGIN_TIME_COLUMN))
+            att = per_call(row, settings.OPERATOR_TALK_TOTAL_COLUMN, settings.OPERATOR_TALK_TIME_COLUMN)
+            acw = per_call(row, settings.OPERATOR_ACW_TOTAL_COLUMN, settings.OPERATOR_ACW_COLUMN)
+        close = int(df_close['クローズ'].get(name, 0))
+        rows[name] = {
+            'ログイン時間': login,
+            'ATT': att,
+            'ACW': acw,
+            'クローズ': close,
+            'CPH': close / (login * 24) if login > 0 else np.nan,
+            'シフト': shift.get(name, np.nan),
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+@pytest.fixture
+def inputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'WORKBOOK_CACHE_ENABLED', False)
+
+    def make(operators: int, seed: int):
+        df_operators = synthetic.operators_frame(operators, seed)
+        df_ctstage = synthetic.ctstage_frame(df_operators, seed)
+        close = CloseProcessor('')
+        close.df = synthetic.close_frame(operators * 20, df_operators, seed)
+        shift_path = str(tmp_path / f"shift_{operators}_{seed}.csv")
+        synthetic.write_shift_schedule(shift_path, df_operators, seed)
+        return df_operators, df_ctstage, close.process(), ShiftProcessor(shift_path).process()
+    return make
+
+
+def assert_same_as_reference(actual: pd.DataFrame, expected: pd.DataFrame) -> None:
+    assert list(actual.index) == list(expected.index)
+    for column in METRICS:
+        np.testing.assert_allclose(actual[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                   rtol=1e-9, equal_nan=True, err_msg=column)
+    assert actual['シフト'].fillna('').tolist() == expected['シフト'].fillna('').tolist()
+
+
+@pytest.mark.parametrize('operators, seed', [(50, 0), (300, 1)])
+def test_calculate_matches_reference(inputs, operators, seed):
+    df_operators, df_ctstage, df_close, df_shift = inputs(operators, seed)
+    expected = reference_operator_kpis(df_operators, df_ctstage, df_close, df_shift)
+    actual = OperatorCalculator(df_operators, df_ctstage.copy(), df_close, df_shift.copy()).calculate()
+    assert_same_as_reference(actual, expected)
+
+
+def test_zero_calls_and_zero_login_time_are_nan(inputs):
+    df_operators, df_ctstage, df_close, df_shift = inputs(50, 2)
+    df_ctstage.iloc[:5, df_ctstage.columns.get_loc(settings.OPERATOR_CALLS_COLUMN)] = 0
+    df_ctstage.iloc[5:10, df_ctstage.columns.get_loc(settings.OPERATOR_LOGIN_TIME_COLUMN)] = '00:00:00'
+    expected = reference_operator_kpis(df_operators, df_ctstage, df_close, df_shift)
+    actual = OperatorCalculator(df_operators, df_ctstage.copy(), df_close, df_shift.copy()).calculate()
+    assert_same_as_reference(actual, expected)
+
+
+@pytest.mark.parametrize('missing', [
+    [settings.OPERATOR_TALK_TOTAL_COLUMN, settings.OPERATOR_ACW_TOTAL_COLUMN],
+    [settings.OPERATOR_CALLS_COLUMN],
+    [settings.OPERATOR_LOGIN_TIME_COLUMN, settings.OPERATOR_TALK_TIME_COLUMN],
+])
+def test_missing_report_columns(inputs, missing):
+    """合計の列がない場合は平均の列、平均の列もない場合はNaN（KeyErrorにしない）"""
+    df_operators, df_ctstage, df_close, df_shift = inputs(50, 3)
+    df_ctstage = df_ctstage.drop(columns=missing)
+    expected = reference_operator_kpis(df_operators, df_ctstage, df_close, df_shift)
+    actual = OperatorCalculator(df_operators, df_ctstage.copy(), df_close, df_shift.copy()).calculate()
+    assert_same_as_reference(actual, expected)
+
+
+def test_empty_report_and_close(inputs):
+    df_operators, df_ctstage, df_close, df_shift = inputs(50, 4)
+    df_ctstage, df_close = df_ctstage.iloc[:0], df_close.iloc[:0]
+    expected = reference_operator_kpis(df_operators, df_ctstage, df_close, df_shift)
+    actual = OperatorCalculator(df_operators, df_ctstage.copy(), df_close, df_shift.copy()).calculate()
+    assert_same_as_reference(actual, expected)
+    assert (actual['クローズ'] == 0).all()
@@ -0,0 +1,124 @@
+"""
+RefreshEngine（更新状態の確認による待機、タイムアウトの延長、同じアプリケーションでの再試行、
+応答しない場合だけの再起動、停止信号での中断）をFileRefreshBackendで確認する。
+"""
+import json
+import threading
+import time
+
+import pytest
+
+from src.processors.refresh_backend import FAKE_SPEC_SUFFIX, AdaptiveTimeout, FileRefreshBackend, RefreshEngine
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / 'book.xlsx'
+    path.write_bytes(b'data')
+    return str(path)
+
+
+def set_spec(file_path: str, **spec) -> None:
+    with open(f"{file_path}{FAKE_SPEC_SUFFIX}", 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+
+
+class RecordingTimeout(AdaptiveTimeout):
+    """試行ごとのタイムアウトを記録する"""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.used = []
+
+    def timeout(self, key: str) -> float:
+        value = super().timeout(key)
+        self.used.append(value)
+        return value
+
+
+class CrashingBackend(FileRefreshBackend):
+    """最初の更新でアプリケーションが落ちる（応答しなくなる）バックエンド"""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.restarts = 0
+
+    def refresh(self, workbook) -> None:
+        if self.restarts == 0:
+            self.running = False
+            raise RuntimeError("アプリケーションが応答しません。")
+        super().refresh(workbook)
+
+    def restart(self) -> None:
+        self.restarts += 1
+        super().restart()
+
+
+def engine(backend, timeouts=None, max_retries: int = 3) -> RefreshEngine:
+    return RefreshEngine(backend, poll_interval=0.01, max_retries=max_retries, retry_delay=0,
+                         timeouts=timeouts or AdaptiveTimeout(minimum=0.01, maximum=5))
+
+
+def test_poll_finishes_as_soon_as_refresh_is_done(workbook):
+    backend = FileRefreshBackend(duration=0.05)
+    timeouts = AdaptiveTimeout(minimum=0.01, maximum=5)
+    started = time.monotonic()
+    assert engine(backend, timeouts).sync(workbook, threading.Event())
+    # タイムアウト（履歴がないため最大値の5秒）まで待たない
+    assert time.monotonic() - started < 1
+    assert backend.saved == [workbook]
+    assert timeouts.average(workbook) == pytest.approx(0.05, abs=0.04)
+    assert not backend.running
+
+
+def test_timeout_is_recorded_and_retry_waits_longer(workbook):
+    set_spec(workbook, duration=0.15)
+    timeouts = RecordingTimeout(minimum=0.05, maximum=5, factor=2)
+    timeouts.record(workbook, 0.05)  # 前回までの更新は速かった
+    backend = FileRefreshBackend()
+    assert engine(backend, timeouts).sync(workbook, threading.Event())
+
+    first, second = timeouts.used
+    assert first == pytest.approx(0.1)
+    assert second == pytest.approx(0.2) and second > 0.15
+    assert backend.saved == [workbook]
+
+
+def test_failed_refresh_is_retried_on_the_same_app(workbook):
+    backend = FileRefreshBackend(duration=0.01, failures=1)
+    assert engine(backend).sync(workbook, threading.Event())
+    assert backend.attempts[workbook] == 2
+    assert backend.starts == 1
+
+
+def test_app_is_restarted_only_when_not_alive(workbook):
+    backend = CrashingBackend(duration=0.01)
+    assert engine(backend).sync(workbook, threading.Event())
+    assert backend.restarts == 1 and backend.starts == 2
+
+    alive = CrashingBackend(duration=0.01, failures=1)
+    alive.restarts = 1  # 落ちずに更新だけが失敗する
+    assert engine(alive).sync(workbook, threading.Event())
+    assert alive.restarts == 1 and alive.starts == 1
+
+
+def test_gives_up_after_max_retries(workbook):
+    backend = FileRefreshBackend(duration=0.01, failures=5)
+    assert not engine(backend, max_retries=2).sync(workbook, threading.Event())
+    assert backend.attempts[workbook] == 2
+    assert backend.saved == [] and not backend.running
+
+
+def test_stop_event_aborts_wait(workbook):
+    backend = FileRefreshBackend(duration=10)
+    stop_event = threading.Event()
+    timer = threading.Timer(0.1, stop_event.set)
+    timer.start()
+    started = time.monotonic()
+    try:
+        assert not engine(backend).sync(workbook, stop_event)
+    finally:
+        timer.cancel()
+    assert time.monotonic() - started < 2
+    assert backend.attempts[workbook] == 1
+    assert backend.saved == [] and not backend.running
@@ -0,0 +1,116 @@
+"""
+ReporterHttpClient（REPORTER_BACKEND = 'http'）をスタブレポーター（StubReporterServer）に対して実行し、
+取得結果と、セッション切れの場合の再ログインを確認する。
+"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('selenium')
+
+import settings  # noqa: E402
+from src.controller import SCRAPE_RESOURCE, scrape_limits  # noqa: E402
+from src.reporter_client import ReporterHttpClient, SessionExpiredError  # noqa: E402
+from src.stub_reporter import StubReporterServer, report_rows  # noqa: E402
+
+
+def expected_group_result(template: str) -> dict:
+    _, (list1,) = report_rows(template, 0)
+    _, (list2,) = report_rows(template, 1)
+    return {
+        "total_calls": int(list1[1]),
+        "IVR_interruptions_before_response": int(list1[2]),
+        "ivr_interruptions": int(list1[3]),
+        "time_out": int(list2[1]),
+        "abandoned_during_operator": int(list2[2]),
+    }
+
+
+@pytest.fixture
+def server():
+    server = StubReporterServer(operators=5).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = ReporterHttpClient(url=server.url, id='test', timeout=5)
+    yield client
+    client.close()
+
+
+def test_scrape_ctstage_report_returns_every_template(server, client):
+    results = client.scrape_ctstage_report(settings.TEMPLATES, threading.Event())
+    assert list(results) == settings.TEMPLATES
+    for template in settings.TEMPLATES:
+        if template != settings.TEMPLATE_OP:
+            assert results[template] == expected_group_result(template), template
+
+    header, rows = report_rows(settings.TEMPLATE_OP, 0, operators=5)
+    operators = results[settings.TEMPLATE_OP]
+    assert list(operators.index) == [row[0] for row in rows]
+    assert list(operators.columns) == header[1:]
+    # ログインは最初の1回だけで、以降はセッションを再利用する
+    assert server.logins == 1
+    assert server.report_requests == 2 * (len(settings.TEMPLATES) - 1) + 1
+
+
+def test_expired_session_is_logged_in_again_once(server, client):
+    client.scrape_template(settings.TEMPLATE_SS, threading.Event())
+    server.expire_sessions()
+    result = client.scrape_template(settings.TEMPLATE_SS, threading.Event())
+    assert result[settings.TEMPLATE_SS] == expected_group_result(settings.TEMPLATE_SS)
+    assert server.logins == 2
+
+
+def test_session_expiring_between_requests(server, client):
+    """テンプレートの呼び出し後にセッションが切れた場合も、再ログインしてテンプレートから呼び出し直す"""
+    server.session_ttl = 0.2
+    client.fetch_report(settings.TEMPLATE_TVS, 0)
+    time.sleep(0.3)
+    html = client.fetch_report(settings.TEMPLATE_TVS, 1)
+    assert 'normal-list2-dummy-1-table-body-table' in html
+    assert server.logins == 2
+
+
+def test_session_expired_after_relogin_raises(server, client, monkeypatch):
+    client.login()
+    monkeypatch.setattr(client, 'login', lambda: server.expire_sessions() or setattr(client, 'logged_in', True))
+    server.expire_sessions()
+    with pytest.raises(SessionExpiredError):
+        client.fetch_report(settings.TEMPLATE_SS, 0)
+
+
+def test_unknown_template_is_retried_then_left_out(server, client, monkeypatch):
+    monkeypatch.setattr(settings, 'REPORTER_MAX_RETRIES', 2)
+    results = client.scrape_ctstage_report(['TEMPLATE_UNKNOWN', settings.TEMPLATE_HHD], threading.Event())
+    assert list(results) == [settings.TEMPLATE_HHD]
+
+
+def test_stop_event_skips_remaining_templates(client):
+    stop_event = threading.Event()
+    stop_event.set()
+    assert client.scrape_ctstage_report(settings.TEMPLATES, stop_event) == {}
+
+
+def test_concurrent_callers_get_their_own_template(server, client):
+    """選択中のテンプレートはセッションごとの状態のため、同時に呼び出してもテンプレートの取得は1つずつ行う"""
+    server.delay = 0.02
+    templates = [t for t in settings.TEMPLATES if t != settings.TEMPLATE_OP] * 2
+    results = {}
+
+    def scrape(i, template):
+        results[i] = client.scrape_template(template, threading.Event())
+    threads = [threading.Thread(target=scrape, args=(i, t)) for i, t in enumerate(templates)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i, template in enumerate(templates):
+        assert results[i] == {template: expected_group_result(template)}
+
+
+def test_scrape_limits_runs_one_template_at_a_time(client):
+    assert scrape_limits(client) == {SCRAPE_RESOURCE: 1}
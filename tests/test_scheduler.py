@@ -0,0 +1,59 @@
+"""
+CycleScheduler（固定レートのティック、超過したティックのスキップ、停止）を短い間隔で確認する。
+"""
+import threading
+import time
+
+import pytest
+
+from src.scheduler import CycleScheduler
+
+INTERVAL = 0.05
+
+
+def test_ticks_are_fixed_rate():
+    """ジョブの処理時間の分だけティックがずれていかない"""
+    started = []
+    scheduler = CycleScheduler(lambda: started.append(time.monotonic()) or time.sleep(INTERVAL / 2), INTERVAL)
+    scheduler.run(max_cycles=5)
+    assert scheduler.cycles == 5 and scheduler.skipped_ticks == 0
+    # 5回目のティックは開始から4間隔後（処理時間を積み上げると6間隔後になる）
+    assert started[-1] - started[0] == pytest.approx(4 * INTERVAL, abs=INTERVAL / 2)
+
+
+def test_overrun_skips_missed_ticks():
+    durations = iter([INTERVAL * 2.5, 0, 0])
+    started = []
+    scheduler = CycleScheduler(lambda: started.append(time.monotonic()) or time.sleep(next(durations)), INTERVAL)
+    scheduler.run(max_cycles=3)
+    # 1回目の処理中にティック1, 2を過ぎるため、2回目はティック3で実行する
+    assert scheduler.skipped_ticks == 2
+    assert started[1] - started[0] == pytest.approx(3 * INTERVAL, abs=INTERVAL / 2)
+    assert started[2] - started[1] == pytest.approx(INTERVAL, abs=INTERVAL / 2)
+
+
+def test_failed_cycle_does_not_stop_scheduler():
+    calls = []
+
+    def job():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError('失敗')
+    scheduler = CycleScheduler(job, INTERVAL)
+    scheduler.run(max_cycles=3)
+    assert scheduler.stats['cycles'] == 3 and scheduler.stats['failures'] == 1
+
+
+def test_stop_event_interrupts_wait():
+    stop_event = threading.Event()
+    scheduler = CycleScheduler(lambda: None, 10, stop_event)
+    threading.Timer(INTERVAL, stop_event.set).start()
+    start = time.monotonic()
+    scheduler.run()
+    assert scheduler.cycles == 1
+    assert time.monotonic() - start < 1
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError):
+        CycleScheduler(lambda: None, 0)
@@ -0,0 +1,131 @@
+"""
+Scraper.create_report_and_waitの待機（表示中の行を削除してから作成し、行が再び表示されて安定するまで待つ）を、
+ブラウザの代わりにテーブルの状態だけを持つドライバーで確認する。
+"""
+import time
+
+import pytest
+
+pytest.importorskip('selenium')
+
+import settings  # noqa: E402
+from src import scraper  # noqa: E402
+
+LIST_NAME = 'normal-list1-dummy-0'
+
+
+class FakeTable:
+    def __init__(self, rows: list) -> None:
+        self.rows = list(rows)
+        self.cleared = False
+
+
+class FakeDriver:
+    """
+    bodyテーブル1つだけを持つドライバー。レポート作成ボタンのクリックからdelay秒後に、
+    renderの方法（'in_place': 同じ要素の行を書き換える, 'replace': 要素を作り直す）でreport_rowsを表示する。
+    """
+
+    def __init__(self, rows: list, report_rows: list = None, delay: float = 0.05, render: str = 'in_place') -> None:
+        self.table = FakeTable(rows)
+        self.report_rows = report_rows
+        self.delay = delay
+        self.render = render
+        self.clicks = 0
+        self._render_at = None
+
+    def _update(self) -> None:
+        if self._render_at is not None and time.monotonic() >= self._render_at and self.report_rows is not None:
+            if self.render == 'replace':
+                self.table = FakeTable(self.report_rows)
+            else:
+                self.table.rows = list(self.report_rows)
+            self._render_at = None
+
+    def execute_script(self, script: str, table_id: str):
+        assert table_id == f'{LIST_NAME}-table-body-table'
+        self._update()
+        if script == scraper._CLEAR_TABLE_SCRIPT:
+            self.table.rows = []
+            self.table.cleared = True
+            return True
+        if script == scraper._TABLE_STATE_SCRIPT:
+            rows = self.table.rows
+            if not rows:
+                return None if self.table.cleared else '0'
+            return f"{len(rows)}:{hash(rows[0])}:{hash(rows[-1])}"
+        raise AssertionError('想定外のスクリプトです。')
+
+    def find_element(self, by, value):
+        driver = self
+
+        class Button:
+            def click(self):
+                driver.clicks += 1
+                driver._render_at = time.monotonic() + driver.delay
+        return Button()
+
+
+@pytest.fixture
+def make_scraper(monkeypatch):
+    monkeypatch.setattr(settings, 'REPORT_READY_TIMEOUT', 0.5)
+    monkeypatch.setattr(settings, 'REPORT_READY_TIMEOUTS', {})
+    monkeypatch.setattr(settings, 'REPORT_READY_POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(settings, 'REPORT_READY_STABLE_POLLS', 2)
+    monkeypatch.setattr(settings, 'REPORT_READY_RETRIES', 1)
+
+    def make(driver: FakeDriver) -> scraper.Scraper:
+        instance = scraper.Scraper(url='http://127.0.0.1/', id='test')
+        instance.driver = driver
+        return instance
+    return make
+
+
+@pytest.mark.parametrize('render', ['in_place', 'replace'])
+def test_report_with_same_content_as_before_is_detected(make_scraper, render):
+    """前回と同じ内容のレポート（件数が変わらない、0件の時間帯）もタイムアウトせずに検出する"""
+    rows = ['SS 0 0 0']
+    driver = FakeDriver(rows, report_rows=rows, render=render)
+    instance = make_scraper(driver)
+    latency = instance.create_report_and_wait('T', '0', LIST_NAME)
+    assert latency < settings.REPORT_READY_TIMEOUT
+    assert driver.clicks == 1
+
+
+def test_previous_rows_are_never_returned_as_ready(make_scraper):
+    driver = FakeDriver(['前回'], report_rows=['今回'], delay=0.1)
+    instance = make_scraper(driver)
+    instance.create_report_and_wait('T', '0', LIST_NAME)
+    assert driver.table.rows == ['今回']
+
+
+def test_replaced_table_without_rows_is_ready(make_scraper):
+    """レポーターが作り直したテーブルは、行が0件でも表示済みとみなす"""
+    driver = FakeDriver(['前回'], report_rows=[], render='replace')
+    instance = make_scraper(driver)
+    instance.create_report_and_wait('T', '0', LIST_NAME)
+    assert driver.clicks == 1
+
+
+def test_timeout_retries_then_raises(make_scraper):
+    driver = FakeDriver(['前回'], report_rows=None)
+    instance = make_scraper(driver)
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        instance.create_report_and_wait('T', '0', LIST_NAME)
+    assert driver.clicks == settings.REPORT_READY_RETRIES + 1
+    assert time.monotonic() - start >= settings.REPORT_READY_TIMEOUT * (settings.REPORT_READY_RETRIES + 1)
+
+
+def test_waits_until_rows_are_stable(make_scraper, monkeypatch):
+    driver = FakeDriver([], report_rows=['1行目'])
+    instance = make_scraper(driver)
+    signatures = iter(['1:a:a', '2:a:b', '3:a:c', '3:a:c'])
+    calls = []
+
+    def signature(list_name):
+        calls.append(list_name)
+        return next(signatures)
+    monkeypatch.setattr(instance, 'report_signature', signature)
+    instance.wait_for_report(LIST_NAME, timeout=1)
+    assert len(calls) == 4
@@ -0,0 +1,134 @@
+"""
+SessionPool（貸し出し・返却・破棄・復旧）を、ブラウザの代わりに状態だけを持つセッションで確認する。
+"""
+import threading
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from src import session_pool  # noqa: E402
+from src.session_pool import SessionPool  # noqa: E402
+
+
+class FakeSession:
+    """ブラウザの起動・ログイン・終了の回数と、死活・ログイン状態だけを持つセッション"""
+
+    def __init__(self, url: str, id: str) -> None:
+        self.url = url
+        self.alive = False
+        self.logged_in = False
+        self.drivers = 0
+        self.logins = 0
+        self.closes = 0
+        self.pages = []
+        self.driver = self
+
+    def create_driver(self) -> None:
+        self.alive = True
+        self.drivers += 1
+
+    def close_driver(self) -> None:
+        self.alive = False
+        self.logged_in = False
+        self.closes += 1
+
+    def login(self) -> None:
+        self.logged_in = True
+        self.logins += 1
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def is_logged_in(self) -> bool:
+        return self.logged_in
+
+    def get(self, url: str) -> None:
+        self.pages.append(url)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(session_pool, 'Base', FakeSession)
+    pool = SessionPool(size=2, url='http://127.0.0.1/', id='test')
+    yield pool
+    pool.close_all()
+
+
+def test_released_session_is_reused_without_login(pool):
+    session = pool.acquire()
+    pool.release(session)
+    assert pool.acquire() is session
+    assert session.drivers == 1 and session.logins == 1
+    assert pool.stats['created'] == 1 and pool.stats['reused'] == 1
+
+
+def test_expired_session_is_logged_in_again(pool):
+    session = pool.acquire()
+    pool.release(session)
+    session.logged_in = False
+    assert pool.acquire() is session
+    assert session.drivers == 1 and session.logins == 2
+    assert pool.relogins == 1
+
+
+def test_dead_session_is_rebuilt(pool):
+    session = pool.acquire()
+    pool.release(session)
+    session.alive = False
+    assert pool.acquire() is session
+    assert session.drivers == 2 and session.alive
+    assert pool.created == 2
+
+
+def test_acquire_waits_for_release_and_times_out(pool):
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    threading.Timer(0.05, pool.release, [first]).start()
+    assert pool.acquire(timeout=1) is first
+    pool.release(second)
+
+
+def test_discarded_session_frees_a_slot(pool):
+    first, second = pool.acquire(), pool.acquire()
+    pool.discard(first)
+    assert first.closes == 1
+    third = pool.acquire(timeout=0.05)
+    assert third is not first and third is not second
+    assert pool.stats['in_use'] == 2
+
+
+def test_failed_login_frees_the_slot(pool, monkeypatch):
+    def fail(self):
+        raise RuntimeError('ログインできません')
+    monkeypatch.setattr(FakeSession, 'login', fail)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert pool.stats['in_use'] == 0
+
+
+def test_recover_returns_to_top_page_and_logs_in_only_when_needed(pool):
+    session = pool.acquire()
+    assert pool.recover(session) is session
+    assert session.pages == [pool.url] and session.logins == 1 and session.drivers == 1
+
+    session.logged_in = False
+    pool.recover(session)
+    assert session.logins == 2 and session.drivers == 1 and pool.relogins == 1
+
+    session.alive = False
+    pool.recover(session)
+    assert session.drivers == 2 and session.alive
+
+
+def test_closed_pool_refuses_acquire_and_closes_returned_sessions(pool):
+    session = pool.acquire()
+    idle = pool.acquire()
+    pool.release(idle)
+    pool.close_all()
+    assert idle.closes == 1
+    pool.release(session)
+    assert session.closes == 1
+    with pytest.raises(RuntimeError):
+        pool.acquire()
@@ -0,0 +1,74 @@
+"""
+ShiftProcessor（変換済みの月間シフト表）の結果を、変更前の実装（CSVを読み込んで日付の列を取り出す）と比較する。
+"""
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+import settings
+from benchmarks import synthetic
+from src.processors import shift_schedule
+from src.processors.shift_processor import ShiftProcessor
+
+
+def reference_day_frame(file_path: str, date_str: str) -> pd.DataFrame:
+    """変更前のShiftProcessor.process"""
+    df = pd.read_csv(file_path, skiprows=2, header=1, index_col=1, quotechar='"', encoding='shift_jis')
+    df = df.iloc[:, :-1].drop(columns=["組織名", "従業員ID", "種別"])
+    df_shift = df[[date_str]]
+    df_shift.columns = ["シフト"]
+    return df_shift
+
+
+@pytest.mark.parametrize('operators, seed', [(30, 0), (300, 1)])
+def test_process_matches_reference_for_every_day(tmp_path, monkeypatch, operators, seed):
+    monkeypatch.setattr(settings, 'WORKBOOK_CACHE_ENABLED', False)
+    path = str(tmp_path / 'shift.csv')
+    synthetic.write_shift_schedule(path, synthetic.operators_frame(operators, seed), seed)
+
+    first = datetime.date.today().replace(day=1)
+    for day in ShiftProcessor(path).schedule.days:
+        date = first.replace(day=int(day))
+        actual = ShiftProcessor(path, date=date).process()
+        expected = reference_day_frame(path, day)
+        assert list(actual.index) == list(expected.index)
+        assert actual['シフト'].fillna('').tolist() == expected['シフト'].fillna('').tolist()
+
+
+def test_disk_cache_keeps_only_latest_version_of_recent_files(tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(settings, 'WORKBOOK_CACHE_ENABLED', True)
+    monkeypatch.setattr(settings, 'WORKBOOK_CACHE_DIR', str(cache_dir))
+    monkeypatch.setattr(shift_schedule, '_schedules', {})
+    # キャッシュディレクトリの他のファイルは削除しない
+    cache_dir.mkdir()
+    (cache_dir / 'wb_entry.pkl').write_bytes(b'x')
+
+    def cached_files() -> list:
+        return sorted(p for p in os.listdir(cache_dir) if p.startswith(shift_schedule.CACHE_PREFIX))
+
+    operators = synthetic.operators_frame(30, 0)
+    paths = [str(tmp_path / f'shift_{month}.csv') for month in range(3)]
+    for seed, path in enumerate(paths[:2]):
+        synthetic.write_shift_schedule(path, operators, seed)
+        shift_schedule.load_shift_schedule(path)
+    assert len(cached_files()) == 2
+
+    # 更新されたファイルは古い版のキャッシュを置き換える
+    before = cached_files()
+    synthetic.write_shift_schedule(paths[1], synthetic.operators_frame(31, 1), 1)
+    shift_schedule.load_shift_schedule(paths[1])
+    after = cached_files()
+    assert len(after) == 2 and len(set(before) & set(after)) == 1
+
+    # 3つ目のファイルを読み込むと、最も前に使ったファイルのキャッシュを削除する
+    shift_schedule.load_shift_schedule(paths[0])
+    synthetic.write_shift_schedule(paths[2], operators, 2)
+    shift_schedule.load_shift_schedule(paths[2])
+    assert len(cached_files()) == 2
+    assert [identity[0] for identity in shift_schedule._schedules] == [os.path.abspath(p) for p in (paths[0], paths[2])]
+    assert sorted(cached_files()) == sorted(os.path.basename(shift_schedule._cache_path(identity))
+                                            for identity in shift_schedule._schedules)
+    assert (cache_dir / 'wb_entry.pkl').exists()
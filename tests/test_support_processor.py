@@ -0,0 +1,78 @@
+"""
+SupportProcessorの直受け・留守電の件数を、変更前の実装（条件ごとに行を絞り込んで数える）と比較する。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import synthetic
+from src.processors.support_processor import SupportProcessor
+
+GROUPS = {'ss': 'SS', 'tvs': 'TVS', 'kmn': '顧問先', 'hhd': 'HHD'}
+EXCLUDED_OUTCOMES = ['折返し不要・ｷｬﾝｾﾙ', 'ﾒｰﾙ・FAX回答（送信）', 'SRB投稿（要望）', 'ﾒｰﾙ・FAX文書（受信）']
+
+
+def reference_counts(df: pd.DataFrame) -> dict:
+    """変更前のprocess"""
+    start = synthetic.today_serial()
+    base_df = df.fillna('')
+    base_df = base_df[(base_df['登録日時'] >= start) & (base_df['登録日時'] < start + 1)]
+
+    direct = base_df[
+        base_df['受付タイプ'].isin(['直受け', 'HHD入電（直受け）'])
+        & ~base_df['顛末コード'].isin(EXCLUDED_OUTCOMES)
+        & base_df['かんたん！保守区分'].isin(['会員', ''])
+        & (base_df['回答タイプ'] != '2次T転送')
+    ]
+    ivr = base_df[(base_df['受付タイプ'] == '留守電') & ~base_df['顛末コード'].isin(EXCLUDED_OUTCOMES)]
+
+    result = {}
+    for key, support_type in GROUPS.items():
+        result[f'direct_{key}'] = int((direct['サポート区分'] == support_type).sum())
+    for key, support_type in GROUPS.items():
+        result[f'ivr_{key}'] = int((ivr['サポート区分'] == support_type).sum())
+    return result
+
+
+def run_process(df: pd.DataFrame) -> dict:
+    processor = SupportProcessor('')
+    processor.df = df
+    return processor.process()
+
+
+def with_blanks(df: pd.DataFrame, seed: int) -> pd.DataFrame:
+    """分類に使う列の一部を空欄・想定外の値にする（'登録日時'は変更しない）"""
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    for column in ('受付タイプ', '顛末コード', 'かんたん！保守区分', '回答タイプ', 'サポート区分'):
+        values = df[column].astype(object)
+        values[rng.random(len(df)) < 0.05] = np.nan
+        values[rng.random(len(df)) < 0.02] = '想定外'
+        df[column] = values
+    df.loc[rng.random(len(df)) < 0.05, 'かんたん！保守区分'] = ''
+    return df
+
+
+@pytest.mark.parametrize('rows, seed', [(2000, 0), (10000, 1), (50000, 2)])
+def test_process_matches_reference_on_synthetic(rows, seed):
+    df = synthetic.support_frame(rows, seed)
+    assert run_process(df) == reference_counts(df)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_process_matches_reference_with_blank_and_unknown_values(seed):
+    df = with_blanks(synthetic.support_frame(10000, seed), seed)
+    assert run_process(df) == reference_counts(df)
+
+
+def test_process_empty_frame():
+    df = synthetic.support_frame(100).iloc[:0]
+    result = run_process(df)
+    assert result == reference_counts(df)
+    assert set(result.values()) == {0}
+
+
+def test_crosstab_totals_match_rows_of_known_groups():
+    df = with_blanks(synthetic.support_frame(5000, 3), 3)
+    table = SupportProcessor.crosstab(df)
+    assert int(table.to_numpy().sum()) == int(df['サポート区分'].isin(GROUPS.values()).sum())
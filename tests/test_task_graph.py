@@ -0,0 +1,99 @@
+"""
+TaskGraph（依存順の実行と結果の受け渡し、失敗時のスキップ、停止信号での取消、資源ごとの同時実行数の上限）を確認する。
+"""
+import threading
+import time
+
+import pytest
+
+from src.task_graph import CANCELLED, DONE, FAILED, PENDING, SKIPPED, TaskGraph
+
+
+def fail(*_):
+    raise RuntimeError('失敗')
+
+
+def test_results_are_passed_in_dependency_order():
+    graph = TaskGraph()
+    graph.add('a', lambda: 1)
+    graph.add('b', lambda: 10)
+    graph.add('sum', lambda a, b: a + b, deps=['a', 'b'])
+    graph.add('double', lambda total, a: total * 2 - a, deps=['sum', 'a'])
+    run = graph.run(max_workers=2)
+    assert run.ok
+    assert run.results == {'a': 1, 'b': 10, 'sum': 11, 'double': 21}
+    assert run.timings['sum'][0] >= max(run.timings['a'][1], run.timings['b'][1])
+    assert run.duration('double') is not None
+
+
+def test_registration_is_validated():
+    graph = TaskGraph()
+    graph.add('a', lambda: 1)
+    with pytest.raises(ValueError):
+        graph.add('a', lambda: 2)
+    with pytest.raises(ValueError):
+        graph.add('b', lambda x: x, deps=['missing'])
+
+
+def test_failure_skips_dependents_but_not_independent_nodes():
+    graph = TaskGraph()
+    graph.add('sync', fail)
+    graph.add('load', lambda _: 'loaded', deps=['sync'])
+    graph.add('process', lambda _: 'processed', deps=['load'])
+    graph.add('scrape', lambda: 'scraped')
+    graph.add('calculate', lambda *_: 'kpi', deps=['process', 'scrape'])
+    run = graph.run(max_workers=2)
+
+    assert not run.ok
+    assert run.status == {'sync': FAILED, 'load': SKIPPED, 'process': SKIPPED,
+                          'scrape': DONE, 'calculate': SKIPPED}
+    assert isinstance(run.errors['sync'], RuntimeError)
+    assert run.results == {'scrape': 'scraped'}
+    assert run.names(SKIPPED) == ['load', 'process', 'calculate']
+    assert run.duration('load') is None
+
+    summary = run.summary()
+    assert 'sync: failed' in summary and 'calculate: skipped' in summary and 'scrape: done' in summary
+
+
+def test_stop_event_cancels_nodes_not_started():
+    stop_event = threading.Event()
+    graph = TaskGraph()
+    graph.add('first', stop_event.set)
+    graph.add('second', lambda _: 'second', deps=['first'])
+    graph.add('third', lambda _: 'third', deps=['second'])
+    run = graph.run(max_workers=1, stop_event=stop_event)
+    assert run.status == {'first': DONE, 'second': CANCELLED, 'third': CANCELLED}
+    assert PENDING not in run.status.values()
+
+
+def test_resource_limit_caps_concurrency_without_blocking_other_nodes():
+    lock = threading.Lock()
+    active = {'scrape': 0, 'max': 0}
+
+    def scrape():
+        with lock:
+            active['scrape'] += 1
+            active['max'] = max(active['max'], active['scrape'])
+        time.sleep(0.05)
+        with lock:
+            active['scrape'] -= 1
+
+    graph = TaskGraph()
+    for i in range(6):
+        graph.add(f'scrape:{i}', scrape, resource='session')
+    graph.add('sync', lambda: time.sleep(0.01) or 'synced')
+    run = graph.run(max_workers=6, limits={'session': 2})
+
+    assert run.ok
+    assert active['max'] == 2
+    # 資源の空きを待つノードがワーカーを占有しないため、資源を使わないノードは先に終わる
+    assert run.timings['sync'][1] < max(end for name, (_, end) in run.timings.items() if name != 'sync')
+
+
+def test_without_limit_resource_nodes_run_together():
+    barrier = threading.Barrier(3, timeout=5)
+    graph = TaskGraph()
+    for i in range(3):
+        graph.add(f'scrape:{i}', barrier.wait, resource='session')
+    assert graph.run(max_workers=3).ok
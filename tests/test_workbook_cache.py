@@ -0,0 +1,124 @@
+"""
+WorkbookCache（ファイルの内容によるキー、LRUの削除、キャッシュ以外のファイルを削除しないこと）を確認する。
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from src.processors.workbook_cache import WorkbookCache
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def source(tmp_path, name: str, content: bytes = b'data') -> str:
+    """キャッシュのキーに使うだけのファイル（Excelの代わり）"""
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def frame(rows: int = 1000, seed: int = 0) -> pd.DataFrame:
+    return pd.DataFrame({'value': range(seed, seed + rows), 'label': [f'row{i}' for i in range(rows)]})
+
+
+class Loader:
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self.calls = 0
+
+    def __call__(self) -> pd.DataFrame:
+        self.calls += 1
+        return self.df
+
+
+def entry_files(cache_dir: str) -> list:
+    return sorted(name for name in os.listdir(cache_dir) if name.startswith(WorkbookCache.ENTRY_PREFIX))
+
+
+def test_second_read_is_a_hit(tmp_path, cache_dir):
+    cache = WorkbookCache(cache_dir)
+    path = source(tmp_path, 'a.xlsx')
+    loader = Loader(frame())
+    first = cache.read_excel(path, name='test', loader=loader)
+    second = cache.read_excel(path, name='test', loader=loader)
+    pd.testing.assert_frame_equal(first, second)
+    assert loader.calls == 1
+    assert cache.stats['test'] == {'hits': 1, 'misses': 1}
+
+
+def test_changed_content_or_variant_is_a_miss(tmp_path, cache_dir):
+    cache = WorkbookCache(cache_dir)
+    path = source(tmp_path, 'a.xlsx', b'before')
+    loader = Loader(frame())
+    cache.read_excel(path, loader=loader)
+    cache.read_excel(path, variant='usecols', loader=loader)
+    source(tmp_path, 'a.xlsx', b'after!')
+    cache.read_excel(path, loader=loader)
+    assert loader.calls == 3
+
+
+def test_frame_without_range_index_is_stored_with_pickle(tmp_path, cache_dir):
+    cache = WorkbookCache(cache_dir)
+    path = source(tmp_path, 'a.xlsx')
+    df = frame().set_index('label')
+    cache.read_excel(path, loader=Loader(df))
+    pd.testing.assert_frame_equal(cache.read_excel(path, loader=Loader(None)), df)
+    assert all(name.endswith('.pkl') for name in entry_files(cache_dir))
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, cache_dir):
+    cache = WorkbookCache(cache_dir, max_bytes=10 ** 9)
+    paths = [source(tmp_path, f'{name}.xlsx', name.encode()) for name in 'abcd']
+    for i, path in enumerate(paths[:3]):
+        cache.read_excel(path, loader=Loader(frame(seed=i)))
+    # 作成順に古い参照日時にしてから、aを参照し直す（LRUの順はb, c, a）
+    for i, path in enumerate(paths[:3]):
+        for entry in cache._entry_paths(cache._key(path, repr([]))):
+            if os.path.exists(entry):
+                os.utime(entry, (1000 + i, 1000 + i))
+    cache.read_excel(paths[0], loader=Loader(None))
+
+    sizes = [os.path.getsize(os.path.join(cache_dir, name)) for name in entry_files(cache_dir)]
+    cache.max_bytes = sum(sizes) + max(sizes) // 2
+    loaders = {path: Loader(frame(seed=i)) for i, path in enumerate(paths)}
+    cache.read_excel(paths[3], loader=loaders[paths[3]])
+
+    assert len(entry_files(cache_dir)) == 3
+    for path in (paths[0], paths[2], paths[3]):
+        cache.read_excel(path, loader=loaders[path])
+        assert loaders[path].calls == (1 if path == paths[3] else 0), path
+    cache.read_excel(paths[1], loader=loaders[paths[1]])
+    assert loaders[paths[1]].calls == 1
+
+
+def test_other_files_in_cache_dir_are_not_counted_or_removed(tmp_path, cache_dir):
+    os.makedirs(cache_dir)
+    others = [os.path.join(cache_dir, name) for name in ('shift_202401.pkl', 'activity_state.pkl')]
+    for path in others:
+        with open(path, 'wb') as f:
+            f.write(b'x' * 100000)
+    cache = WorkbookCache(cache_dir, max_bytes=10 ** 9)
+    cache.read_excel(source(tmp_path, 'a.xlsx'), loader=Loader(frame()))
+    cache.max_bytes = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in entry_files(cache_dir))
+    cache._evict()
+    assert len(entry_files(cache_dir)) == 1
+
+    cache.clear()
+    assert entry_files(cache_dir) == []
+    assert all(os.path.exists(path) for path in others)
+
+
+def test_corrupt_entry_is_reloaded(tmp_path, cache_dir):
+    cache = WorkbookCache(cache_dir)
+    path = source(tmp_path, 'a.xlsx')
+    loader = Loader(frame())
+    cache.read_excel(path, loader=loader)
+    for name in entry_files(cache_dir):
+        with open(os.path.join(cache_dir, name), 'wb') as f:
+            f.write(b'broken')
+    pd.testing.assert_frame_equal(cache.read_excel(path, loader=loader), frame())
+    assert loader.calls == 2